@@ -4,8 +4,7 @@ from discord import app_commands
 import asyncio
 import os
 import json
-import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
 import io
 import matplotlib.pyplot as plt
@@ -35,172 +34,7 @@ GOLD_COLOR = discord.Color.gold()
 
 # ==================== BANCO DE DADOS ====================
 
-class Database:
-    def __init__(self):
-        self.db_path = "centraldiv.db"
-        self.init_database()
-    
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
-    def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Tabela de usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER,
-                guild_id INTEGER,
-                balance INTEGER DEFAULT 1000,
-                bank_balance INTEGER DEFAULT 0,
-                total_earned INTEGER DEFAULT 0,
-                total_spent INTEGER DEFAULT 0,
-                last_work TIMESTAMP,
-                last_daily TIMESTAMP,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        ''')
-        
-        # Tabela de transações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                type TEXT,
-                amount INTEGER,
-                description TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de lojas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS shops (
-                shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                owner_id INTEGER,
-                name TEXT,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de itens
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS items (
-                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                shop_id INTEGER,
-                name TEXT,
-                description TEXT,
-                price INTEGER,
-                stock INTEGER DEFAULT -1,
-                effect_type TEXT,
-                effect_data TEXT
-            )
-        ''')
-        
-        # Tabela de inventário
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                user_id INTEGER,
-                guild_id INTEGER,
-                item_id INTEGER,
-                quantity INTEGER DEFAULT 1,
-                PRIMARY KEY (user_id, guild_id, item_id)
-            )
-        ''')
-        
-        # Tabela de investimentos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS investments (
-                investment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                amount INTEGER,
-                risk_level TEXT,
-                end_date TIMESTAMP,
-                return_rate REAL,
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Tabela de missões diárias - CORRIGIDO (sem date() no PRIMARY KEY)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS daily_missions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                mission_type TEXT,
-                target INTEGER,
-                progress INTEGER DEFAULT 0,
-                reward INTEGER,
-                expires_at TIMESTAMP,
-                completed INTEGER DEFAULT 0,
-                UNIQUE(user_id, guild_id, expires_at)
-            )
-        ''')
-        
-        # Tabela de backups
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS backups (
-                backup_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                name TEXT,
-                data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def get_or_create_user(self, user_id, guild_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users WHERE user_id = ? AND guild_id = ?', (user_id, guild_id))
-        user = cursor.fetchone()
-        if not user:
-            cursor.execute('INSERT INTO users (user_id, guild_id) VALUES (?, ?)', (user_id, guild_id))
-            conn.commit()
-            cursor.execute('SELECT * FROM users WHERE user_id = ? AND guild_id = ?', (user_id, guild_id))
-            user = cursor.fetchone()
-        conn.close()
-        return user
-    
-    def get_balance(self, user_id, guild_id):
-        user = self.get_or_create_user(user_id, guild_id)
-        return user[2] if user else 0
-    
-    def add_money(self, user_id, guild_id, amount, description=""):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        self.get_or_create_user(user_id, guild_id)
-        cursor.execute('UPDATE users SET balance = balance + ?, total_earned = total_earned + ? WHERE user_id = ? AND guild_id = ?',
-                      (amount, amount, user_id, guild_id))
-        cursor.execute('INSERT INTO transactions (user_id, guild_id, type, amount, description) VALUES (?, ?, ?, ?, ?)',
-                      (user_id, guild_id, 'income', amount, description))
-        conn.commit()
-        conn.close()
-        return True
-    
-    def remove_money(self, user_id, guild_id, amount, description=""):
-        balance = self.get_balance(user_id, guild_id)
-        if balance < amount:
-            return False
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE users SET balance = balance - ?, total_spent = total_spent + ? WHERE user_id = ? AND guild_id = ?',
-                      (amount, amount, user_id, guild_id))
-        cursor.execute('INSERT INTO transactions (user_id, guild_id, type, amount, description) VALUES (?, ?, ?, ?, ?)',
-                      (user_id, guild_id, 'expense', amount, description))
-        conn.commit()
-        conn.close()
-        return True
-
-db = Database()
+from database.db import db, now_ts
 
 # ==================== BOT PRINCIPAL ====================
 
@@ -210,7 +44,6 @@ class CentralDiv(commands.Bot):
         self.CUSTOM_EMOJI = CUSTOM_EMOJI
         self.warns = {}
         self.muted_users = {}
-        self.logs_channels = {}
         
     async def setup_hook(self):
         try:
@@ -225,10 +58,10 @@ class CentralDiv(commands.Bot):
         await self.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name="economia & moderação | /help"))
 
     def get_logs_channel(self, guild_id):
-        return self.logs_channels.get(guild_id)
+        return db.guild_settings(guild_id)['logs_channel_id']
 
-    def set_logs_channel(self, guild_id, channel_id):
-        self.logs_channels[guild_id] = channel_id
+    async def set_logs_channel(self, guild_id, channel_id):
+        await db.aupdate_guild_settings(guild_id, logs_channel_id=channel_id)
 
 bot = CentralDiv()
 
@@ -437,7 +270,7 @@ async def clearwarns_command(interaction: discord.Interaction, usuario: discord.
 @app_commands.describe(canal="Canal para logs")
 @app_commands.checks.has_permissions(administrator=True)
 async def setlogs_command(interaction: discord.Interaction, canal: discord.TextChannel):
-    bot.set_logs_channel(interaction.guild.id, canal.id)
+    await bot.set_logs_channel(interaction.guild.id, canal.id)
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Canal de Logs Atualizado", description=f"Canal definido: {canal.mention}", color=GREEN_COLOR)
     await interaction.response.send_message(embed=embed)
 
@@ -455,10 +288,10 @@ async def logs_command(interaction: discord.Interaction):
 @app_commands.describe(usuario="Usuário para verificar")
 async def carteira(interaction: discord.Interaction, usuario: discord.Member = None):
     target = usuario or interaction.user
-    user_data = db.get_or_create_user(target.id, interaction.guild.id)
-    balance = user_data[2]
-    total_earned = user_data[4]
-    total_spent = user_data[5]
+    user_data = await db.aget_user(target.id, interaction.guild.id)
+    balance = user_data.balance
+    total_earned = user_data.total_earned
+    total_spent = user_data.total_spent
     
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Carteira de {target.display_name}", color=GOLD_COLOR, timestamp=datetime.now())
     embed.set_thumbnail(url=target.display_avatar.url)
@@ -469,13 +302,22 @@ async def carteira(interaction: discord.Interaction, usuario: discord.Member = N
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="trabalhar", description="Trabalhe para ganhar moedas")
-@app_commands.checks.cooldown(1, 3600, key=lambda i: (i.guild_id, i.user.id))
 async def trabalhar(interaction: discord.Interaction):
+    # Cooldown persistente e configurável por servidor (database/cooldowns.py)
+    now = now_ts()
+    remaining = db.use_cooldown('work', interaction.guild.id, interaction.user.id, now)
+    if remaining:
+        return await interaction.response.send_message(f"⏰ Você já trabalhou! Volte <t:{now + remaining}:R>.", ephemeral=True)
+    
     base = random.randint(100, 500)
     bonus = base if random.random() < 0.1 else 0
     total = base + bonus
     
-    db.add_money(interaction.user.id, interaction.guild.id, total, "Trabalho")
+    try:
+        await db.aadd_money(interaction.user.id, interaction.guild.id, total, "Trabalho")
+    except Exception:
+        db.cooldowns.release('work', interaction.guild.id, interaction.user.id, now)
+        raise
     
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Trabalho Realizado", description=f"Você ganhou **{total:,}** moedas!", color=GREEN_COLOR)
     if bonus:
@@ -490,13 +332,13 @@ async def transferir(interaction: discord.Interaction, usuario: discord.Member,
         return await interaction.response.send_message("❌ Não pode transferir para si mesmo!", ephemeral=True)
     
     tax = int(valor * 0.05)
-    final = valor - tax
     
-    if not db.remove_money(interaction.user.id, interaction.guild.id, valor, f"Transferência"):
+    # Mesmas faixas de lock do /transferir do EconomyCog
+    async with db.locks.hold(interaction.guild.id, interaction.user.id, usuario.id):
+        final_amount = await db.atransfer_money(interaction.user.id, usuario.id, interaction.guild.id, valor, 0.05)
+    if not final_amount:
         return await interaction.response.send_message("❌ Saldo insuficiente!", ephemeral=True)
     
-    db.add_money(usuario.id, interaction.guild.id, final, f"Transferência de {interaction.user}")
-    
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Transferência", color=BLUE_COLOR)
     embed.add_field(name="De", value=interaction.user.mention, inline=True)
     embed.add_field(name="Para", value=usuario.mention, inline=True)
@@ -507,14 +349,16 @@ async def transferir(interaction: discord.Interaction, usuario: discord.Member,
 @bot.tree.command(name="depositar", description="Adiciona moedas (Admin)")
 @app_commands.checks.has_permissions(administrator=True)
 async def depositar(interaction: discord.Interaction, usuario: discord.Member, valor: int):
-    db.add_money(usuario.id, interaction.guild.id, valor, "Depósito admin")
+    await db.aadd_money(usuario.id, interaction.guild.id, valor, "Depósito admin")
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Depósito", description=f"{valor:,} moedas para {usuario.mention}", color=GREEN_COLOR)
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="cobrar", description="Remove moedas (Admin)")
 @app_commands.checks.has_permissions(administrator=True)
 async def cobrar(interaction: discord.Interaction, usuario: discord.Member, valor: int):
-    if db.remove_money(usuario.id, interaction.guild.id, valor, "Cobrança admin"):
+    async with db.locks.hold(interaction.guild.id, usuario.id):
+        removed = await db.aremove_money(usuario.id, interaction.guild.id, valor, "Cobrança admin")
+    if removed:
         embed = discord.Embed(title=f"{CUSTOM_EMOJI} Cobrança", description=f"{valor:,} moedas de {usuario.mention}", color=RED_COLOR)
         await interaction.response.send_message(embed=embed)
     else:
@@ -526,47 +370,29 @@ async def cobrar(interaction: discord.Interaction, usuario: discord.Member, valo
 @app_commands.describe(nome="Nome da loja")
 async def loja(interaction: discord.Interaction, nome: str = None):
     if nome:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO shops (guild_id, owner_id, name) VALUES (?, ?, ?)',
-                      (interaction.guild.id, interaction.user.id, nome))
-        shop_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        shop_id = await db.acreate_shop(interaction.guild.id, interaction.user.id, nome)
         
         embed = discord.Embed(title=f"{CUSTOM_EMOJI} Loja Criada!", description=f"**{nome}**\nID: `{shop_id}`", color=GREEN_COLOR)
         await interaction.response.send_message(embed=embed)
     else:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM shops WHERE guild_id = ?', (interaction.guild.id,))
-        shops = cursor.fetchall()
-        conn.close()
+        shops = await db.aget_shops(interaction.guild.id)
         
         embed = discord.Embed(title=f"{CUSTOM_EMOJI} Lojas", color=BLUE_COLOR)
         for shop in shops:
-            owner = interaction.guild.get_member(shop[2])
-            embed.add_field(name=shop[3], value=f"Dono: {owner.mention if owner else '?'}\nID: `{shop[0]}`", inline=True)
+            owner = interaction.guild.get_member(shop.owner_id)
+            embed.add_field(name=shop.name, value=f"Dono: {owner.mention if owner else '?'}\nID: `{shop.shop_id}`", inline=True)
         
         await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="item", description="Cria item para venda")
 @app_commands.describe(loja="ID da loja", nome="Nome", preco="Preço", estoque="Estoque (-1 = infinito)")
 async def item(interaction: discord.Interaction, loja: int, nome: str, preco: int, estoque: int = -1):
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT owner_id FROM shops WHERE shop_id = ?', (loja,))
-    shop = cursor.fetchone()
+    shop = await db.aget_shop(loja)
     
-    if not shop or (shop[0] != interaction.user.id and not interaction.user.guild_permissions.administrator):
-        conn.close()
+    if not shop or (shop.owner_id != interaction.user.id and not interaction.user.guild_permissions.administrator):
         return await interaction.response.send_message("❌ Você não é dono desta loja!", ephemeral=True)
     
-    cursor.execute('INSERT INTO items (shop_id, name, price, stock) VALUES (?, ?, ?, ?)',
-                  (loja, nome, preco, estoque))
-    item_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    item_id = await db.acreate_item(loja, nome, preco, stock=estoque)
     
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Item Criado", description=f"**{nome}** - {preco:,} moedas\nID: `{item_id}`", color=GREEN_COLOR)
     await interaction.response.send_message(embed=embed)
@@ -574,29 +400,13 @@ async def item(interaction: discord.Interaction, loja: int, nome: str, preco: in
 @bot.tree.command(name="comprar", description="Compra um item")
 @app_commands.describe(item_id="ID do item")
 async def comprar(interaction: discord.Interaction, item_id: int):
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM items WHERE item_id = ?', (item_id,))
-    item = cursor.fetchone()
+    async with db.locks.hold(interaction.guild.id, interaction.user.id):
+        item, msg = await db.abuy_item(interaction.user.id, interaction.guild.id, item_id)
     
     if not item:
-        conn.close()
-        return await interaction.response.send_message("❌ Item não encontrado!", ephemeral=True)
-    
-    price = item[4]
-    if not db.remove_money(interaction.user.id, interaction.guild.id, price, f"Compra: {item[2]}"):
-        conn.close()
-        return await interaction.response.send_message("❌ Saldo insuficiente!", ephemeral=True)
-    
-    if item[5] > 0:
-        cursor.execute('UPDATE items SET stock = stock - 1 WHERE item_id = ?', (item_id,))
+        return await interaction.response.send_message(f"❌ {msg}!", ephemeral=True)
     
-    cursor.execute('INSERT OR REPLACE INTO inventory (user_id, guild_id, item_id, quantity) VALUES (?, ?, ?, COALESCE((SELECT quantity FROM inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?), 0) + 1)',
-                  (interaction.user.id, interaction.guild.id, item_id, interaction.user.id, interaction.guild.id, item_id))
-    conn.commit()
-    conn.close()
-    
-    embed = discord.Embed(title=f"{CUSTOM_EMOJI} Compra Realizada", description=f"Você comprou **{item[2]}**!", color=GREEN_COLOR)
+    embed = discord.Embed(title=f"{CUSTOM_EMOJI} Compra Realizada", description=f"Você comprou **{item.name}**!", color=GREEN_COLOR)
     await interaction.response.send_message(embed=embed)
 
 # ==================== COMANDOS DE GESTÃO ====================
@@ -618,13 +428,7 @@ async def backup(interaction: discord.Interaction):
         cat_data = {"name": category.name, "channels": [{"name": c.name, "type": str(c.type)} for c in category.channels]}
         backup_data["categories"].append(cat_data)
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO backups (guild_id, name, data) VALUES (?, ?, ?)',
-                  (guild.id, f"Backup_{datetime.now().strftime('%Y%m%d')}", json.dumps(backup_data)))
-    backup_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    backup_id = await db.acreate_backup(guild.id, f"Backup_{datetime.now().strftime('%Y%m%d')}", backup_data)
     
     json_str = json.dumps(backup_data, indent=2)
     buffer = io.BytesIO(json_str.encode())
@@ -660,6 +464,8 @@ async def cargo_temporario(interaction: discord.Interaction, usuario: discord.Me
 @app_commands.describe(cargo="Cargo inicial", canal="Canal de boas-vindas")
 @app_commands.checks.has_permissions(administrator=True)
 async def onboarding(interaction: discord.Interaction, cargo: discord.Role = None, canal: discord.TextChannel = None):
+    await db.aupdate_guild_settings(interaction.guild.id, onboarding_role_id=cargo.id if cargo else None,
+                                    welcome_channel_id=canal.id if canal else None)
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} Onboarding Configurado", color=GREEN_COLOR)
     if cargo:
         embed.add_field(name="Cargo Automático", value=cargo.mention, inline=True)
@@ -781,10 +587,9 @@ async def grafico(interaction: discord.Interaction, periodo: app_commands.Choice
     await interaction.response.defer()
     
     days = int(periodo.value) if periodo else 30
-    dates = [datetime.now() - timedelta(days=i) for i in range(days)]
-    dates.reverse()
-    
-    values = [10000 + (i * 500) + random.randint(-1000, 1000) for i in range(days)]
+    series = await db.aget_economy_series(interaction.guild.id, days)
+    dates = [datetime.fromtimestamp(row.day, timezone.utc) for row in series]
+    values = [row.money_supply for row in series]
     
     plt.style.use('dark_background')
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -832,11 +637,11 @@ async def help_command(interaction: discord.Interaction):
     embed = discord.Embed(title=f"{CUSTOM_EMOJI} CentralDiv - Ajuda", description="Bot completo de moderação e economia", color=BLUE_COLOR)
     
     embed.add_field(name="🛡️ Moderação", value="`/ban` `/kick` `/mute` `/unmute` `/warn` `/warns` `/clearwarns` `/setlogs` `/logs`", inline=False)
-    embed.add_field(name="💰 Economia", value="`/carteira` `/trabalhar` `/transferir` `/depositar` `/cobrar`", inline=False)
+    embed.add_field(name="💰 Economia", value="`/carteira` `/trabalhar` `/diario` `/transferir` `/depositar` `/cobrar` `/depositar_massa` `/cobrar_massa`", inline=False)
     embed.add_field(name="🏪 Loja", value="`/loja` `/item` `/comprar`", inline=False)
     embed.add_field(name="⚙️ Gestão", value="`/backup` `/cargo_temporario` `/onboarding`", inline=False)
     embed.add_field(name="🔒 Punições+", value="`/isolate` `/demote` `/readonly` `/jailmode` `/audit`", inline=False)
-    embed.add_field(name="📊 Gráficos", value="`/grafico` `/ranking`", inline=False)
+    embed.add_field(name="📊 Gráficos", value="`/grafico` `/ranking` `/economia stats`", inline=False)
     
     await interaction.response.send_message(embed=embed)
 
@@ -844,7 +649,18 @@ async def help_command(interaction: discord.Interaction):
 
 @bot.event
 async def on_member_join(member):
-    db.get_or_create_user(member.id, member.guild.id)
+    await db.aget_user(member.id, member.guild.id)
+    
+    config = db.guild_settings(member.guild.id)
+    role = member.guild.get_role(config['onboarding_role_id'] or 0)
+    if role:
+        try:
+            await member.add_roles(role, reason="Onboarding")
+        except discord.Forbidden:
+            pass
+    channel = member.guild.get_channel(config['welcome_channel_id'] or 0)
+    if channel:
+        await channel.send(f"👋 Bem-vindo(a), {member.mention}!")
 
 # ==================== INICIAR ====================
 
@@ -1,23 +1,21 @@
 from discord.ext import commands, tasks
+from discord import app_commands
 import discord
 import re
 import asyncio
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from database.db import db
+
 class AutoModCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         
-        # Configurações Anti-Spam
+        # Anti-Spam e Anti-Raid: limites vêm da configuração do servidor
+        # (spam_threshold/spam_interval, raid_threshold/raid_interval)
         self.message_cache = defaultdict(list)  # {user_id: [timestamps]}
-        self.spam_threshold = 5  # mensagens
-        self.spam_interval = 5   # segundos
-        
-        # Configurações Anti-Raid
         self.join_cache = []  # [timestamps]
-        self.raid_threshold = 10  # joins
-        self.raid_interval = 10   # segundos
         self.raid_mode = False
         
         # Lista de palavrões (expanda conforme necessário)
@@ -71,12 +69,17 @@ class AutoModCog(commands.Cog):
         if message.author.guild_permissions.administrator:
             return
         
-        await self.check_spam(message)
+        config = db.guild_settings(message.guild.id)
+        if not config['automod_enabled']:
+            return
+        
+        await self.check_spam(message, config)
         await self.check_bad_words(message)
-        await self.check_links(message)
+        if config['block_links']:
+            await self.check_links(message)
         await self.check_mentions(message)
 
-    async def check_spam(self, message):
+    async def check_spam(self, message, config):
         """Verifica spam de mensagens"""
         user_id = message.author.id
         now = datetime.now()
@@ -84,9 +87,9 @@ class AutoModCog(commands.Cog):
         self.message_cache[user_id].append(now)
         
         # Verificar se excedeu limite
-        recent = [ts for ts in self.message_cache[user_id] if (now - ts).seconds <= self.spam_interval]
+        recent = [ts for ts in self.message_cache[user_id] if (now - ts).seconds <= config['spam_interval']]
         
-        if len(recent) >= self.spam_threshold:
+        if len(recent) >= config['spam_threshold']:
             # Spam detectado
             try:
                 await message.author.timeout(timedelta(minutes=5), reason="Spam detectado")
@@ -204,20 +207,24 @@ class AutoModCog(commands.Cog):
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Anti-Raid: Monitora entradas de membros"""
+        config = db.guild_settings(member.guild.id)
+        if not config['automod_enabled']:
+            return
+        
         now = datetime.now()
         self.join_cache.append(now)
         
         # Limpar entradas antigas
-        self.join_cache = [ts for ts in self.join_cache if (now - ts).seconds <= self.raid_interval]
+        self.join_cache = [ts for ts in self.join_cache if (now - ts).seconds <= config['raid_interval']]
         
         # Verificar raid
-        if len(self.join_cache) >= self.raid_threshold and not self.raid_mode:
+        if len(self.join_cache) >= config['raid_threshold'] and not self.raid_mode:
             self.raid_mode = True
             
             # Ativar modo raid (bloquear novas entradas temporariamente)
             embed = discord.Embed(
                 title="🚨 MODO RAID ATIVADO",
-                description=f"Detectamos {len(self.join_cache)} entradas em {self.raid_interval} segundos!\nAtivando proteções...",
+                description=f"Detectamos {len(self.join_cache)} entradas em {config['raid_interval']} segundos!\nAtivando proteções...",
                 color=discord.Color.red()
             )
             
@@ -249,6 +256,36 @@ class AutoModCog(commands.Cog):
                     except:
                         continue
 
+    @app_commands.command(name="automod", description="Configura o AutoMod do servidor")
+    @app_commands.describe(
+        ativo="Liga ou desliga o AutoMod",
+        spam_limite="Mensagens no intervalo que contam como spam",
+        spam_intervalo="Intervalo do anti-spam em segundos",
+        links="Bloquear links encurtados ou suspeitos"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def automod(self, interaction: discord.Interaction, ativo: bool = None, spam_limite: int = None,
+                      spam_intervalo: int = None, links: bool = None):
+        fields = {
+            'automod_enabled': ativo,
+            'spam_threshold': spam_limite,
+            'spam_interval': spam_intervalo,
+            'block_links': links,
+        }
+        fields = {key: int(value) for key, value in fields.items() if value is not None}
+        if fields:
+            await db.aupdate_guild_settings(interaction.guild.id, **fields)
+        
+        config = db.guild_settings(interaction.guild.id)
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} AutoMod",
+            color=discord.Color.green() if config['automod_enabled'] else discord.Color.red()
+        )
+        embed.add_field(name="Status", value="✅ Ativo" if config['automod_enabled'] else "❌ Desligado", inline=True)
+        embed.add_field(name="Anti-Spam", value=f"{config['spam_threshold']} msgs / {config['spam_interval']}s", inline=True)
+        embed.add_field(name="Links", value="🔒 Bloqueados" if config['block_links'] else "🔓 Liberados", inline=True)
+        await interaction.response.send_message(embed=embed)
+
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
         """Detecta edição de mensagens para palavrões"""
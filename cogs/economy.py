@@ -2,23 +2,57 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timedelta
+import asyncio
 import random
 import matplotlib.pyplot as plt
 import io
 import os
+import re
+import traceback
 
-from database.db import db
+from database.db import db, from_ts, now_ts, to_ts
+from database.maturity import sleep_until
+
+# Membros verificados por fatia antes de devolver o event loop
+MEMBER_CHUNK = 5000
+# Espera antes de tentar de novo um pagamento que falhou
+RETRY_DELAY = 60
+# Segundos entre descarregamentos do progresso das missões
+MISSION_FLUSH_INTERVAL = 30
+# Segundos entre gravações dos cooldowns de /trabalhar e /diario
+COOLDOWN_FLUSH_INTERVAL = 30
+# Segundos entre fatias da conferência do extrato
+INTEGRITY_TICK = 2
+
+# Negócios à venda: tipo -> (nome, investimento, renda por dia)
+BUSINESS_TYPES = {
+    'barraca': ("Barraca", 5_000, 300),
+    'loja': ("Loja", 25_000, 1_750),
+    'fabrica': ("Fábrica", 100_000, 8_000),
+}
 
 class EconomyCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.payroll_wakeup = asyncio.Event()
+        self.investments_wakeup = asyncio.Event()
+        # (guild_id, user_id) -> início ainda não contado da call
+        self.voice_sessions = {}
         self.check_investments.start()
         self.pay_salaries.start()
+        self.flush_missions.start()
+        self.flush_cooldowns.start()
+        self.archive_ledger.start()
+        self.integrity_sweep.start()
         self.daily_reset.start()
     
     def cog_unload(self):
         self.check_investments.cancel()
         self.pay_salaries.cancel()
+        self.flush_missions.cancel()
+        self.flush_cooldowns.cancel()
+        self.archive_ledger.cancel()
+        self.integrity_sweep.cancel()
         self.daily_reset.cancel()
     
     # ===== BANCO =====
@@ -35,16 +69,8 @@ class EconomyCog(commands.Cog):
         
         if moeda and simbolo:
             # Configurar novo banco
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO guild_config (guild_id, currency_name, currency_symbol, start_balance)
-                VALUES (?, ?, ?, ?)
-            ''', (guild_id, moeda, simbolo, inicial or 1000))
-            
-            conn.commit()
-            conn.close()
+            await db.aupdate_guild_settings(guild_id, currency_name=moeda, currency_symbol=simbolo,
+                                            start_balance=inicial or 1000)
             
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Banco Central Criado",
@@ -54,18 +80,13 @@ class EconomyCog(commands.Cog):
             await interaction.response.send_message(embed=embed)
         else:
             # Mostrar configuração atual
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM guild_config WHERE guild_id = ?', (guild_id,))
-            config = cursor.fetchone()
-            conn.close()
-            
-            if not config:
+            if guild_id not in db.settings:
                 return await interaction.response.send_message("❌ Banco não configurado! Use `/banco criar`", ephemeral=True)
             
+            config = db.guild_settings(guild_id)
             embed = discord.Embed(
-                title=f"{self.bot.CUSTOM_EMOJI} {config[1]}",
-                description=f"Símbolo: {config[2]}\nInicial: {config[3]}",
+                title=f"{self.bot.CUSTOM_EMOJI} {config['currency_name']}",
+                description=f"Símbolo: {config['currency_symbol']}\nInicial: {config['start_balance']}",
                 color=discord.Color.blue()
             )
             await interaction.response.send_message(embed=embed)
@@ -76,19 +97,15 @@ class EconomyCog(commands.Cog):
         target = usuario or interaction.user
         guild_id = interaction.guild.id
         
-        user_data = db.get_or_create_user(target.id, guild_id)
-        balance = user_data[2]
-        total_earned = user_data[4]
-        total_spent = user_data[5]
+        user_data = await db.aget_user(target.id, guild_id)
+        balance = user_data.balance
+        total_earned = user_data.total_earned
+        total_spent = user_data.total_spent
         
         # Pegar config da moeda
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT currency_symbol, currency_name FROM guild_config WHERE guild_id = ?', (guild_id,))
-        config = cursor.fetchone()
-        symbol = config[0] if config else "💰"
-        name = config[1] if config else "Moedas"
-        conn.close()
+        config = db.guild_settings(guild_id)
+        symbol = config['currency_symbol']
+        name = config['currency_name']
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Carteira de {target.display_name}",
@@ -102,19 +119,9 @@ class EconomyCog(commands.Cog):
         embed.add_field(name="📉 Total Gasto", value=f"{total_spent:,}", inline=True)
         
         # Ranking no servidor
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT user_id, balance FROM users WHERE guild_id = ?
-            ORDER BY balance DESC
-        ''', (guild_id,))
-        ranking = cursor.fetchall()
-        conn.close()
-        
-        rank = next((i+1 for i, (uid, _) in enumerate(ranking) if uid == target.id), "?")
-        total = len(ranking)
+        rank, total = db.rank_of(target.id, guild_id)
         
-        embed.add_field(name="🏆 Ranking", value=f"#{rank} de {total}", inline=True)
+        embed.add_field(name="🏆 Ranking", value=f"#{rank or '?'} de {total}", inline=True)
         
         await interaction.response.send_message(embed=embed)
     
@@ -122,7 +129,7 @@ class EconomyCog(commands.Cog):
     @app_commands.describe(usuario="Usuário", valor="Quantidade", motivo="Motivo")
     @app_commands.checks.has_permissions(administrator=True)
     async def depositar(self, interaction: discord.Interaction, usuario: discord.Member, valor: int, motivo: str = "Não especificado"):
-        db.add_money(usuario.id, interaction.guild.id, valor, f"Depósito admin: {motivo}")
+        await db.aadd_money(usuario.id, interaction.guild.id, valor, f"Depósito admin: {motivo}")
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Depósito Realizado",
@@ -142,7 +149,9 @@ class EconomyCog(commands.Cog):
     @app_commands.describe(usuario="Usuário", valor="Quantidade", motivo="Motivo")
     @app_commands.checks.has_permissions(administrator=True)
     async def cobrar(self, interaction: discord.Interaction, usuario: discord.Member, valor: int, motivo: str = "Não especificado"):
-        if db.remove_money(usuario.id, interaction.guild.id, valor, f"Cobrança admin: {motivo}"):
+        async with db.locks.hold(interaction.guild.id, usuario.id):
+            removed = await db.aremove_money(usuario.id, interaction.guild.id, valor, f"Cobrança admin: {motivo}")
+        if removed:
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Cobrança Realizada",
                 description=f"{valor:,} moedas removidas de {usuario.mention}",
@@ -153,6 +162,76 @@ class EconomyCog(commands.Cog):
         else:
             await interaction.response.send_message("❌ Usuário não tem saldo suficiente!", ephemeral=True)
     
+    # ===== EM MASSA =====
+    
+    async def _bulk_targets(self, cargo, arquivo):
+        """IDs do cargo e/ou do arquivo enviado (qualquer número de 15 a 20 dígitos)"""
+        user_ids = []
+        if cargo:
+            user_ids += [member.id for member in cargo.members if not member.bot]
+        if arquivo:
+            text = (await arquivo.read()).decode('utf-8', errors='ignore')
+            user_ids += [int(match) for match in re.findall(r'\b\d{15,20}\b', text)]
+        return list(dict.fromkeys(user_ids))
+    
+    def _bulk_summary(self, title, color, valor, done, failures, motivo):
+        embed = discord.Embed(title=f"{self.bot.CUSTOM_EMOJI} {title}", color=color)
+        embed.add_field(name="✅ Processados", value=f"{len(done):,}", inline=True)
+        embed.add_field(name="💰 Total", value=f"{valor * len(done):,}", inline=True)
+        embed.add_field(name="❌ Falhas", value=f"{len(failures):,}", inline=True)
+        embed.add_field(name="Motivo", value=motivo, inline=False)
+        
+        if failures:
+            lines = [f"<@{user_id}>: {reason}" for user_id, reason in failures[:15]]
+            if len(failures) > 15:
+                lines.append(f"... e mais {len(failures) - 15}")
+            embed.add_field(name="Falhas", value="\n".join(lines), inline=False)
+        return embed
+    
+    @app_commands.command(name="depositar_massa", description="Adiciona moeda a um cargo ou lista de IDs (Admin)")
+    @app_commands.describe(valor="Quantidade por membro", cargo="Cargo que recebe",
+                           arquivo="Arquivo de texto com IDs", motivo="Motivo")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def depositar_massa(self, interaction: discord.Interaction, valor: int, cargo: discord.Role = None,
+                              arquivo: discord.Attachment = None, motivo: str = "Não especificado"):
+        if valor <= 0:
+            return await interaction.response.send_message("❌ Valor deve ser positivo!", ephemeral=True)
+        
+        await interaction.response.defer()
+        user_ids = await self._bulk_targets(cargo, arquivo)
+        if not user_ids:
+            return await interaction.followup.send("❌ Informe um cargo com membros ou um arquivo com IDs!", ephemeral=True)
+        
+        done, failures = await db.aadd_money_many(user_ids, interaction.guild.id, valor, f"Depósito admin: {motivo}")
+        embed = self._bulk_summary("Depósito em Massa", discord.Color.green(), valor, done, failures, motivo)
+        await interaction.followup.send(embed=embed)
+        
+        logs_cog = self.bot.get_cog('LogsCog')
+        if logs_cog:
+            await logs_cog.send_log(interaction.guild, embed)
+    
+    @app_commands.command(name="cobrar_massa", description="Remove moeda de um cargo ou lista de IDs (Admin)")
+    @app_commands.describe(valor="Quantidade por membro", cargo="Cargo cobrado",
+                           arquivo="Arquivo de texto com IDs", motivo="Motivo")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def cobrar_massa(self, interaction: discord.Interaction, valor: int, cargo: discord.Role = None,
+                           arquivo: discord.Attachment = None, motivo: str = "Não especificado"):
+        if valor <= 0:
+            return await interaction.response.send_message("❌ Valor deve ser positivo!", ephemeral=True)
+        
+        await interaction.response.defer()
+        user_ids = await self._bulk_targets(cargo, arquivo)
+        if not user_ids:
+            return await interaction.followup.send("❌ Informe um cargo com membros ou um arquivo com IDs!", ephemeral=True)
+        
+        done, failures = await db.aremove_money_many(user_ids, interaction.guild.id, valor, f"Cobrança admin: {motivo}")
+        embed = self._bulk_summary("Cobrança em Massa", discord.Color.red(), valor, done, failures, motivo)
+        await interaction.followup.send(embed=embed)
+        
+        logs_cog = self.bot.get_cog('LogsCog')
+        if logs_cog:
+            await logs_cog.send_log(interaction.guild, embed)
+    
     @app_commands.command(name="transferir", description="Transfere moedas para outro usuário")
     @app_commands.describe(usuario="Destinatário", valor="Quantidade")
     async def transferir(self, interaction: discord.Interaction, usuario: discord.Member, valor: int):
@@ -161,7 +240,8 @@ class EconomyCog(commands.Cog):
         
         # Taxa de 5%
         tax = 0.05
-        final_amount = db.transfer_money(interaction.user.id, usuario.id, interaction.guild.id, valor, tax)
+        async with db.locks.hold(interaction.guild.id, interaction.user.id, usuario.id):
+            final_amount = await db.atransfer_money(interaction.user.id, usuario.id, interaction.guild.id, valor, tax)
         
         if final_amount:
             tax_amount = int(valor * tax)
@@ -181,7 +261,8 @@ class EconomyCog(commands.Cog):
     @app_commands.describe(usuario="Usuário", quantidade="Número de transações")
     async def extrato(self, interaction: discord.Interaction, usuario: discord.Member = None, quantidade: int = 10):
         target = usuario or interaction.user
-        transactions = db.get_transactions(target.id, interaction.guild.id, quantidade)
+        transactions = await db.aget_transactions(target.id, interaction.guild.id, quantidade)
+        totals = await db.aget_ledger_totals(target.id, interaction.guild.id)
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Extrato de {target.display_name}",
@@ -193,21 +274,47 @@ class EconomyCog(commands.Cog):
             embed.description = "Nenhuma transação encontrada."
         else:
             for trans in transactions:
-                tipo = "🟢" if trans[3] == 'income' else "🔴"
-                data = datetime.fromisoformat(trans[5]).strftime("%d/%m %H:%M")
+                tipo = "🟢" if trans.type == 'income' else "🔴"
+                data = from_ts(trans.timestamp).strftime("%d/%m %H:%M")
                 embed.add_field(
                     name=f"{tipo} {data}",
-                    value=f"{trans[4]:,} - {trans[5][:50]}",
+                    value=f"{trans.amount:,} - {trans.description[:50]}",
                     inline=False
                 )
         
+        # Inclui o que já saiu da tabela quente para o arquivo
+        income = totals.get('income', (0, 0))[0]
+        expense = totals.get('expense', (0, 0))[0]
+        embed.set_footer(text=f"Histórico completo: +{income:,} / -{expense:,}")
+        
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
     # ===== TRABALHO & RENDA =====
     
+    async def _check_cooldown(self, interaction, kind, message):
+        """Marca o uso; se ainda em cooldown, responde e devolve None"""
+        now = now_ts()
+        remaining = db.use_cooldown(kind, interaction.guild.id, interaction.user.id, now)
+        if remaining:
+            await interaction.response.send_message(f"⏰ {message} Volte <t:{now + remaining}:R>.", ephemeral=True)
+            return None
+        return now
+    
+    async def _pay_cooldown(self, interaction, kind, used_at, amount, description):
+        try:
+            await db.aadd_money(interaction.user.id, interaction.guild.id, amount, description)
+        except Exception:
+            # Sem pagamento, sem cooldown
+            db.cooldowns.release(kind, interaction.guild.id, interaction.user.id, used_at)
+            raise
+    
     @app_commands.command(name="trabalhar", description="Trabalhe para ganhar moedas")
-    @app_commands.checks.cooldown(1, 3600, key=lambda i: (i.guild_id, i.user.id))
     async def trabalhar(self, interaction: discord.Interaction):
+        # Cooldown do servidor (guild_config.work_cooldown), sobrevive a reinícios
+        used_at = await self._check_cooldown(interaction, 'work', "Você já trabalhou!")
+        if used_at is None:
+            return
+        
         # Ganho aleatório entre 100 e 500
         base = random.randint(100, 500)
         
@@ -219,7 +326,7 @@ class EconomyCog(commands.Cog):
             event = "\n🎉 **EVENTO ESPECIAL!** Ganho dobrado!"
         
         total = base + bonus
-        db.add_money(interaction.user.id, interaction.guild.id, total, "Trabalho")
+        await self._pay_cooldown(interaction, 'work', used_at, total, "Trabalho")
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Trabalho Realizado",
@@ -232,24 +339,33 @@ class EconomyCog(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="diario", description="Recompensa diária")
+    async def diario(self, interaction: discord.Interaction):
+        used_at = await self._check_cooldown(interaction, 'daily', "Você já pegou a recompensa de hoje!")
+        if used_at is None:
+            return
+        
+        reward = db.settings.get(interaction.guild.id)['daily_reward']
+        await self._pay_cooldown(interaction, 'daily', used_at, reward, "Recompensa diária")
+        
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Recompensa Diária",
+            description=f"Você recebeu **{reward:,}** moedas! Volte amanhã.",
+            color=discord.Color.green()
+        )
+        await interaction.response.send_message(embed=embed)
+    
     @app_commands.command(name="missao", description="Missão diária")
     async def missao(self, interaction: discord.Interaction):
         user_id = interaction.user.id
         guild_id = interaction.guild.id
         
         # Verificar se já tem missão ativa
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM daily_missions 
-            WHERE user_id = ? AND guild_id = ? AND date(expires_at) = date('now')
-        ''', (user_id, guild_id))
-        mission = cursor.fetchone()
-        conn.close()
+        mission = await db.aget_today_mission(user_id, guild_id)
         
         if not mission:
             # Gerar nova missão
-            mission_data = db.generate_daily_mission(user_id, guild_id)
+            mission_data = await db.agenerate_daily_mission(user_id, guild_id)
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Nova Missão Diária!",
                 description=f"**Objetivo:** {mission_data[1]}\n**Recompensa:** {mission_data[3]} moedas",
@@ -257,11 +373,15 @@ class EconomyCog(commands.Cog):
             )
             embed.set_footer(text="Válida até 23:59")
         else:
-            status = "✅ Completa!" if mission[7] else f"Progresso: {mission[6]}/{mission[4]}"
+            # O contador em memória está à frente do que já foi gravado
+            current = db.mission_progress.current(guild_id, user_id)
+            if current is not None:
+                mission = mission.replace(progress=current[0], completed=mission.completed or current[1])
+            status = "✅ Completa!" if mission.completed else f"Progresso: {mission.progress}/{mission.target}"
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Missão de Hoje",
-                description=f"**{mission[2]}**\nProgresso: {mission[6]}/{mission[4]}\nRecompensa: {mission[5]} moedas",
-                color=discord.Color.gold() if not mission[7] else discord.Color.green()
+                description=f"**{mission.mission_type}**\nProgresso: {mission.progress}/{mission.target}\nRecompensa: {mission.reward} moedas",
+                color=discord.Color.gold() if not mission.completed else discord.Color.green()
             )
             embed.add_field(name="Status", value=status, inline=False)
         
@@ -275,9 +395,6 @@ class EconomyCog(commands.Cog):
         app_commands.Choice(name="Alto (40-100% retorno)", value="alto")
     ])
     async def investir(self, interaction: discord.Interaction, valor: int, risco: app_commands.Choice[str]):
-        if not db.remove_money(interaction.user.id, interaction.guild.id, valor, f"Investimento {risco.value}"):
-            return await interaction.response.send_message("❌ Saldo insuficiente!", ephemeral=True)
-        
         # Duração baseada no risco
         durations = {'baixo': 24, 'medio': 48, 'alto': 72}
         duration = durations[risco.value]
@@ -292,14 +409,11 @@ class EconomyCog(commands.Cog):
         
         end_date = datetime.now() + timedelta(hours=duration)
         
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO investments (user_id, guild_id, amount, risk_level, end_date, return_rate)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (interaction.user.id, interaction.guild.id, valor, risco.value, end_date, rate))
-        conn.commit()
-        conn.close()
+        async with db.locks.hold(interaction.guild.id, interaction.user.id):
+            investment_id = await db.acreate_investment(interaction.user.id, interaction.guild.id, valor, risco.value, end_date, rate)
+        if investment_id is None:
+            return await interaction.response.send_message("❌ Saldo insuficiente!", ephemeral=True)
+        self.investments_wakeup.set()
         
         retorno = int(valor * (1 + rate))
         
@@ -309,20 +423,13 @@ class EconomyCog(commands.Cog):
             color=discord.Color.blue()
         )
         embed.add_field(name="Retorno Estimado", value=f"{retorno:,} moedas", inline=True)
-        embed.add_field(name="Resgate em", value=f"<t:{int(end_date.timestamp())}:R>", inline=True)
+        embed.add_field(name="Resgate em", value=f"<t:{to_ts(end_date)}:R>", inline=True)
         
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="investimentos", description="Ver seus investimentos ativos")
     async def investimentos(self, interaction: discord.Interaction):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM investments 
-            WHERE user_id = ? AND guild_id = ? AND status = 'active'
-        ''', (interaction.user.id, interaction.guild.id))
-        investments = cursor.fetchall()
-        conn.close()
+        investments = await db.aget_active_investments(interaction.user.id, interaction.guild.id)
         
         if not investments:
             return await interaction.response.send_message("Você não tem investimentos ativos.", ephemeral=True)
@@ -333,34 +440,71 @@ class EconomyCog(commands.Cog):
         )
         
         for inv in investments:
-            end = datetime.fromisoformat(inv[6])
-            retorno = int(inv[4] * (1 + inv[7]))
-            status = "✅ Pronto!" if datetime.now() > end else f"⏰ <t:{int(end.timestamp())}:R>"
+            end = inv.end_date
+            retorno = int(inv.amount * (1 + inv.return_rate))
+            status = "✅ Pronto!" if now_ts() > end else f"⏰ <t:{end}:R>"
             
             embed.add_field(
-                name=f"{inv[5].upper()} - {inv[4]:,}",
+                name=f"{inv.risk_level.upper()} - {inv.amount:,}",
                 value=f"Retorno: {retorno:,}\n{status}",
                 inline=True
             )
         
         await interaction.response.send_message(embed=embed)
     
+    # ===== NEGÓCIOS =====
+    
+    @app_commands.command(name="abrir_negocio", description="Abre um negócio que rende moedas todo dia")
+    @app_commands.describe(tipo="Tipo de negócio", nome="Nome do negócio")
+    @app_commands.choices(tipo=[
+        app_commands.Choice(name=f"{label} ({cost:,} → {income:,}/dia)", value=key)
+        for key, (label, cost, income) in BUSINESS_TYPES.items()
+    ])
+    async def abrir_negocio(self, interaction: discord.Interaction, tipo: app_commands.Choice[str], nome: str):
+        label, cost, income = BUSINESS_TYPES[tipo.value]
+        async with db.locks.hold(interaction.guild.id, interaction.user.id):
+            business_id = await db.acreate_business(interaction.user.id, interaction.guild.id, nome, tipo.value, cost, income)
+        if business_id is None:
+            return await interaction.response.send_message(f"❌ Saldo insuficiente! Custa {cost:,} moedas.", ephemeral=True)
+        
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Negócio Aberto",
+            description=f"**{nome}** ({label})",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Investimento", value=f"{cost:,}", inline=True)
+        embed.add_field(name="Renda", value=f"{income:,}/dia", inline=True)
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="negocios", description="Lista seus negócios e recolhe a renda")
+    async def negocios(self, interaction: discord.Interaction):
+        businesses, collected = await db.aget_businesses(interaction.user.id, interaction.guild.id)
+        if not businesses:
+            return await interaction.response.send_message("Você não tem negócios. Use `/abrir_negocio`.", ephemeral=True)
+        
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Seus Negócios",
+            description=f"Renda recolhida agora: **{collected:,}**",
+            color=discord.Color.gold()
+        )
+        for business in businesses[:25]:
+            label = BUSINESS_TYPES.get(business.type, (business.type,))[0]
+            embed.add_field(
+                name=f"{business.name} ({label})",
+                value=f"Renda: {business.daily_income:,}/dia\nDesde <t:{business.created_at}:d>",
+                inline=True
+            )
+        embed.set_footer(text=f"Total: {sum(b.daily_income for b in businesses):,}/dia")
+        await interaction.response.send_message(embed=embed)
+    
     # ===== SALÁRIOS =====
     
     @app_commands.command(name="salario", description="Configura salários automáticos")
     @app_commands.describe(cargo="Cargo", valor="Valor", intervalo="Intervalo em horas")
     @app_commands.checks.has_permissions(administrator=True)
     async def salario(self, interaction: discord.Interaction, cargo: discord.Role, valor: int, intervalo: int):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO salaries (guild_id, role_id, amount, interval_hours, last_paid)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (interaction.guild.id, cargo.id, valor, intervalo, datetime.now()))
-        
-        conn.commit()
-        conn.close()
+        await db.aset_salary(interaction.guild.id, cargo.id, valor, intervalo)
+        self.payroll_wakeup.set()
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Salário Configurado",
@@ -371,56 +515,175 @@ class EconomyCog(commands.Cog):
     
     # ===== TASKS =====
     
-    @tasks.loop(minutes=5)
+    @tasks.loop()
     async def check_investments(self):
-        """Verifica investimentos prontos para resgate"""
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM investments 
-            WHERE status = 'active' AND end_date <= ?
-        ''', (datetime.now(),))
-        
-        ready = cursor.fetchall()
-        
-        for inv in ready:
-            user_id, guild_id, amount, rate = inv[1], inv[2], inv[4], inv[7]
-            retorno = int(amount * (1 + rate))
-            
-            db.add_money(user_id, guild_id, retorno, "Retorno de investimento")
-            
-            cursor.execute('UPDATE investments SET status = ? WHERE investment_id = ?', 
-                         ('completed', inv[0]))
-        
-        conn.commit()
-        conn.close()
+        """Dorme até o próximo vencimento e liquida tudo o que venceu no mesmo tick"""
+        # /investir acorda o loop: o investimento novo pode vencer antes
+        await sleep_until(db.maturities.next_due(), self.investments_wakeup)
+        
+        due = db.maturities.next_due()
+        if due is not None and due <= now_ts():
+            try:
+                await db.asettle_investments(now_ts())
+            except Exception:
+                traceback.print_exc()
+                await asyncio.sleep(RETRY_DELAY)
     
-    @tasks.loop(hours=1)
+    @check_investments.before_loop
+    async def before_check_investments(self):
+        await self.bot.wait_until_ready()
+    
+    @tasks.loop()
     async def pay_salaries(self):
-        """Paga salários automáticos"""
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM salaries')
-        salaries = cursor.fetchall()
+        """Dorme até o próximo salário vencer e paga todos os vencidos"""
+        # /salario acorda o loop: o salário novo pode vencer antes
+        await sleep_until(db.payroll.next_due(), self.payroll_wakeup)
         
-        for sal in salaries:
-            guild_id, role_id, amount, interval, last_paid = sal[0], sal[1], sal[2], sal[3], sal[4]
-            
-            if datetime.fromisoformat(last_paid) + timedelta(hours=interval) <= datetime.now():
-                guild = self.bot.get_guild(guild_id)
-                if guild:
-                    role = guild.get_role(role_id)
-                    if role:
-                        for member in role.members:
-                            db.add_money(member.id, guild_id, amount, f"Salário: {role.name}")
-                
-                cursor.execute('UPDATE salaries SET last_paid = ? WHERE guild_id = ? AND role_id = ?',
-                             (datetime.now(), guild_id, role_id))
-        
-        conn.commit()
-        conn.close()
+        # Todos os pagamentos caem no mesmo lote do writer
+        await asyncio.gather(*(self._pay_salary(sal) for sal in db.payroll.pop_due(now_ts())))
+    
+    @pay_salaries.before_loop
+    async def before_pay_salaries(self):
+        await self.bot.wait_until_ready()
+    
+    async def _pay_salary(self, sal):
+        member_ids = []
+        description = "Salário"
+        guild = self.bot.get_guild(sal.guild_id)
+        role = guild.get_role(sal.role_id) if guild else None
+        if role:
+            member_ids = await self._role_member_ids(guild, role)
+            description = f"Salário: {role.name}"
+        
+        try:
+            await db.apay_salary(sal.guild_id, sal.role_id, member_ids, sal.amount, description)
+        except Exception:
+            traceback.print_exc()
+            db.payroll.put(sal, now_ts() + RETRY_DELAY)
+    
+    async def _role_member_ids(self, guild, role):
+        """Membros do cargo lidos do cache em fatias, sem travar o event loop"""
+        members = guild.members
+        member_ids = []
+        for start in range(0, len(members), MEMBER_CHUNK):
+            member_ids += [member.id for member in members[start:start + MEMBER_CHUNK]
+                           if member.get_role(role.id)]
+            await asyncio.sleep(0)
+        return member_ids
+    
+    # ===== PROGRESSO DAS MISSÕES =====
+    # Os eventos só somam no contador em memória (db.mission_progress);
+    # flush_missions grava tudo num lote a cada MISSION_FLUSH_INTERVAL.
+    
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild and not message.author.bot:
+            db.mission_progress.record(message.guild.id, message.author.id, 'messages')
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        if payload.guild_id and not (payload.member and payload.member.bot):
+            db.mission_progress.record(payload.guild_id, payload.user_id, 'reactions')
+    
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction, command):
+        if interaction.guild:
+            db.mission_progress.record(interaction.guild.id, interaction.user.id, 'commands')
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if member.bot:
+            return
+        key = (member.guild.id, member.id)
+        if after.channel is not None and before.channel is None:
+            self.voice_sessions[key] = now_ts()
+        elif after.channel is None and key in self.voice_sessions:
+            self._count_voice(key, now_ts())
+            del self.voice_sessions[key]
+    
+    def _count_voice(self, key, now):
+        """Soma os minutos inteiros de call; a sobra fica para a próxima vez"""
+        minutes = (now - self.voice_sessions[key]) // 60
+        if minutes > 0:
+            db.mission_progress.record(key[0], key[1], 'voice', minutes, now)
+            self.voice_sessions[key] += minutes * 60
+    
+    @tasks.loop(seconds=MISSION_FLUSH_INTERVAL)
+    async def flush_missions(self):
+        """Grava os contadores e paga as missões concluídas desde o último lote"""
+        now = now_ts()
+        for key in list(self.voice_sessions):
+            self._count_voice(key, now)
+        
+        updates, completions = db.mission_progress.drain()
+        if not updates and not completions:
+            db.mission_progress.prune(now, ())
+            return
+        try:
+            await db.aflush_mission_progress(updates, completions)
+        except Exception:
+            traceback.print_exc()
+            db.mission_progress.restore(updates)
+            return
+        db.mission_progress.prune(now, completions)
+    
+    @flush_missions.before_loop
+    async def before_flush_missions(self):
+        await self.bot.wait_until_ready()
+    
+    @flush_missions.after_loop
+    async def after_flush_missions(self):
+        # Descarregamento final ao descarregar o cog
+        updates, completions = db.mission_progress.drain()
+        if updates or completions:
+            await db.aflush_mission_progress(updates, completions)
+    
+    @tasks.loop(seconds=COOLDOWN_FLUSH_INTERVAL)
+    async def flush_cooldowns(self):
+        """Grava em lote os usos de /trabalhar e /diario (write-behind)"""
+        try:
+            await db.aflush_cooldowns()
+        except Exception:
+            traceback.print_exc()
+    
+    @flush_cooldowns.before_loop
+    async def before_flush_cooldowns(self):
+        await self.bot.wait_until_ready()
+    
+    @flush_cooldowns.after_loop
+    async def after_flush_cooldowns(self):
+        await db.aflush_cooldowns()
+    
+    @tasks.loop(hours=6)
+    async def archive_ledger(self):
+        """Tira da tabela quente os lançamentos com mais de LEDGER_HOT_DAYS dias"""
+        try:
+            moved = await db.aarchive_ledger()
+        except Exception:
+            traceback.print_exc()
+            return
+        if moved:
+            print(f"📦 {moved} lançamentos arquivados")
+    
+    @archive_ledger.before_loop
+    async def before_archive_ledger(self):
+        await self.bot.wait_until_ready()
+    
+    @tasks.loop(seconds=INTEGRITY_TICK)
+    async def integrity_sweep(self):
+        """Confere uma fatia dos saldos contra o extrato (db.integrity guarda onde parou)"""
+        try:
+            report = await db.aintegrity_step([guild.id for guild in self.bot.guilds])
+        except Exception:
+            traceback.print_exc()
+            return
+        if report is not None and report.drift:
+            print(f"⚠️ {len(report.drift)} saldos fora do extrato no servidor {report.guild_id} "
+                  f"(diferença líquida {report.net_drift:+,})")
+    
+    @integrity_sweep.before_loop
+    async def before_integrity_sweep(self):
+        await self.bot.wait_until_ready()
     
     @tasks.loop(hours=24)
     async def daily_reset(self):
@@ -1,35 +1,162 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import io
+import traceback
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from database.db import db
+from database.db import db, day_ts, now_ts
+
+# Segundos entre retratos do saldo em circulação (economy_daily)
+SNAPSHOT_INTERVAL = 300
+# Pontos desenhados no gráfico de saldo, qualquer que seja o histórico
+CHART_POINTS = 500
+# Janela da velocidade do dinheiro em /economia stats
+VELOCITY_DAYS = 30
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Pontos da curva de Lorenz guardados e desenhados
+LORENZ_POINTS = 101
+
+def lttb(x, y, n):
+    """Largest-Triangle-Three-Buckets: reduz a curva a `n` pontos.
+    
+    O primeiro e o último ficam; o resto é dividido em n - 2 faixas e de
+    cada uma sai o ponto que forma o maior triângulo com o escolhido na
+    faixa anterior e a média da seguinte. Picos e vales sobrevivem.
+    """
+    size = len(x)
+    if size <= n:
+        return x, y
+    
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    chosen = np.empty(n, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        chosen[i + 1] = a
+    return x[chosen], y[chosen]
+
+def _extremes(index, y, width):
+    """Índices do primeiro, último, mínimo e máximo de cada faixa de `width`"""
+    buckets = index // width
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(index)] - 1
+    # Ordenado por faixa e valor: a faixa ocupa as mesmas posições
+    order = np.lexsort((y, buckets))
+    keep = np.unique(np.concatenate((starts, ends, order[starts], order[ends])))
+    return keep, len(starts)
+
+class CurveReducer:
+    """Recebe a curva em blocos e guarda no máximo 8 * n pontos.
+    
+    Os pontos caem em faixas de `width` posições e de cada faixa ficam o
+    primeiro, o último, o mínimo e o máximo. Passando de 2 * n faixas, a
+    largura dobra (os extremos de uma faixa larga estão entre os das duas
+    que ela junta). No fim, lttb reduz o que sobrou a n pontos.
+    """
+    
+    def __init__(self, n):
+        self.n = n
+        self.width = 1
+        self.count = 0
+        self.index = np.empty(0, dtype=np.int64)
+        self.x = np.empty(0, dtype=np.float64)
+        self.y = np.empty(0, dtype=np.float64)
+    
+    def add(self, x, y):
+        index = np.arange(self.count, self.count + len(x), dtype=np.int64)
+        self.count += len(x)
+        self.index = np.concatenate((self.index, index))
+        self.x = np.concatenate((self.x, np.asarray(x, dtype=np.float64)))
+        self.y = np.concatenate((self.y, np.asarray(y, dtype=np.float64)))
+        if len(self.index) <= 8 * self.n:
+            return
+        
+        while True:
+            keep, buckets = _extremes(self.index, self.y, self.width)
+            if buckets <= 2 * self.n:
+                break
+            self.width *= 2
+        self.index, self.x, self.y = self.index[keep], self.x[keep], self.y[keep]
+    
+    def result(self):
+        return lttb(self.x, self.y, self.n)
+
+def economy_stats(balances, volume):
+    """Desigualdade e giro da economia a partir dos saldos em ordem crescente.
+    
+    Gini pela soma dos saldos ponderada pela posição, Lorenz pela soma
+    acumulada e velocidade como volume lançado (ganhos + gastos) no período
+    dividido pelo saldo em circulação.
+    """
+    b = np.asarray(balances, dtype=np.float64)
+    n = len(b)
+    supply = b.sum()
+    shares = np.linspace(0, 1, n + 1)
+    if supply > 0:
+        positions = np.arange(1, n + 1, dtype=np.float64)
+        gini = 2 * np.dot(positions, b) / (n * supply) - (n + 1) / n
+        lorenz = np.concatenate(([0.0], np.cumsum(b) / supply))
+        top = max(1, int(np.ceil(n * 0.01)))
+        top_share = b[-top:].sum() / supply
+        velocity = volume / supply
+    else:
+        # Ninguém tem nada: igualdade perfeita, sem giro
+        gini = top_share = velocity = 0.0
+        lorenz = shares
+    
+    grid = np.linspace(0, 1, LORENZ_POINTS)
+    return {
+        'users': n,
+        'supply': int(supply),
+        'mean': float(b.mean()),
+        'gini': float(gini),
+        'percentiles': dict(zip(PERCENTILES, np.percentile(b, PERCENTILES).tolist())),
+        'top_share': float(top_share),
+        'velocity': float(velocity),
+        'lorenz': (grid, np.interp(grid, shares, lorenz)),
+    }
 
 class GraphicsCog(commands.Cog):
+    economia = app_commands.Group(name="economia", description="Saúde da economia do servidor")
+    
     def __init__(self, bot):
         self.bot = bot
+        # guild_id -> ((versão do extrato, dia), estatísticas, PNG da curva de Lorenz)
+        self.stats_cache = {}
+        self.snapshot_economy.start()
+    
+    def cog_unload(self):
+        self.snapshot_economy.cancel()
     
     @app_commands.command(name="grafico", description="Gera gráfico da economia do servidor")
-    @app_commands.describe(periodo="Período (7d, 30d, 90d)")
+    @app_commands.describe(periodo="Período (7d, 30d, 90d)", usuario="Mostra o saldo deste usuário ao longo do tempo")
     @app_commands.choices(periodo=[
         app_commands.Choice(name="7 dias", value="7"),
         app_commands.Choice(name="30 dias", value="30"),
         app_commands.Choice(name="90 dias", value="90")
     ])
-    async def grafico(self, interaction: discord.Interaction, periodo: app_commands.Choice[str] = None):
-        days = int(periodo.value) if periodo else 30
+    async def grafico(self, interaction: discord.Interaction, periodo: app_commands.Choice[str] = None,
+                      usuario: discord.Member = None):
+        if usuario is not None:
+            return await self._user_chart(interaction, usuario)
         
-        # Gerar dados simulados (em produção, buscar do banco)
-        dates = [datetime.now() - timedelta(days=i) for i in range(days)]
-        dates.reverse()
+        days = int(periodo.value) if periodo else 30
         
-        # Simular crescimento econômico
-        base = 10000
-        values = [base + (i * 500) + np.random.randint(-1000, 1000) for i in range(days)]
+        # Um registro pronto por dia (economy_daily), sem varrer o extrato
+        series = await db.aget_economy_series(interaction.guild.id, days)
+        dates = [datetime.fromtimestamp(row.day, timezone.utc) for row in series]
+        values = [row.money_supply for row in series]
         
         # Criar gráfico
         plt.style.use('dark_background')
@@ -62,23 +189,89 @@ class GraphicsCog(commands.Cog):
             color=discord.Color.green(),
             timestamp=datetime.now()
         )
+        embed.add_field(name="Em circulação", value=f"{values[-1]:,}", inline=True)
+        embed.add_field(name="Ganhos", value=f"{sum(row.total_earned for row in series):,}", inline=True)
+        embed.add_field(name="Gastos", value=f"{sum(row.total_spent for row in series):,}", inline=True)
+        embed.add_field(name="Transações", value=f"{sum(row.tx_count for row in series):,}", inline=True)
+        embed.add_field(name="Ativos hoje", value=f"{series[-1].active_users:,}", inline=True)
         
         plt.close()
         
         await interaction.response.send_message(embed=embed, file=file)
     
+    async def _balance_curve(self, user_id, guild_id):
+        """Histórico inteiro reduzido a CHART_POINTS: (instantes, saldos, resumo).
+        
+        A curva anda para a frente a partir do saldo de abertura: um
+        lançamento gravado entre dois blocos só a estende, e cada bloco é
+        reduzido ao chegar (a memória não cresce com o histórico).
+        """
+        user = await db.aget_user(user_id, guild_id)
+        if user is None:
+            return None
+        
+        reducer = CurveReducer(CHART_POINTS)
+        balance = user.opening_balance
+        async for rows in db.aiter_balance_deltas(user_id, guild_id):
+            data = np.array(rows, dtype=np.int64)
+            values = balance + np.cumsum(data[:, 1])
+            balance = int(values[-1])
+            reducer.add(data[:, 0], values)
+        if not reducer.count:
+            return None
+        
+        entries = reducer.count
+        reducer.add([now_ts()], [balance])
+        # Os extremos sobrevivem à redução por faixas, não necessariamente ao lttb
+        summary = {'entries': entries, 'max': int(reducer.y.max()), 'min': int(reducer.y.min())}
+        times, values = reducer.result()
+        return times, values, summary
+    
+    async def _user_chart(self, interaction, member):
+        await interaction.response.defer()
+        
+        curve = await self._balance_curve(member.id, interaction.guild.id)
+        if curve is None:
+            return await interaction.followup.send(f"❌ {member.display_name} ainda não tem movimentações.")
+        times, values, summary = curve
+        dates = [datetime.fromtimestamp(t, timezone.utc) for t in times]
+        
+        plt.style.use('dark_background')
+        fig, ax = plt.subplots(figsize=(10, 6))
+        
+        ax.plot(dates, values, color='#00aaff', linewidth=2)
+        ax.fill_between(dates, values, alpha=0.3, color='#00aaff')
+        
+        ax.set_title(f'💰 Saldo de {member.display_name}', fontsize=16, color='white')
+        ax.set_xlabel('Data', color='white')
+        ax.set_ylabel('Saldo', color='white')
+        
+        ax.grid(True, alpha=0.3)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%y'))
+        plt.xticks(rotation=45)
+        
+        plt.tight_layout()
+        
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        buffer.seek(0)
+        plt.close()
+        
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Histórico de Saldo",
+            description=f"{member.mention}: {summary['entries']:,} movimentações, {len(times)} pontos no gráfico",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="Saldo atual", value=f"{int(values[-1]):,}", inline=True)
+        embed.add_field(name="Máximo", value=f"{summary['max']:,}", inline=True)
+        embed.add_field(name="Mínimo", value=f"{summary['min']:,}", inline=True)
+        
+        await interaction.followup.send(embed=embed, file=discord.File(buffer, filename='grafico_saldo.png'))
+    
     @app_commands.command(name="ranking", description="Mostra ranking dos mais ricos")
     async def ranking(self, interaction: discord.Interaction):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT user_id, balance FROM users 
-            WHERE guild_id = ?
-            ORDER BY balance DESC
-            LIMIT 10
-        ''', (interaction.guild.id,))
-        top = cursor.fetchall()
-        conn.close()
+        top = db.top_ranking(interaction.guild.id, 10)
         
         # Criar imagem do ranking
         fig, ax = plt.subplots(figsize=(10, 8))
@@ -114,6 +307,121 @@ class GraphicsCog(commands.Cog):
         plt.close()
         
         await interaction.response.send_message(file=file)
+    
+    @economia.command(name="stats", description="Desigualdade, concentração e giro do dinheiro no servidor")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def economia_stats(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        guild_id = interaction.guild.id
+        
+        # Versão lida antes dos dados: se algo mudar no meio, a próxima chamada recalcula
+        # A janela da velocidade anda à meia-noite mesmo sem lançamentos novos
+        version = (db.ledger_version(guild_id), day_ts(now_ts()))
+        cached = self.stats_cache.get(guild_id)
+        if cached is None or cached[0] != version:
+            balances = await db.aget_guild_balances(guild_id)
+            if not balances:
+                return await interaction.followup.send("❌ Ninguém tem conta neste servidor ainda.")
+            series = await db.aget_economy_series(guild_id, VELOCITY_DAYS)
+            volume = sum(row.total_earned + row.total_spent for row in series)
+            stats = economy_stats(balances, volume)
+            cached = self.stats_cache[guild_id] = (version, stats, self._lorenz_chart(stats))
+        _, stats, image = cached
+        
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Saúde da Economia",
+            description=f"{stats['users']:,} contas",
+            color=discord.Color.gold(),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="Em circulação", value=f"{stats['supply']:,}", inline=True)
+        embed.add_field(name="Saldo médio", value=f"{stats['mean']:,.0f}", inline=True)
+        embed.add_field(name="Gini", value=f"{stats['gini']:.3f}", inline=True)
+        embed.add_field(name="Top 1% detém", value=f"{stats['top_share']:.1%}", inline=True)
+        embed.add_field(name=f"Velocidade ({VELOCITY_DAYS}d)", value=f"{stats['velocity']:.2f}x", inline=True)
+        embed.add_field(
+            name="Percentis",
+            value=" · ".join(f"P{p}: {value:,.0f}" for p, value in stats['percentiles'].items()),
+            inline=False
+        )
+        embed.set_image(url="attachment://lorenz.png")
+        
+        await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(image), filename='lorenz.png'))
+    
+    @economia.command(name="integridade", description="Saldos que não batem com o extrato")
+    @app_commands.describe(agora="Confere o servidor inteiro agora em vez de mostrar a última varredura")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def economia_integridade(self, interaction: discord.Interaction, agora: bool = False):
+        await interaction.response.defer()
+        guild_id = interaction.guild.id
+        
+        if agora:
+            report = await db.averify_guild(guild_id)
+        else:
+            report = db.integrity.reports.get(guild_id)
+            if report is None:
+                return await interaction.followup.send(
+                    "⏳ A varredura ainda não passou por este servidor. Use `agora: True` para conferir já.")
+        
+        ok = not report.drift
+        embed = discord.Embed(
+            title=f"{self.bot.CUSTOM_EMOJI} Integridade do Extrato",
+            description="✅ Todos os saldos batem com o extrato" if ok else
+                        f"⚠️ {len(report.drift):,} saldos fora do extrato desde a conferência anterior",
+            color=discord.Color.green() if ok else discord.Color.red(),
+            timestamp=datetime.fromtimestamp(report.finished_at, timezone.utc)
+        )
+        embed.add_field(name="Contas conferidas", value=f"{report.checked:,}", inline=True)
+        embed.add_field(name="Diferença líquida", value=f"{report.net_drift:+,}", inline=True)
+        if not ok:
+            lines = []
+            for entry in report.worst(8):
+                member = interaction.guild.get_member(entry.user_id)
+                name = member.mention if member else f"Usuário {entry.user_id}"
+                origin = " (do zero)" if entry.full else ""
+                lines.append(f"{name}: extrato {entry.expected:,}, saldo {entry.actual:,} ({entry.diff:+,}){origin}")
+            embed.add_field(name="Maiores divergências", value="\n".join(lines), inline=False)
+        
+        await interaction.followup.send(embed=embed)
+    
+    def _lorenz_chart(self, stats):
+        grid, lorenz = stats['lorenz']
+        
+        plt.style.use('dark_background')
+        fig, ax = plt.subplots(figsize=(8, 8))
+        
+        ax.plot(grid, grid, color='white', linestyle='--', alpha=0.5, label='Igualdade')
+        ax.plot(grid, lorenz, color='#ffd700', linewidth=2, label='Lorenz')
+        ax.fill_between(grid, lorenz, grid, alpha=0.3, color='#ffd700')
+        
+        ax.set_title(f"📊 Curva de Lorenz (Gini {stats['gini']:.3f})", fontsize=16, color='white')
+        ax.set_xlabel('Parcela das contas', color='white')
+        ax.set_ylabel('Parcela do dinheiro', color='white')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        
+        plt.tight_layout()
+        
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        plt.close()
+        return buffer.getvalue()
+    
+    @tasks.loop(seconds=SNAPSHOT_INTERVAL)
+    async def snapshot_economy(self):
+        """Grava o saldo em circulação de hoje dos servidores com movimento"""
+        try:
+            await db.asnapshot_economy()
+        except Exception:
+            traceback.print_exc()
+    
+    @snapshot_economy.before_loop
+    async def before_snapshot_economy(self):
+        await self.bot.wait_until_ready()
+    
+    @snapshot_economy.after_loop
+    async def after_snapshot_economy(self):
+        await db.asnapshot_economy()
 
 async def setup(bot):
     await bot.add_cog(GraphicsCog(bot))
@@ -14,7 +14,7 @@ class LogsCog(commands.Cog):
             # Tentar encontrar canal padrão
             for channel in guild.text_channels:
                 if "central-logs" in channel.name or "logs" in channel.name:
-                    self.bot.set_logs_channel(guild.id, channel.id)
+                    await self.bot.set_logs_channel(guild.id, channel.id)
                     channel_id = channel.id
                     break
         
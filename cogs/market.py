@@ -2,16 +2,48 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timedelta
+import asyncio
+import functools
+import traceback
 
-from database.db import db
+from database.auctions import AuctionHouse
+from database.db import db, now_ts
+from database.maturity import sleep_until
+
+# Botões de lance: percentual sobre o lance atual
+BID_STEPS = (5, 10, 25)
+# Intervalo mínimo entre edições da mensagem de um leilão (rate limit do Discord)
+EDIT_INTERVAL = 2
+
+class AuctionView(discord.ui.View):
+    """Botões de lance; persistentes, com custom_id fixo por leilão"""
+    
+    def __init__(self, cog, auction_id, disabled=False):
+        super().__init__(timeout=None)
+        for percent in BID_STEPS:
+            button = discord.ui.Button(label=f"+{percent}%", style=discord.ButtonStyle.green,
+                                       custom_id=f"leilao:{auction_id}:{percent}", disabled=disabled)
+            button.callback = functools.partial(cog.bid_button, auction_id, percent)
+            self.add_item(button)
 
 class MarketCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.house = AuctionHouse(db, self._auction_changed)
+        self.auctions_wakeup = asyncio.Event()
+        self._pending_edits = {}
+        self._edit_tasks = {}
         self.check_auctions.start()
     
+    async def cog_load(self):
+        # Botões dos leilões em andamento voltam a funcionar após reiniciar
+        for auction in await db.aget_active_auctions():
+            if auction.message_id:
+                self.bot.add_view(AuctionView(self, auction.auction_id), message_id=auction.message_id)
+    
     def cog_unload(self):
         self.check_auctions.cancel()
+        self.house.stop()
     
     @app_commands.command(name="mercado", description="Vende um item para outro usuário")
     @app_commands.describe(comprador="Quem vai comprar", item="Nome do item", preco="Preço")
@@ -33,14 +65,22 @@ class MarketCog(commands.Cog):
                 self.buyer = buyer
                 self.item = item
                 self.price = price
+                self.sold = False
             
             @discord.ui.button(label="✅ Comprar", style=discord.ButtonStyle.green)
             async def buy(self, interaction: discord.Interaction, button: discord.ui.Button):
                 if interaction.user != self.buyer:
                     return await interaction.response.send_message("Não é para você!", ephemeral=True)
                 
-                # Transferir dinheiro
-                if db.transfer_money(self.buyer.id, self.seller.id, interaction.guild.id, self.price):
+                # Dois cliques seguidos: o segundo espera o primeiro e encontra a oferta fechada
+                async with db.locks.hold(interaction.guild.id, self.buyer.id, self.seller.id):
+                    if self.sold:
+                        return await interaction.response.send_message("❌ Oferta já concluída.", ephemeral=True)
+                    paid = await db.atransfer_money(self.buyer.id, self.seller.id, interaction.guild.id, self.price)
+                    self.sold = bool(paid)
+                
+                if paid:
+                    self.stop()
                     await interaction.response.send_message(
                         f"✅ {self.buyer.mention} comprou **{self.item}** de {self.seller.mention} por {self.price:,} moedas!"
                     )
@@ -61,36 +101,125 @@ class MarketCog(commands.Cog):
             view=OfferView(interaction.user, comprador, item, preco)
         )
     
+    # ===== LEILÃO =====
+    
+    def _auction_embed(self, auction):
+        ended = auction.status != 'active'
+        embed = discord.Embed(
+            title=f"🔨 LEILÃO #{auction.auction_id}: {auction.item_name}",
+            description=f"Vendedor: <@{auction.seller_id}>\nLance inicial: {auction.start_price:,} moedas",
+            color=discord.Color.dark_grey() if ended else discord.Color.gold()
+        )
+        embed.add_field(name="Encerrado" if ended else "Termina em", value=f"<t:{auction.ends_at}:R>", inline=True)
+        embed.add_field(name="Lance vencedor" if ended else "Lance atual", value=f"{auction.current_bid:,}", inline=True)
+        if auction.highest_bidder:
+            embed.add_field(name="Vencedor" if ended else "Maior lance de", value=f"<@{auction.highest_bidder}>", inline=True)
+        return embed
+    
     @app_commands.command(name="leilao", description="Cria um leilão")
     @app_commands.describe(item="Item para leiloar", lance_inicial="Preço inicial", duracao="Duração em horas")
     async def leilao(self, interaction: discord.Interaction, item: str, lance_inicial: int, duracao: int = 24):
-        # Criar embed de leilão
-        ends_at = datetime.now() + timedelta(hours=duracao)
+        if lance_inicial <= 0 or not 1 <= duracao <= 168:
+            return await interaction.response.send_message("❌ Lance inicial positivo e duração de 1 a 168 horas!", ephemeral=True)
         
-        embed = discord.Embed(
-            title=f"🔨 LEILÃO: {item}",
-            description=f"Vendedor: {interaction.user.mention}\nLance inicial: {lance_inicial:,} moedas",
-            color=discord.Color.gold()
-        )
-        embed.add_field(name="Termina em", value=f"<t:{int(ends_at.timestamp())}:R>", inline=True)
-        embed.add_field(name="Lance atual", value=f"{lance_inicial:,}", inline=True)
+        auction_id = await db.acreate_auction(interaction.guild.id, interaction.user.id, item, lance_inicial, duracao)
+        auction = await db.aget_auction(auction_id)
         
-        # Guardar no banco (simplificado - na prática usaria o ID da mensagem)
-        # Aqui seria melhor com um sistema mais robusto
+        await interaction.response.send_message(embed=self._auction_embed(auction), view=AuctionView(self, auction_id))
+        message = await interaction.original_response()
+        await db.aset_auction_message(auction_id, message.channel.id, message.id)
         
-        await interaction.response.send_message(embed=embed)
+        # O leilão novo pode terminar antes do próximo da agenda
+        self.auctions_wakeup.set()
     
     @app_commands.command(name="lance", description="Dá um lance no leilão")
-    @app_commands.describe(valor="Valor do lance")
-    async def lance(self, interaction: discord.Interaction, valor: int):
-        # Sistema simplificado - em produção usar botões no embed do leilão
-        await interaction.response.send_message("Use os botões no embed do leilão!", ephemeral=True)
+    @app_commands.describe(leilao="Número do leilão", valor="Valor do lance")
+    async def lance(self, interaction: discord.Interaction, leilao: int, valor: int):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        ok, message, amount = await self.house.bid(leilao, interaction.user.id, amount=valor)
+        await interaction.followup.send(f"✅ Lance de {amount:,} registrado!" if ok else f"❌ {message}", ephemeral=True)
     
-    @tasks.loop(minutes=1)
+    async def bid_button(self, auction_id, percent, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        ok, message, amount = await self.house.bid(auction_id, interaction.user.id, increment=percent / 100)
+        await interaction.followup.send(f"✅ Lance de {amount:,} registrado!" if ok else f"❌ {message}", ephemeral=True)
+    
+    def _auction_changed(self, auction):
+        """Novo lance: agenda uma edição, juntando os lances que chegarem até lá"""
+        self._pending_edits[auction.auction_id] = auction
+        if auction.auction_id not in self._edit_tasks:
+            self._edit_tasks[auction.auction_id] = asyncio.create_task(self._flush_edit(auction.auction_id))
+    
+    async def _flush_edit(self, auction_id):
+        """Uma edição a cada EDIT_INTERVAL enquanto chegarem lances"""
+        try:
+            while True:
+                await asyncio.sleep(EDIT_INTERVAL)
+                auction = self._pending_edits.pop(auction_id, None)
+                if auction is None:
+                    return
+                await self._edit_auction_message(auction)
+        finally:
+            self._edit_tasks.pop(auction_id, None)
+    
+    async def _edit_auction_message(self, auction, view=None):
+        channel = self.bot.get_channel(auction.channel_id) if auction.channel_id else None
+        if channel is None:
+            return
+        try:
+            message = channel.get_partial_message(auction.message_id)
+            if view is None:
+                await message.edit(embed=self._auction_embed(auction))
+            else:
+                await message.edit(embed=self._auction_embed(auction), view=view)
+        except discord.HTTPException:
+            pass
+    
+    async def _announce_result(self, auction):
+        # Encerrado: nenhuma edição atrasada (ou em voo) pode voltar a mostrar "Lance atual"
+        self._pending_edits.pop(auction.auction_id, None)
+        task = self._edit_tasks.pop(auction.auction_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self._edit_auction_message(auction, view=AuctionView(self, auction.auction_id, disabled=True))
+        
+        channel = self.bot.get_channel(auction.channel_id) if auction.channel_id else None
+        if channel is None:
+            return
+        if auction.highest_bidder:
+            text = (f"🔨 Leilão #{auction.auction_id} (**{auction.item_name}**) encerrado! "
+                    f"<@{auction.highest_bidder}> venceu com {auction.current_bid:,} moedas.")
+        else:
+            text = f"🔨 Leilão #{auction.auction_id} (**{auction.item_name}**) encerrado sem lances."
+        try:
+            await channel.send(text)
+        except discord.HTTPException:
+            pass
+    
+    @tasks.loop()
     async def check_auctions(self):
-        """Verifica leilões encerrados"""
-        # Implementação de finalização automática
-        pass
+        """Dorme até o próximo ends_at e liquida os leilões encerrados"""
+        await sleep_until(db.auction_ends.next_due(), self.auctions_wakeup)
+        
+        due = db.auction_ends.next_due()
+        if due is None or due > now_ts():
+            return
+        
+        try:
+            ended = await db.asettle_auctions(now_ts())
+        except Exception:
+            traceback.print_exc()
+            await asyncio.sleep(60)
+            return
+        
+        for auction in ended:
+            self.house.close(auction)
+            await self._announce_result(auction)
+    
+    @check_auctions.before_loop
+    async def before_check_auctions(self):
+        await self.bot.wait_until_ready()
 
 async def setup(bot):
     await bot.add_cog(MarketCog(bot))
@@ -17,12 +17,12 @@ class ServerManagementCog(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def onboarding(self, interaction: discord.Interaction, cargo: discord.Role = None, 
                         canal: discord.TextChannel = None, verificacao: bool = False):
-        # Salvar configuração (simplificado - idealmente no banco)
-        config = {
-            "role_id": cargo.id if cargo else None,
-            "channel_id": canal.id if canal else None,
-            "verification": verificacao
-        }
+        await db.aupdate_guild_settings(
+            interaction.guild.id,
+            onboarding_role_id=cargo.id if cargo else None,
+            welcome_channel_id=canal.id if canal else None,
+            onboarding_verification=int(verificacao)
+        )
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Onboarding Configurado",
@@ -36,6 +36,22 @@ class ServerManagementCog(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Aplica o onboarding salvo: cargo automático e boas-vindas"""
+        config = db.guild_settings(member.guild.id)
+        
+        role = member.guild.get_role(config['onboarding_role_id'] or 0)
+        if role:
+            try:
+                await member.add_roles(role, reason="Onboarding")
+            except discord.Forbidden:
+                pass
+        
+        channel = member.guild.get_channel(config['welcome_channel_id'] or 0)
+        if channel:
+            await channel.send(f"👋 Bem-vindo(a), {member.mention}!")
+    
     @app_commands.command(name="cargo_temporario", description="Adiciona cargo que expira automaticamente")
     @app_commands.describe(usuario="Usuário", cargo="Cargo", duracao="Duração (ex: 1h, 2d)")
     @app_commands.checks.has_permissions(manage_roles=True)
@@ -115,7 +131,7 @@ class ServerManagementCog(commands.Cog):
         
         # Salvar no banco (simplificado)
         from database.db import db
-        backup_id = db.create_backup(guild.id, f"Backup_{datetime.now().strftime('%Y%m%d')}", backup_data)
+        backup_id = await db.acreate_backup(guild.id, f"Backup_{datetime.now().strftime('%Y%m%d')}", backup_data)
         
         # Criar arquivo JSON para download
         json_str = json.dumps(backup_data, indent=2)
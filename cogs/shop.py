@@ -16,7 +16,7 @@ class ShopCog(commands.Cog):
         
         if nome:
             # Criar loja
-            shop_id = db.create_shop(guild_id, interaction.user.id, nome, descricao)
+            shop_id = await db.acreate_shop(guild_id, interaction.user.id, nome, descricao)
             
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Loja Criada!",
@@ -26,11 +26,7 @@ class ShopCog(commands.Cog):
             await interaction.response.send_message(embed=embed)
         else:
             # Listar lojas
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM shops WHERE guild_id = ?', (guild_id,))
-            shops = cursor.fetchall()
-            conn.close()
+            shops = await db.aget_shops(guild_id)
             
             embed = discord.Embed(
                 title=f"{self.bot.CUSTOM_EMOJI} Lojas do Servidor",
@@ -38,11 +34,11 @@ class ShopCog(commands.Cog):
             )
             
             for shop in shops:
-                owner = interaction.guild.get_member(shop[2])
-                tipo = "🏛️ Oficial" if shop[5] else "🏪 Player"
+                owner = interaction.guild.get_member(shop.owner_id)
+                tipo = "🏛️ Oficial" if shop.is_official else "🏪 Player"
                 embed.add_field(
-                    name=f"{tipo} {shop[3]}",
-                    value=f"Dono: {owner.mention if owner else 'Desconhecido'}\nID: `{shop[0]}`",
+                    name=f"{tipo} {shop.name}",
+                    value=f"Dono: {owner.mention if owner else 'Desconhecido'}\nID: `{shop.shop_id}`",
                     inline=True
                 )
             
@@ -59,16 +55,12 @@ class ShopCog(commands.Cog):
     async def item(self, interaction: discord.Interaction, loja: int, nome: str, preco: int, 
                    estoque: int = -1, efeito: str = None):
         # Verificar se é dono da loja
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT owner_id FROM shops WHERE shop_id = ?', (loja,))
-        shop = cursor.fetchone()
-        conn.close()
+        shop = await db.aget_shop(loja)
         
-        if not shop or (shop[0] != interaction.user.id and not interaction.user.guild_permissions.administrator):
+        if not shop or (shop.owner_id != interaction.user.id and not interaction.user.guild_permissions.administrator):
             return await interaction.response.send_message("❌ Você não é dono desta loja!", ephemeral=True)
         
-        item_id = db.create_item(loja, nome, preco, stock=estoque, effect_type=efeito)
+        await db.acreate_item(loja, nome, preco, stock=estoque, effect_type=efeito)
         
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Item Criado",
@@ -85,26 +77,29 @@ class ShopCog(commands.Cog):
     @app_commands.command(name="comprar", description="Compra um item")
     @app_commands.describe(item_id="ID do item")
     async def comprar(self, interaction: discord.Interaction, item_id: int):
-        item, msg = db.buy_item(interaction.user.id, interaction.guild.id, item_id)
+        # Só a compra segura a faixa; o efeito fala com o Discord e fica de fora
+        async with db.locks.hold(interaction.guild.id, interaction.user.id):
+            item, msg = await db.abuy_item(interaction.user.id, interaction.guild.id, item_id)
         
         if not item:
             return await interaction.response.send_message(f"❌ {msg}", ephemeral=True)
         
-        # Aplicar efeito se tiver
-        if item[6]:  # effect_type
-            await self.apply_item_effect(interaction, item)
-        
         embed = discord.Embed(
             title=f"{self.bot.CUSTOM_EMOJI} Compra Realizada",
-            description=f"Você comprou **{item[2]}**!",
+            description=f"Você comprou **{item.name}**!",
             color=discord.Color.green()
         )
+        # Responde antes do efeito: cargo/canal podem passar do prazo de 3 s
         await interaction.response.send_message(embed=embed)
+        
+        # Aplicar efeito se tiver
+        if item.effect_type:
+            await self.apply_item_effect(interaction, item)
     
     async def apply_item_effect(self, interaction, item):
         """Aplica efeitos de itens (cargo, canal, etc)"""
-        effect_type = item[6]
-        effect_data = item[7]
+        effect_type = item.effect_type
+        effect_data = item.effect_data
         
         if effect_type == "cargo":
             role = interaction.guild.get_role(int(effect_data))
@@ -123,22 +118,13 @@ class ShopCog(commands.Cog):
     @app_commands.command(name="estoque", description="Gerencia estoque da loja")
     @app_commands.describe(loja_id="ID da loja", item_id="ID do item", quantidade="Nova quantidade")
     async def estoque(self, interaction: discord.Interaction, loja_id: int, item_id: int, quantidade: int):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
         # Verificar dono
-        cursor.execute('SELECT owner_id FROM shops WHERE shop_id = ?', (loja_id,))
-        shop = cursor.fetchone()
+        shop = await db.aget_shop(loja_id)
         
-        if not shop or shop[0] != interaction.user.id:
-            conn.close()
+        if not shop or shop.owner_id != interaction.user.id:
             return await interaction.response.send_message("❌ Sem permissão!", ephemeral=True)
         
-        cursor.execute('UPDATE items SET stock = ? WHERE item_id = ? AND shop_id = ?',
-                      (quantidade, item_id, loja_id))
-        
-        conn.commit()
-        conn.close()
+        await db.aset_item_stock(loja_id, item_id, quantidade)
         
         await interaction.response.send_message(f"✅ Estoque do item `{item_id}` atualizado para {quantidade}!")
 
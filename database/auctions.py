@@ -0,0 +1,103 @@
+"""Atores de leilão: cada leilão ativo processa seus lances em fila.
+
+Num leilão disputado, vários cliques chegam quase juntos. Em vez de cada
+um ler o lance atual e disputar o writer, todos entram na caixa de entrada
+do ator do leilão, que os aplica um por vez, na ordem de chegada. Um
+incremento ("+10%") é calculado sobre o lance vigente quando é processado,
+não quando foi clicado, e lances que já perderam são recusados em memória,
+sem tocar no banco. A devolução do lance anterior e a cobrança do novo
+acontecem juntas em Database._place_bid.
+"""
+import asyncio
+
+from database.db import now_ts
+
+# Sem lances por este tempo, o ator encerra (volta no próximo lance)
+ACTOR_IDLE = 300
+
+class AuctionActor:
+    def __init__(self, house, auction_id):
+        self.house = house
+        self.auction_id = auction_id
+        self.auction = None
+        self.inbox = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            try:
+                bidder_id, amount, increment, future = await asyncio.wait_for(self.inbox.get(), ACTOR_IDLE)
+            except asyncio.TimeoutError:
+                if self.house._retire(self):
+                    return
+                continue
+            
+            try:
+                result = await self._bid(bidder_id, amount, increment)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+    
+    async def _bid(self, bidder_id, amount, increment):
+        if self.auction is None:
+            self.auction = await self.house.db.aget_auction(self.auction_id)
+        auction = self.auction
+        if auction is None or auction.status != 'active' or now_ts() > auction.ends_at:
+            return False, "Leilão não encontrado ou finalizado", amount
+        
+        if increment is not None:
+            amount = auction.current_bid + max(1, int(auction.current_bid * increment))
+        if amount <= auction.current_bid:
+            return False, "Lance deve ser maior que o atual", amount
+        
+        # Quem dá o lance e quem é reembolsado, como numa transferência
+        db = self.house.db
+        async with db.locks.hold(auction.guild_id, bidder_id, auction.highest_bidder):
+            ok, message = await db.aplace_bid(self.auction_id, bidder_id, amount)
+        if ok:
+            self.auction = auction.replace(current_bid=amount, highest_bidder=bidder_id)
+            self.house.on_change(self.auction)
+        return ok, message, amount
+
+class AuctionHouse:
+    """Um ator por leilão com lances em andamento"""
+    
+    def __init__(self, db, on_change=None):
+        self.db = db
+        self.on_change = on_change or (lambda auction: None)
+        self._actors = {}
+    
+    async def bid(self, auction_id, bidder_id, amount=None, increment=None):
+        """Lance fixo (`amount`) ou relativo ao atual (`increment`, ex.: 0.1).
+        
+        Devolve (ok, mensagem, valor do lance).
+        """
+        actor = self._actors.get(auction_id)
+        if actor is None:
+            actor = self._actors[auction_id] = AuctionActor(self, auction_id)
+        
+        future = asyncio.get_running_loop().create_future()
+        actor.inbox.put_nowait((bidder_id, amount, increment, future))
+        return await future
+    
+    def close(self, auction):
+        """Leilão liquidado: o ator passa a recusar o que ainda chegar"""
+        actor = self._actors.get(auction.auction_id)
+        if actor is not None:
+            actor.auction = auction
+    
+    def stop(self):
+        for actor in self._actors.values():
+            actor.task.cancel()
+        self._actors.clear()
+    
+    def _retire(self, actor):
+        # Sem await entre o teste e a remoção: nenhum lance se perde no meio
+        if not actor.inbox.empty():
+            return False
+        if self._actors.get(actor.auction_id) is actor:
+            del self._actors[actor.auction_id]
+        return True
@@ -0,0 +1,124 @@
+"""Vazão de transferência, compra e lance: um passo por transação x operação única.
+
+python -m database.benchmark [--storage sqlite|memory] [--users N] [--ops N]
+
+"antes" é uma simulação: refaz a sequência de passos do fluxo antigo
+(ler o usuário, conferir o saldo e então debitar, creditar e lançar em
+transações separadas, uma confirmação por passo) sobre o Database atual,
+com o writer, o pool e os índices de hoje. Não é o Database da versão
+antiga, que abria uma conexão por chamada; os números medem só o custo de
+dividir a operação em vários commits. "depois" é a operação única do writer
+(débito condicional com RETURNING, crédito, extrato e estoque/lance no
+mesmo commit). Cada cenário roda num banco novo, numa pasta temporária.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from database.db import Database
+from database.storage.memory import MemoryStorage
+
+GUILD = 1
+FUNDS = 10**9
+
+# ===== FLUXO ANTIGO (SIMULADO) =====
+
+def legacy_transfer(db, from_id, to_id, amount):
+    db.get_or_create_user(from_id, GUILD)
+    db.get_or_create_user(to_id, GUILD)
+    if db.get_balance(from_id, GUILD) < amount:
+        return False
+    db.remove_money(from_id, GUILD, amount, f"Transferência para {to_id}")
+    db.add_money(to_id, GUILD, amount, f"Transferência de {from_id}")
+    return amount
+
+def _deliver(tx, user_id, item_id):
+    tx.shops.reserve(item_id)
+    tx.shops.add_to_inventory(user_id, GUILD, item_id)
+
+def legacy_buy(db, user_id, item_id):
+    item = db._read_sync(db._query_item, item_id)
+    if item is None or item.stock == 0 or db.get_balance(user_id, GUILD) < item.price:
+        return None
+    db.remove_money(user_id, GUILD, item.price, f"Compra: {item.name}")
+    db._write(_deliver, user_id, item_id)
+    return item
+
+def _set_bid(tx, auction_id, amount, bidder_id):
+    tx.auctions.set_bid(auction_id, amount, bidder_id)
+
+def legacy_bid(db, auction_id, bidder_id, amount):
+    auction = db._read_sync(db._query_auction, auction_id)
+    if amount <= auction.current_bid or db.get_balance(bidder_id, GUILD) < amount:
+        return False
+    if auction.highest_bidder:
+        db.add_money(auction.highest_bidder, GUILD, auction.current_bid, "Devolução de lance")
+    db.remove_money(bidder_id, GUILD, amount, f"Lance leilão #{auction_id}")
+    db._write(_set_bid, auction_id, amount, bidder_id)
+    return True
+
+# ===== OPERAÇÃO ÚNICA =====
+
+def atomic_transfer(db, from_id, to_id, amount):
+    return db.transfer_money(from_id, to_id, GUILD, amount)
+
+def atomic_buy(db, user_id, item_id):
+    return db.buy_item(user_id, GUILD, item_id)[0]
+
+def atomic_bid(db, auction_id, bidder_id, amount):
+    return db.place_bid(auction_id, bidder_id, amount)[0]
+
+FLOWS = {
+    'antes': (legacy_transfer, legacy_buy, legacy_bid),
+    'depois': (atomic_transfer, atomic_buy, atomic_bid),
+}
+
+def open_db(storage, folder, name):
+    if storage == 'memory':
+        return Database(storage=MemoryStorage())
+    return Database(str(Path(folder) / f'{name}.db'))
+
+def run(storage, users, ops, seed=0):
+    """{(fluxo, cenário): operações por segundo}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for flow, (transfer, buy, bid) in FLOWS.items():
+            db = open_db(storage, folder, flow)
+            rng = random.Random(seed)
+            user_ids = list(range(1, users + 1))
+            db.add_money_many(user_ids, GUILD, FUNDS, "Benchmark")
+            shop_id = db.create_shop(GUILD, 0, "Benchmark")
+            item_id = db.create_item(shop_id, "Item", 10, stock=-1)
+            auction_id = db.create_auction(GUILD, 0, "Lote", 1, 24)
+            
+            pairs = [rng.sample(user_ids, 2) for _ in range(ops)]
+            scenarios = {
+                'transferência': lambda i: transfer(db, *pairs[i], 10),
+                'compra': lambda i: buy(db, pairs[i][0], item_id),
+                # Lances crescentes: cada um devolve o anterior
+                'lance': lambda i: bid(db, auction_id, pairs[i][0], 2 + i),
+            }
+            for name, step in scenarios.items():
+                start = time.perf_counter()
+                for i in range(ops):
+                    step(i)
+                results[(flow, name)] = ops / (time.perf_counter() - start)
+            db.close()
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--storage', choices=('sqlite', 'memory'), default='sqlite')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+    
+    results = run(args.storage, args.users, args.ops)
+    print(f"{args.storage}: {args.users} usuários, {args.ops} chamadas síncronas em sequência")
+    print("antes = fluxo antigo simulado sobre o Database atual")
+    print(f"{'':<16}{'antes':>10}{'depois':>10}{'ganho':>8}")
+    for name in ('transferência', 'compra', 'lance'):
+        before, after = results[('antes', name)], results[('depois', name)]
+        print(f"{name:<16}{before:>8,.0f}/s{after:>8,.0f}/s{after / before:>7.1f}x")
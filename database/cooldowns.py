@@ -0,0 +1,95 @@
+"""Cooldowns de /trabalhar e /diario, consultados em memória.
+
+O último uso de cada (tipo, guild_id, user_id) fica num dict: conferir e
+marcar é O(1) e não espera o banco. Os usos novos ficam pendentes e são
+gravados em lote (write-behind) em users.last_work / users.last_daily; na
+partida o mapa é recarregado dessas colunas, então reiniciar o bot não
+zera ninguém.
+
+Guarda-se o instante do uso, não o fim do cooldown: o prazo sai da
+configuração do servidor na hora da consulta, e mudar `work_cooldown` vale
+na mesma hora para todo mundo.
+"""
+import threading
+
+# Tipo de cooldown -> coluna de users
+COLUMNS = {
+    'work': 'last_work',
+    'daily': 'last_daily',
+}
+
+class CooldownMap:
+    def __init__(self):
+        self._used = {}     # (tipo, guild_id, user_id) -> último uso
+        self._dirty = {}    # idem, só o que falta gravar (None grava NULL)
+        self._previous = {} # idem, o uso anterior ao último (para `release`)
+        self._lock = threading.Lock()
+    
+    def load(self, rows):
+        """Recarrega de [UserRow] (last_work / last_daily)"""
+        used = {}
+        for row in rows:
+            for kind, column in COLUMNS.items():
+                ts = getattr(row, column)
+                if ts is not None:
+                    used[(kind, row.guild_id, row.user_id)] = ts
+        with self._lock:
+            self._used = used
+    
+    def try_use(self, kind, guild_id, user_id, cooldown, now):
+        """Marca o uso se o cooldown acabou; devolve 0 ou os segundos que faltam"""
+        key = (kind, guild_id, user_id)
+        with self._lock:
+            last = self._used.get(key)
+            if last is not None and now < last + cooldown:
+                return last + cooldown - now
+            self._previous[key] = last
+            self._used[key] = self._dirty[key] = now
+            return 0
+    
+    def release(self, kind, guild_id, user_id, now):
+        """Desfaz o uso marcado em `now` (a recompensa não foi paga).
+        
+        O uso pode já ter sido gravado: o valor anterior (ou NULL) entra na
+        fila de gravação, senão a próxima partida recarregaria o cooldown.
+        """
+        key = (kind, guild_id, user_id)
+        with self._lock:
+            if self._used.get(key) != now:
+                return
+            previous = self._previous.pop(key, None)
+            if previous is None:
+                del self._used[key]
+            else:
+                self._used[key] = previous
+            self._dirty[key] = previous
+    
+    def drain(self):
+        """Tira os usos pendentes: {coluna: [(ts, user_id, guild_id)]}"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        batches = {}
+        for (kind, guild_id, user_id), ts in dirty.items():
+            batches.setdefault(COLUMNS[kind], []).append((ts, user_id, guild_id))
+        return batches
+    
+    def restore(self, batches):
+        """Devolve um lote que falhou, sem passar por cima de usos mais novos"""
+        kinds = {column: kind for kind, column in COLUMNS.items()}
+        with self._lock:
+            for column, rows in batches.items():
+                for ts, user_id, guild_id in rows:
+                    self._dirty.setdefault((kinds[column], guild_id, user_id), ts)
+    
+    def prune(self, now, cooldown_of):
+        """Esquece usos gravados cujo cooldown já acabou.
+        
+        `cooldown_of(tipo, guild_id)` dá a duração vigente.
+        """
+        with self._lock:
+            self._used = {key: ts for key, ts in self._used.items()
+                          if key in self._dirty or now < ts + cooldown_of(key[0], key[1])}
+            self._previous = {key: ts for key, ts in self._previous.items() if key in self._used}
+    
+    def __len__(self):
+        return len(self._used)
@@ -1,452 +1,900 @@
-import sqlite3
 import json
+import random
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import os
 
+from database.cooldowns import CooldownMap
+from database.integrity import BalanceDrift, IntegrityReport, IntegritySweep
+from database.locks import UserLocks
+from database.maturity import MaturitySchedule
+from database.missions import MissionTracker
+from database.payroll import PayrollSchedule
+from database.ranking import RankIndex
+from database.records import EconomyDayRow, SalaryRow
+from database.settings import DEFAULTS, GuildSettingsStore
+from database.stock import StockReservations
+from database.storage.base import Rollback
+from database.storage.memory import MemoryStorage
+from database.storage.sqlite import SQLiteStorage
+
+DB_PATH = os.getenv("CENTRALDIV_DB", "centraldiv.db")
+# "memory" troca o SQLite pela engine em memória (benchmarks e testes de carga)
+STORAGE = os.getenv("CENTRALDIV_STORAGE", "sqlite")
+USER_CACHE_SIZE = int(os.getenv("CENTRALDIV_USER_CACHE", "10000"))
+# Lançamentos mais velhos que isso saem da tabela quente (ver archive_ledger)
+LEDGER_HOT_DAYS = int(os.getenv("CENTRALDIV_LEDGER_HOT_DAYS", "90"))
+# Lançamentos movidos por operação do writer
+ARCHIVE_BATCH = 5000
+# Linhas por leitura ao percorrer o extrato inteiro de um usuário
+LEDGER_CHUNK = 20000
+# Resposta de compra sem estoque (também vinda do contador em memória)
+OUT_OF_STOCK = "Item fora de estoque"
+# /diario: uma vez a cada 24h (o /trabalhar usa guild_config.work_cooldown)
+DAILY_COOLDOWN = 86400
+# Conferência do extrato: contas por consulta, segundos de writer por fatia
+# e intervalo entre passadas completas da varredura em segundo plano
+INTEGRITY_BATCH = 200
+INTEGRITY_SLICE = 0.02
+INTEGRITY_PASS_INTERVAL = int(os.getenv("CENTRALDIV_INTEGRITY_PASS", str(6 * 3600)))
+# Folga de relógio entre o checkpoint e o timestamp dos lançamentos seguintes
+CLOCK_SLACK = 300
+
+# ===== DATAS =====
+# O banco guarda datas como inteiros: segundos Unix (UTC). A conversão
+# acontece só aqui, na borda, e nunca linha a linha nas consultas.
+
+def now_ts():
+    return int(time.time())
+
+def to_ts(value):
+    """datetime (ingênuo = horário local) ou número -> segundos Unix"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+def from_ts(ts):
+    """Segundos Unix -> datetime local ingênuo, como datetime.now()"""
+    return None if ts is None else datetime.fromtimestamp(ts)
+
+def day_ts(ts):
+    """Início do dia (UTC) de `ts`; chave dos resumos diários"""
+    return ts - ts % 86400
+
+def next_midnight_ts():
+    """Fim do dia local; é o vencimento das missões diárias"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return to_ts(today + timedelta(days=1))
+
+class UserCache:
+    """LRU limitado das linhas de `users`, chave (guild_id, user_id).
+    
+    Escritas chegam por `put` depois do COMMIT (write-through) e sempre
+    vencem. Leituras do disco entram por `fill`, que descarta a linha se
+    alguma escrita aconteceu enquanto ela era lida: assim um SELECT antigo
+    nunca sobrescreve um saldo mais novo.
+    """
+    
+    def __init__(self, capacity=USER_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(key)
+            self.hits += 1
+            return row
+    
+    def put(self, key, row):
+        with self._lock:
+            self.generation += 1
+            self._store(key, row)
+    
+    def fill(self, key, row, generation):
+        """Guarda uma linha lida do disco se nada foi escrito desde `generation`"""
+        with self._lock:
+            if row is not None and generation == self.generation and key not in self._rows:
+                self._store(key, row)
+    
+    def _store(self, key, row):
+        self._rows[key] = row
+        self._rows.move_to_end(key)
+        while len(self._rows) > self.capacity:
+            self._rows.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._rows.clear()
+    
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._rows),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
 class Database:
-    def __init__(self):
-        self.db_path = "centraldiv.db"
-        self.init_database()
-    
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
-    
-    def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Tabela de economia - usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER,
-                guild_id INTEGER,
-                balance INTEGER DEFAULT 0,
-                bank_balance INTEGER DEFAULT 0,
-                total_earned INTEGER DEFAULT 0,
-                total_spent INTEGER DEFAULT 0,
-                last_work TIMESTAMP,
-                last_daily TIMESTAMP,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        ''')
-        
-        # Tabela de transações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                type TEXT,
-                amount INTEGER,
-                description TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de lojas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS shops (
-                shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                owner_id INTEGER,
-                name TEXT,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_official INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Tabela de itens
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS items (
-                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                shop_id INTEGER,
-                name TEXT,
-                description TEXT,
-                price INTEGER,
-                stock INTEGER DEFAULT -1,
-                effect_type TEXT,
-                effect_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de inventário
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                user_id INTEGER,
-                guild_id INTEGER,
-                item_id INTEGER,
-                quantity INTEGER DEFAULT 1,
-                acquired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, guild_id, item_id)
-            )
-        ''')
-        
-        # Tabela de leilões
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS auctions (
-                auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                seller_id INTEGER,
-                item_id INTEGER,
-                start_price INTEGER,
-                current_bid INTEGER,
-                highest_bidder INTEGER,
-                ends_at TIMESTAMP,
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Tabela de investimentos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS investments (
-                investment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                amount INTEGER,
-                risk_level TEXT,
-                start_date TIMESTAMP,
-                end_date TIMESTAMP,
-                return_rate REAL,
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Tabela de negócios (renda passiva)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS businesses (
-                business_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                owner_id INTEGER,
-                guild_id INTEGER,
-                name TEXT,
-                type TEXT,
-                investment INTEGER,
-                daily_income INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de salários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS salaries (
-                guild_id INTEGER,
-                role_id INTEGER,
-                amount INTEGER,
-                interval_hours INTEGER,
-                last_paid TIMESTAMP,
-                PRIMARY KEY (guild_id, role_id)
-            )
-        ''')
-        
-        # Tabela de configuração do servidor
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS guild_config (
-                guild_id INTEGER PRIMARY KEY,
-                currency_name TEXT DEFAULT 'CentralCoins',
-                currency_symbol TEXT DEFAULT '💰',
-                start_balance INTEGER DEFAULT 1000,
-                tax_rate REAL DEFAULT 0.05,
-                work_cooldown INTEGER DEFAULT 3600,
-                daily_reward INTEGER DEFAULT 500
-            )
-        ''')
-        
-        # Tabela de missões diárias
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS daily_missions (
-                user_id INTEGER,
-                guild_id INTEGER,
-                mission_type TEXT,
-                target INTEGER,
-                progress INTEGER DEFAULT 0,
-                reward INTEGER,
-                expires_at TIMESTAMP,
-                completed INTEGER DEFAULT 0,
-                claimed INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, guild_id, date(expires_at))
-            )
-        ''')
-        
-        # Tabela de backups
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS backups (
-                backup_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                name TEXT,
-                data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de punições criativas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS creative_punishments (
-                punishment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id INTEGER,
-                type TEXT,
-                data TEXT,
-                applied_at TIMESTAMP,
-                expires_at TIMESTAMP,
-                applied_by INTEGER
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+    """Fachada usada pelos cogs: regras de negócio, caches e API async.
+    
+    O armazenamento fica atrás de um Storage (database/storage). Escritas
+    são operações `_op(self, tx, *args)` montadas sobre os repositórios da
+    sessão `tx`; a engine garante que cada uma é atômica.
+    """
+    
+    def __init__(self, db_path=DB_PATH, storage=None):
+        self.db_path = db_path
+        self.users = UserCache()
+        self.settings = GuildSettingsStore()
+        self.ranks = RankIndex()
+        self.payroll = PayrollSchedule()
+        self.maturities = MaturitySchedule()
+        self.auction_ends = MaturitySchedule()
+        self.mission_progress = MissionTracker()
+        # Locks dos fluxos de vários awaits nos cogs (asyncio, não o writer)
+        self.locks = UserLocks()
+        self.cooldowns = CooldownMap()
+        # Fichas de estoque dos itens limitados (event loop, como os locks)
+        self.stock = StockReservations()
+        # Servidores com movimento desde o último retrato do saldo em circulação
+        self.economy_dirty = set()
+        # Lançamentos confirmados por servidor; muda sempre que dinheiro se move
+        self.ledger_versions = {}
+        self.integrity = IntegritySweep(INTEGRITY_PASS_INTERVAL)
+        self._economy_lock = threading.Lock()
+        
+        if storage is None:
+            storage = MemoryStorage() if STORAGE == "memory" else SQLiteStorage(db_path)
+        self.storage = storage
+        self.settings.load(self.storage.read(lambda tx: tx.guilds.all()))
+        self.ranks.load(self.storage.read(lambda tx: tx.users.balances()))
+        self.payroll.load(self.storage.read(self._query_salaries))
+        self.maturities.load((inv.end_date, inv.investment_id)
+                             for inv in self.storage.read(lambda tx: tx.investments.pending()))
+        self.auction_ends.load((auction.ends_at, auction.auction_id)
+                               for auction in self.storage.read(lambda tx: tx.auctions.pending()))
+        self.mission_progress.load(self.storage.read(self._query_active_missions))
+        # Só interessa quem ainda pode estar em cooldown
+        since = now_ts() - max(self.settings.max_of('work_cooldown'), DAILY_COOLDOWN)
+        self.cooldowns.load(self.storage.read(self._query_cooldowns, since))
+        # (guild_id, user_id) de quem tem negócio: só esses têm renda a liquidar
+        self.business_owners = set(self.storage.read(lambda tx: tx.businesses.owners()))
+    
+    def close(self):
+        self.storage.close()
+    
+    def _write(self, op, *args):
+        return self.storage.run(op, *args)
+    
+    async def _awrite(self, op, *args):
+        """Aplica `op(tx, *args)` e espera a confirmação"""
+        return await self.storage.arun(op, *args)
+    
+    def _read_sync(self, query, *args):
+        return self.storage.read(query, *args)
+    
+    async def _read(self, query, *args):
+        """Executa `query(tx, *args)` sem travar o event loop"""
+        return await self.storage.aread(query, *args)
     
     # ===== MÉTODOS DE ECONOMIA =====
     
     def get_or_create_user(self, user_id, guild_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM users WHERE user_id = ? AND guild_id = ?
-        ''', (user_id, guild_id))
-        
-        user = cursor.fetchone()
-        if not user:
-            cursor.execute('''
-                INSERT INTO users (user_id, guild_id, balance)
-                VALUES (?, ?, (SELECT start_balance FROM guild_config WHERE guild_id = ?))
-            ''', (user_id, guild_id, guild_id))
-            conn.commit()
-            
-            cursor.execute('''
-                SELECT * FROM users WHERE user_id = ? AND guild_id = ?
-            ''', (user_id, guild_id))
-            user = cursor.fetchone()
-        
-        conn.close()
+        if (guild_id, user_id) in self.business_owners:
+            return self._write(self._settle_user, user_id, guild_id)
+        
+        user = self.users.get((guild_id, user_id))
+        if user is None:
+            generation = self.users.generation
+            user = self._read_sync(self._query_user, user_id, guild_id)
+            self.users.fill((guild_id, user_id), user, generation)
+        if user is None:
+            user = self._write(self._get_or_create_user, user_id, guild_id)
         return user
     
+    def _get_or_create_user(self, tx, user_id, guild_id):
+        user = tx.users.create(user_id, guild_id)
+        self._cache_user(tx, user)
+        # O saldo inicial entra em circulação sem lançamento no extrato
+        tx.after_commit(self._mark_economy, guild_id)
+        return user
+    
+    def _cache_user(self, tx, row):
+        """Atualiza o cache e o ranking com `row` quando a operação for confirmada"""
+        tx.after_commit(self.users.put, (row.guild_id, row.user_id), row)
+        tx.after_commit(self.ranks.update, row.guild_id, row.user_id, row.balance)
+    
     def get_balance(self, user_id, guild_id):
         user = self.get_or_create_user(user_id, guild_id)
-        return user[2] if user else 0
+        return user.balance if user else 0
+    
+    def _credit(self, tx, user_id, guild_id, amount):
+        """Soma ao saldo (criando o usuário se preciso); devolve o novo saldo"""
+        row = tx.users.credit(user_id, guild_id, amount)
+        self._cache_user(tx, row)
+        return row.balance
+    
+    def _debit(self, tx, user_id, guild_id, amount):
+        """Débito condicional: devolve o novo saldo ou None se não houver fundos"""
+        self._settle_owners(tx, [user_id], guild_id)
+        row = tx.users.debit(user_id, guild_id, amount)
+        if row is None and tx.users.get(user_id, guild_id) is None:
+            # Usuário novo: nasce com o saldo inicial e tenta de novo
+            self._get_or_create_user(tx, user_id, guild_id)
+            row = tx.users.debit(user_id, guild_id, amount)
+        
+        if row is None:
+            return None
+        self._cache_user(tx, row)
+        return row.balance
+    
+    def _post(self, tx, user_ids, guild_id, type, amount, description):
+        """Lança no extrato e no resumo diário do servidor (economy_daily)"""
+        if not user_ids:
+            return
+        if len(user_ids) == 1:
+            tx.ledger.append(user_ids[0], guild_id, type, amount, description)
+        else:
+            tx.ledger.append_many(user_ids, guild_id, type, amount, description)
+        tx.economy.record(guild_id, day_ts(now_ts()), user_ids, type, amount)
+        tx.after_commit(self._mark_economy, guild_id)
     
     def add_money(self, user_id, guild_id, amount, description=""):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        self.get_or_create_user(user_id, guild_id)
-        
-        cursor.execute('''
-            UPDATE users SET balance = balance + ?, total_earned = total_earned + ?
-            WHERE user_id = ? AND guild_id = ?
-        ''', (amount, amount, user_id, guild_id))
-        
-        cursor.execute('''
-            INSERT INTO transactions (user_id, guild_id, type, amount, description)
-            VALUES (?, ?, 'income', ?, ?)
-        ''', (user_id, guild_id, amount, description))
-        
-        conn.commit()
-        conn.close()
+        return self._write(self._add_money, user_id, guild_id, amount, description)
+    
+    async def aadd_money(self, user_id, guild_id, amount, description=""):
+        return await self._awrite(self._add_money, user_id, guild_id, amount, description)
+    
+    def _add_money(self, tx, user_id, guild_id, amount, description=""):
+        self._credit(tx, user_id, guild_id, amount)
+        self._post(tx, [user_id], guild_id, 'income', amount, description)
         return True
     
     def remove_money(self, user_id, guild_id, amount, description=""):
-        balance = self.get_balance(user_id, guild_id)
-        if balance < amount:
+        return self._write(self._remove_money, user_id, guild_id, amount, description)
+    
+    async def aremove_money(self, user_id, guild_id, amount, description=""):
+        return await self._awrite(self._remove_money, user_id, guild_id, amount, description)
+    
+    def _remove_money(self, tx, user_id, guild_id, amount, description=""):
+        if self._debit(tx, user_id, guild_id, amount) is None:
             return False
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE users SET balance = balance - ?, total_spent = total_spent + ?
-            WHERE user_id = ? AND guild_id = ?
-        ''', (amount, amount, user_id, guild_id))
-        
-        cursor.execute('''
-            INSERT INTO transactions (user_id, guild_id, type, amount, description)
-            VALUES (?, ?, 'expense', ?, ?)
-        ''', (user_id, guild_id, amount, description))
-        
-        conn.commit()
-        conn.close()
+        self._post(tx, [user_id], guild_id, 'expense', amount, description)
         return True
     
     def transfer_money(self, from_id, to_id, guild_id, amount, tax=0):
-        if not self.remove_money(from_id, guild_id, amount, f"Transferência para {to_id}"):
+        return self._write(self._transfer_money, from_id, to_id, guild_id, amount, tax)
+    
+    async def atransfer_money(self, from_id, to_id, guild_id, amount, tax=0):
+        return await self._awrite(self._transfer_money, from_id, to_id, guild_id, amount, tax)
+    
+    def _transfer_money(self, tx, from_id, to_id, guild_id, amount, tax=0):
+        """Débito, crédito e as duas pernas do extrato numa só transação"""
+        if not self._remove_money(tx, from_id, guild_id, amount, f"Transferência para {to_id}"):
             return False
         
         tax_amount = int(amount * tax)
         final_amount = amount - tax_amount
         
-        self.add_money(to_id, guild_id, final_amount, f"Transferência de {from_id}")
+        self._add_money(tx, to_id, guild_id, final_amount, f"Transferência de {from_id}")
         return final_amount
     
+    # ===== EM MASSA =====
+    # Um cargo inteiro ou uma lista de IDs numa só transação: saldos e
+    # extrato vão por executemany em vez de um comando por membro.
+    
+    def add_money_many(self, user_ids, guild_id, amount, description=""):
+        return self._write(self._add_money_many, user_ids, guild_id, amount, description)
+    
+    async def aadd_money_many(self, user_ids, guild_id, amount, description=""):
+        return await self._awrite(self._add_money_many, user_ids, guild_id, amount, description)
+    
+    def _add_money_many(self, tx, user_ids, guild_id, amount, description=""):
+        """Credita cada usuário; devolve (IDs creditados, [(ID, motivo da falha)])"""
+        user_ids = list(dict.fromkeys(user_ids))
+        tx.users.credit_many(user_ids, guild_id, amount)
+        self._post(tx, user_ids, guild_id, 'income', amount, description)
+        self._cache_users(tx, user_ids, guild_id)
+        return user_ids, []
+    
+    def remove_money_many(self, user_ids, guild_id, amount, description=""):
+        return self._write(self._remove_money_many, user_ids, guild_id, amount, description)
+    
+    async def aremove_money_many(self, user_ids, guild_id, amount, description=""):
+        return await self._awrite(self._remove_money_many, user_ids, guild_id, amount, description)
+    
+    def _remove_money_many(self, tx, user_ids, guild_id, amount, description=""):
+        """Debita quem tem saldo; os demais voltam como falha, sem abortar o lote"""
+        user_ids = list(dict.fromkeys(user_ids))
+        self._settle_owners(tx, user_ids, guild_id)
+        tx.users.create_many(user_ids, guild_id)
+        charged = set(tx.users.debit_many(user_ids, guild_id, amount))
+        
+        done = [user_id for user_id in user_ids if user_id in charged]
+        failures = [(user_id, "Saldo insuficiente") for user_id in user_ids if user_id not in charged]
+        self._post(tx, done, guild_id, 'expense', amount, description)
+        self._cache_users(tx, user_ids, guild_id)
+        return done, failures
+    
+    def _cache_users(self, tx, user_ids, guild_id):
+        for row in tx.users.get_many(user_ids, guild_id):
+            self._cache_user(tx, row)
+    
     def get_transactions(self, user_id, guild_id, limit=10):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._read_sync(self._query_transactions, user_id, guild_id, limit)
+    
+    def _query_transactions(self, tx, user_id, guild_id, limit=10):
+        return tx.ledger.history(user_id, guild_id, limit)
+    
+    def _query_ledger_totals(self, tx, user_id, guild_id):
+        return tx.ledger.totals(user_id, guild_id)
+    
+    def _query_ledger_deltas(self, tx, user_id, guild_id, after, limit):
+        return tx.ledger.deltas(user_id, guild_id, after, limit)
+    
+    def _query_archived_deltas(self, tx, user_id, guild_id):
+        return tx.ledger.daily_deltas(user_id, guild_id)
+    
+    def _query_user(self, tx, user_id, guild_id):
+        return tx.users.get(user_id, guild_id)
+    
+    def _query_ranking(self, tx, guild_id, limit=-1):
+        return tx.users.ranking(guild_id, limit)
+    
+    def _query_guild_balances(self, tx, guild_id):
+        return tx.users.guild_balances(guild_id)
+    
+    def _query_active_investments(self, tx, user_id, guild_id):
+        return tx.investments.active(user_id, guild_id)
+    
+    def _query_today_mission(self, tx, user_id, guild_id):
+        return tx.missions.get(user_id, guild_id, next_midnight_ts())
+    
+    def _query_active_missions(self, tx):
+        return tx.missions.active(next_midnight_ts())
+    
+    # ===== RANKING =====
+    # Servido pelo RankIndex em memória; não consulta o banco.
+    
+    def rank_of(self, user_id, guild_id):
+        """(posição 1-based ou None, total de contas no servidor)"""
+        return self.ranks.rank(guild_id, user_id)
+    
+    def top_ranking(self, guild_id, n=10):
+        return self.ranks.top(guild_id, n)
+    
+    def ranking_between(self, guild_id, first, last):
+        """[RankingRow] das posições first..last, inclusivas"""
+        return self.ranks.between(guild_id, first, last)
+    
+    # ===== CONFIGURAÇÃO =====
+    
+    def guild_settings(self, guild_id):
+        """Configuração do servidor direto da memória, sem consulta"""
+        return self.settings.get(guild_id)
+    
+    async def aupdate_guild_settings(self, guild_id, **fields):
+        """Grava só os campos informados; o cache é trocado após o COMMIT"""
+        return await self._awrite(self._update_guild_settings, guild_id, fields)
+    
+    def _update_guild_settings(self, tx, guild_id, fields):
+        unknown = set(fields) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Configurações desconhecidas: {', '.join(sorted(unknown))}")
+        
+        row = tx.guilds.update(guild_id, fields)
+        tx.after_commit(self.settings.put, guild_id, row)
+        return row
+    
+    # ===== COOLDOWNS =====
+    # Conferidos no CooldownMap em memória; o banco só recebe os lotes.
+    
+    def cooldown_for(self, kind, guild_id):
+        if kind == 'daily':
+            return DAILY_COOLDOWN
+        return self.settings.get(guild_id)['work_cooldown']
+    
+    def use_cooldown(self, kind, guild_id, user_id, now=None):
+        """Marca o uso de /trabalhar ('work') ou /diario ('daily').
         
-        cursor.execute('''
-            SELECT * FROM transactions 
-            WHERE user_id = ? AND guild_id = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (user_id, guild_id, limit))
+        Devolve 0 se liberado ou os segundos que faltam.
+        """
+        now = now_ts() if now is None else now
+        return self.cooldowns.try_use(kind, guild_id, user_id, self.cooldown_for(kind, guild_id), now)
+    
+    def _query_cooldowns(self, tx, since):
+        return tx.users.cooldowns(since)
+    
+    async def aflush_cooldowns(self):
+        """Grava os usos pendentes; se falhar, eles voltam para o próximo lote"""
+        batches = self.cooldowns.drain()
+        if batches:
+            try:
+                await self._awrite(self._save_cooldowns, batches)
+            except Exception:
+                self.cooldowns.restore(batches)
+                raise
+        self.cooldowns.prune(now_ts(), self.cooldown_for)
+    
+    def _save_cooldowns(self, tx, batches):
+        touched = {}
+        for column, rows in batches.items():
+            tx.users.set_last_used(column, rows)
+            for ts, user_id, guild_id in rows:
+                touched.setdefault(guild_id, set()).add(user_id)
+        # Linhas em cache com last_work/last_daily novos
+        for guild_id, user_ids in touched.items():
+            self._cache_users(tx, user_ids, guild_id)
+    
+    # ===== ARQUIVO DO EXTRATO =====
+    # `transactions` guarda só os últimos LEDGER_HOT_DAYS dias; o resto vai
+    # para transactions_AAAAMM e é somado por dia em ledger_daily.
+    
+    async def aarchive_ledger(self, now=None):
+        """Arquiva em lotes curtos (o writer atende os outros entre eles); devolve o total movido"""
+        before = (now_ts() if now is None else now) - LEDGER_HOT_DAYS * 86400
+        moved = 0
+        while True:
+            count = await self._awrite(self._archive_ledger, before, ARCHIVE_BATCH)
+            moved += count
+            if count < ARCHIVE_BATCH:
+                return moved
+    
+    def _archive_ledger(self, tx, before, limit):
+        return tx.ledger.archive(before, limit)
+    
+    # ===== RESUMO DIÁRIO =====
+    # Ganhos, gastos, lançamentos e usuários ativos entram em economy_daily
+    # junto com cada lançamento (_post). O saldo em circulação vem do
+    # RankIndex, que já soma os saldos em memória, e é gravado em lote.
+    
+    async def asnapshot_economy(self, now=None):
+        """Grava o saldo em circulação de hoje dos servidores que movimentaram"""
+        today = day_ts(now_ts() if now is None else now)
+        with self._economy_lock:
+            guilds, self.economy_dirty = self.economy_dirty, set()
+        rows = [(self.ranks.total(guild_id), guild_id, today) for guild_id in guilds]
+        try:
+            await self._awrite(self._snapshot_economy, rows, today)
+        except Exception:
+            with self._economy_lock:
+                self.economy_dirty |= guilds
+            raise
+    
+    def _mark_economy(self, guild_id):
+        # Roda no writer, após o COMMIT (o RankIndex já tem os saldos novos)
+        with self._economy_lock:
+            self.economy_dirty.add(guild_id)
+            self.ledger_versions[guild_id] = self.ledger_versions.get(guild_id, 0) + 1
+    
+    def ledger_version(self, guild_id):
+        """Contador de lançamentos do servidor; igual = nenhum saldo mudou"""
+        return self.ledger_versions.get(guild_id, 0)
+    
+    def _snapshot_economy(self, tx, rows, today):
+        tx.economy.set_supply(rows)
+        tx.economy.prune_active(today)
+    
+    async def aget_economy_series(self, guild_id, days):
+        """Um EconomyDayRow por dia dos últimos `days` dias, hoje incluso.
+        
+        Dias sem movimento repetem o saldo do anterior; o de hoje é o valor
+        atual em memória.
+        """
+        today = day_ts(now_ts())
+        first = today - (days - 1) * 86400
+        rows = {row.day: row for row in await self._read(self._query_economy, guild_id, first - 90 * 86400)}
+        
+        # Último saldo conhecido antes da janela (até 90 dias para trás)
+        supply = None
+        for day in sorted(rows):
+            if day < first and rows[day].money_supply is not None:
+                supply = rows[day].money_supply
+        
+        series = []
+        for day in range(first, today + 1, 86400):
+            row = rows.get(day) or EconomyDayRow(guild_id, day, None, 0, 0, 0, 0)
+            if row.money_supply is None:
+                row = row.replace(money_supply=supply or 0)
+            supply = row.money_supply
+            series.append(row)
+        series[-1] = series[-1].replace(money_supply=self.ranks.total(guild_id))
+        return series
+    
+    def _query_economy(self, tx, guild_id, since_day):
+        return tx.economy.series(guild_id, since_day)
+    
+    # ===== INTEGRIDADE =====
+    # Saldos conferidos contra o extrato a partir de checkpoints por conta
+    # (database/integrity.py). Cada fatia é uma operação do writer: saldo,
+    # lançamentos e checkpoint novo saem do mesmo estado, sem corrida com
+    # as escritas, e a fatia para ao estourar o tempo, devolvendo o writer.
+    
+    async def averify_balances(self, guild_id, after=0, budget=INTEGRITY_SLICE):
+        """Confere contas de user_id > `after` por até `budget` segundos.
         
-        transactions = cursor.fetchall()
-        conn.close()
-        return transactions
+        Devolve (contas conferidas, [BalanceDrift], cursor); cursor None
+        quando o servidor acabou.
+        """
+        return await self._awrite(self._verify_balances, guild_id, after, budget, now_ts())
     
-    # ===== LOJA =====
+    def _verify_balances(self, tx, guild_id, after, budget, now):
+        deadline = time.perf_counter() + budget
+        head = tx.ledger.head()
+        # Checkpoint mais velho que isso pode ter lançamentos seguintes já arquivados
+        fresh = now - LEDGER_HOT_DAYS * 86400 + 86400 + CLOCK_SLACK
+        checked = 0
+        drift = []
+        while True:
+            rows = tx.integrity.accounts(guild_id, after, INTEGRITY_BATCH)
+            for row in rows:
+                full = row.ledger_id is None or row.checked_at < fresh
+                if full:
+                    totals = tx.ledger.totals(row.user_id, guild_id)
+                    expected = row.opening_balance + sum(-t.total if t.type == 'expense' else t.total for t in totals)
+                else:
+                    expected = row.checkpoint_balance + tx.ledger.delta_since(
+                        row.user_id, guild_id, row.ledger_id, row.checked_at - CLOCK_SLACK)
+                if expected != row.balance:
+                    drift.append(BalanceDrift(row.user_id, expected, row.balance, full))
+            
+            tx.integrity.save([(guild_id, row.user_id, head, row.balance, now) for row in rows])
+            checked += len(rows)
+            if len(rows) < INTEGRITY_BATCH:
+                return checked, drift, None
+            after = rows[-1].user_id
+            if time.perf_counter() >= deadline:
+                return checked, drift, after
     
-    def create_shop(self, guild_id, owner_id, name, description="", is_official=False):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    async def averify_guild(self, guild_id):
+        """Passada completa agora, em fatias; devolve o IntegrityReport"""
+        report = IntegrityReport(guild_id, now_ts())
+        after = 0
+        while after is not None:
+            checked, drift, after = await self.averify_balances(guild_id, after)
+            report.add(checked, drift)
+        report.finished_at = now_ts()
+        self.integrity.skip(guild_id)
+        self.integrity.reports[guild_id] = report
+        return report
+    
+    async def aintegrity_step(self, guild_ids):
+        """Uma fatia da varredura em segundo plano; devolve o relatório do servidor que terminou"""
+        now = now_ts()
+        task = self.integrity.next_slice(guild_ids, now)
+        if task is None:
+            return None
+        guild_id, after = task
+        checked, drift, cursor = await self.averify_balances(guild_id, after)
+        return self.integrity.record(guild_id, checked, drift, cursor, now_ts())
+    
+    # ===== INVESTIMENTOS =====
+    
+    async def acreate_investment(self, user_id, guild_id, amount, risk_level, end_date, return_rate):
+        return await self._awrite(self._create_investment, user_id, guild_id, amount, risk_level, end_date, return_rate)
+    
+    def _create_investment(self, tx, user_id, guild_id, amount, risk_level, end_date, return_rate):
+        """Cobra o valor e registra o investimento na mesma operação"""
+        if not self._remove_money(tx, user_id, guild_id, amount, f"Investimento {risk_level}"):
+            return None
+        
+        end_date = to_ts(end_date)
+        investment_id = tx.investments.create(user_id, guild_id, amount, risk_level, now_ts(), end_date, return_rate)
+        tx.after_commit(self.maturities.add, end_date, investment_id)
+        return investment_id
+    
+    async def asettle_investments(self, now):
+        return await self._awrite(self._settle_investments, now)
+    
+    def _settle_investments(self, tx, now):
+        """Paga, numa só transação, todos os investimentos vencidos até `now`; devolve quantos"""
+        now = to_ts(now)
+        ready = tx.investments.due(now)
         
-        cursor.execute('''
-            INSERT INTO shops (guild_id, owner_id, name, description, is_official)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (guild_id, owner_id, name, description, 1 if is_official else 0))
+        for inv in ready:
+            retorno = int(inv.amount * (1 + inv.return_rate))
+            
+            self._add_money(tx, inv.user_id, inv.guild_id, retorno, "Retorno de investimento")
+            tx.investments.complete(inv.investment_id)
         
-        shop_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return shop_id
+        tx.after_commit(self.maturities.settled, now)
+        return len(ready)
+    
+    # ===== NEGÓCIOS =====
+    # Renda passiva em forma fechada: daily_income × tempo desde last_settled,
+    # creditada só quando o dono tem o saldo lido ou gasto, ou lista os
+    # negócios. Nada roda em segundo plano e quem não tem negócio não paga
+    # nem uma consulta a mais.
+    
+    async def acreate_business(self, user_id, guild_id, name, type, investment, daily_income):
+        return await self._awrite(self._create_business, user_id, guild_id, name, type, investment, daily_income)
+    
+    def _create_business(self, tx, user_id, guild_id, name, type, investment, daily_income):
+        """Cobra o investimento e abre o negócio; None se não houver saldo"""
+        if not self._remove_money(tx, user_id, guild_id, investment, f"Negócio: {name}"):
+            return None
+        
+        business_id = tx.businesses.create(user_id, guild_id, name, type, investment, daily_income, now_ts())
+        tx.after_commit(self.business_owners.add, (guild_id, user_id))
+        return business_id
+    
+    async def aget_businesses(self, user_id, guild_id):
+        """Liquida e devolve ([BusinessRow], valor creditado agora)"""
+        return await self._awrite(self._list_businesses, user_id, guild_id)
+    
+    def _list_businesses(self, tx, user_id, guild_id):
+        collected = self._settle_businesses(tx, [user_id], guild_id).get(user_id, 0)
+        return tx.businesses.owned([user_id], guild_id), collected
+    
+    def _settle_user(self, tx, user_id, guild_id):
+        self._settle_businesses(tx, [user_id], guild_id)
+        return self._get_or_create_user(tx, user_id, guild_id)
+    
+    def _settle_owners(self, tx, user_ids, guild_id):
+        """Liquida só quem está no conjunto de donos; os demais não custam nada"""
+        owners = [user_id for user_id in user_ids if (guild_id, user_id) in self.business_owners]
+        if owners:
+            self._settle_businesses(tx, owners, guild_id)
+    
+    def _settle_businesses(self, tx, owner_ids, guild_id, now=None):
+        """Credita a renda acumulada até `now`; devolve {owner_id: valor}"""
+        now = now_ts() if now is None else now
+        income = {}
+        updates = []
+        for business in tx.businesses.owned(owner_ids, guild_id):
+            elapsed = now - business.last_settled
+            if business.daily_income <= 0 or elapsed <= 0:
+                continue
+            
+            accrued = business.daily_income * elapsed // 86400
+            if accrued == 0:
+                continue
+            # Avança só o tempo que virou moeda inteira; a fração fica para a próxima
+            covered = -(-accrued * 86400 // business.daily_income)
+            updates.append((business.business_id, business.last_settled + covered))
+            income[business.owner_id] = income.get(business.owner_id, 0) + accrued
+        
+        if updates:
+            tx.businesses.settle(updates)
+        for owner_id, amount in income.items():
+            self._credit(tx, owner_id, guild_id, amount)
+            self._post(tx, [owner_id], guild_id, 'income', amount, "Renda de negócios")
+        return income
+    
+    # ===== SALÁRIOS =====
+    
+    async def aset_salary(self, guild_id, role_id, amount, interval_hours):
+        return await self._awrite(self._set_salary, guild_id, role_id, amount, interval_hours)
+    
+    def _set_salary(self, tx, guild_id, role_id, amount, interval_hours):
+        row = SalaryRow(guild_id, role_id, amount, interval_hours, now_ts())
+        tx.salaries.set(*row)
+        tx.after_commit(self.payroll.put, row)
+    
+    def _query_salaries(self, tx):
+        return tx.salaries.all()
+    
+    async def apay_salary(self, guild_id, role_id, member_ids, amount, description):
+        return await self._awrite(self._pay_salary, guild_id, role_id, member_ids, amount, description)
+    
+    def _pay_salary(self, tx, guild_id, role_id, member_ids, amount, description):
+        paid, _ = self._add_money_many(tx, member_ids, guild_id, amount, description)
+        paid_at = now_ts()
+        tx.salaries.mark_paid(guild_id, role_id, paid_at)
+        tx.after_commit(self.payroll.paid, guild_id, role_id, paid_at)
+        return len(paid)
+    
+    # ===== LOJA =====
+    
+    def create_shop(self, guild_id, owner_id, name, description="", is_official=False):
+        return self._write(self._create_shop, guild_id, owner_id, name, description, is_official)
+    
+    async def acreate_shop(self, guild_id, owner_id, name, description="", is_official=False):
+        return await self._awrite(self._create_shop, guild_id, owner_id, name, description, is_official)
+    
+    def _create_shop(self, tx, guild_id, owner_id, name, description="", is_official=False):
+        return tx.shops.create_shop(guild_id, owner_id, name, description, is_official)
     
     def create_item(self, shop_id, name, price, description="", stock=-1, effect_type=None, effect_data=None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO items (shop_id, name, description, price, stock, effect_type, effect_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (shop_id, name, description, price, stock, effect_type, json.dumps(effect_data) if effect_data else None))
-        
-        item_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return item_id
+        return self._write(self._create_item, shop_id, name, price, description, stock, effect_type, effect_data)
+    
+    async def acreate_item(self, shop_id, name, price, description="", stock=-1, effect_type=None, effect_data=None):
+        return await self._awrite(self._create_item, shop_id, name, price, description, stock, effect_type, effect_data)
+    
+    def _create_item(self, tx, shop_id, name, price, description="", stock=-1, effect_type=None, effect_data=None):
+        return tx.shops.create_item(shop_id, name, description, price, stock, effect_type,
+                                    json.dumps(effect_data) if effect_data else None)
+    
+    async def aset_item_stock(self, shop_id, item_id, stock):
+        changed = await self._awrite(self._set_item_stock, shop_id, item_id, stock)
+        if changed:
+            self.stock.forget(item_id)
+        return changed
+    
+    def _set_item_stock(self, tx, shop_id, item_id, stock):
+        return tx.shops.set_stock(shop_id, item_id, stock)
     
     def get_shop_items(self, shop_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM items WHERE shop_id = ?', (shop_id,))
-        items = cursor.fetchall()
-        conn.close()
-        return items
+        return self._read_sync(self._query_shop_items, shop_id)
+    
+    def _query_shop_items(self, tx, shop_id):
+        return tx.shops.list_items(shop_id)
+    
+    def _query_shops(self, tx, guild_id):
+        return tx.shops.list_shops(guild_id)
+    
+    def _query_shop(self, tx, shop_id):
+        return tx.shops.get_shop(shop_id)
     
     def buy_item(self, user_id, guild_id, item_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._write(self._buy_item, user_id, guild_id, item_id)
+    
+    async def abuy_item(self, user_id, guild_id, item_id):
+        """Compra com ficha de estoque: num drop, só `stock` compras chegam ao writer"""
+        reservation = await self.stock.acquire(item_id, self._aitem_stock)
+        if reservation is None:
+            return None, OUT_OF_STOCK
         
-        # Pegar info do item
-        cursor.execute('SELECT * FROM items WHERE item_id = ?', (item_id,))
-        item = cursor.fetchone()
+        try:
+            item, message = await self._awrite(self._buy_item, user_id, guild_id, item_id)
+        except BaseException:
+            self.stock.release(reservation)
+            raise
+        
+        if item:
+            self.stock.commit(reservation)
+        else:
+            self.stock.release(reservation)
+            if message == OUT_OF_STOCK:
+                # O banco discorda do contador (compra por outro caminho): recarrega
+                self.stock.forget(item_id)
+        return item, message
+    
+    async def _aitem_stock(self, item_id):
+        item = await self._read(self._query_item, item_id)
+        return None if item is None else item.stock
+    
+    def _query_item(self, tx, item_id):
+        return tx.shops.get_item(item_id)
+    
+    def _buy_item(self, tx, user_id, guild_id, item_id):
+        # Reserva uma unidade (estoque -1 = infinito) só se ainda houver
+        item = tx.shops.reserve(item_id)
         
         if not item:
-            conn.close()
-            return None, "Item não encontrado"
-        
-        price = item[4]
-        stock = item[5]
-        
-        if stock == 0:
-            conn.close()
-            return None, "Item fora de estoque"
-        
-        # Verificar saldo
-        if not self.remove_money(user_id, guild_id, price, f"Compra: {item[2]}"):
-            conn.close()
-            return None, "Saldo insuficiente"
-        
-        # Atualizar estoque
-        if stock > 0:
-            cursor.execute('UPDATE items SET stock = stock - 1 WHERE item_id = ?', (item_id,))
-        
-        # Adicionar ao inventário
-        cursor.execute('''
-            INSERT INTO inventory (user_id, guild_id, item_id, quantity)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(user_id, guild_id, item_id) 
-            DO UPDATE SET quantity = quantity + 1
-        ''', (user_id, guild_id, item_id))
-        
-        conn.commit()
-        conn.close()
+            exists = tx.shops.get_item(item_id)
+            return None, OUT_OF_STOCK if exists else "Item não encontrado"
+        
+        # Cobrar; sem saldo, a reserva de estoque é desfeita
+        if not self._remove_money(tx, user_id, guild_id, item.price, f"Compra: {item.name}"):
+            raise Rollback((None, "Saldo insuficiente"))
+        
+        tx.shops.add_to_inventory(user_id, guild_id, item_id)
         return item, "Compra realizada"
     
     def get_inventory(self, user_id, guild_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT i.*, inv.quantity FROM inventory inv
-            JOIN items i ON inv.item_id = i.item_id
-            WHERE inv.user_id = ? AND inv.guild_id = ?
-        ''', (user_id, guild_id))
-        
-        items = cursor.fetchall()
-        conn.close()
-        return items
+        return self._read_sync(self._query_inventory, user_id, guild_id)
+    
+    def _query_inventory(self, tx, user_id, guild_id):
+        return tx.shops.inventory(user_id, guild_id)
     
     # ===== LEILÃO =====
+    # O lance vencedor fica retido (já debitado do licitante) e vai para o
+    # vendedor quando o leilão é liquidado, no ends_at.
     
-    def create_auction(self, guild_id, seller_id, item_id, start_price, duration_hours):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        ends_at = datetime.now() + timedelta(hours=duration_hours)
-        
-        cursor.execute('''
-            INSERT INTO auctions (guild_id, seller_id, item_id, start_price, current_bid, ends_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (guild_id, seller_id, item_id, start_price, start_price, ends_at))
-        
-        auction_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+    def create_auction(self, guild_id, seller_id, item_name, start_price, duration_hours, item_id=None):
+        ends_at = now_ts() + duration_hours * 3600
+        return self._write(self._create_auction, guild_id, seller_id, item_name, start_price, ends_at, item_id)
+    
+    async def acreate_auction(self, guild_id, seller_id, item_name, start_price, duration_hours, item_id=None):
+        ends_at = now_ts() + duration_hours * 3600
+        return await self._awrite(self._create_auction, guild_id, seller_id, item_name, start_price, ends_at, item_id)
+    
+    def _create_auction(self, tx, guild_id, seller_id, item_name, start_price, ends_at, item_id=None):
+        ends_at = to_ts(ends_at)
+        auction_id = tx.auctions.create(guild_id, seller_id, item_id, item_name, start_price, ends_at)
+        tx.after_commit(self.auction_ends.add, ends_at, auction_id)
         return auction_id
     
+    async def aset_auction_message(self, auction_id, channel_id, message_id):
+        return await self._awrite(self._set_auction_message, auction_id, channel_id, message_id)
+    
+    def _set_auction_message(self, tx, auction_id, channel_id, message_id):
+        tx.auctions.set_message(auction_id, channel_id, message_id)
+    
+    async def aget_auction(self, auction_id):
+        return await self._read(self._query_auction, auction_id)
+    
+    def _query_auction(self, tx, auction_id):
+        return tx.auctions.get(auction_id)
+    
+    async def aget_active_auctions(self):
+        return await self._read(self._query_active_auctions)
+    
+    def _query_active_auctions(self, tx):
+        return tx.auctions.pending()
+    
     def place_bid(self, auction_id, bidder_id, amount):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM auctions WHERE auction_id = ?', (auction_id,))
-        auction = cursor.fetchone()
+        return self._write(self._place_bid, auction_id, bidder_id, amount)
+    
+    async def aplace_bid(self, auction_id, bidder_id, amount):
+        return await self._awrite(self._place_bid, auction_id, bidder_id, amount)
+    
+    def _place_bid(self, tx, auction_id, bidder_id, amount):
+        """Devolve o lance anterior e cobra o novo na mesma transação"""
+        auction = tx.auctions.get(auction_id)
         
-        if not auction or auction[7] != 'active':
-            conn.close()
+        if not auction or auction.status != 'active':
             return False, "Leilão não encontrado ou finalizado"
         
-        if datetime.now() > datetime.fromisoformat(auction[6]):
-            conn.close()
+        if now_ts() > auction.ends_at:
             return False, "Leilão já encerrado"
         
-        if amount <= auction[4]:
-            conn.close()
+        if bidder_id == auction.seller_id:
+            return False, "Você não pode dar lance no próprio leilão"
+        
+        if amount <= auction.current_bid:
             return False, "Lance deve ser maior que o atual"
         
-        # Devolver dinheiro do último licitante
-        if auction[5]:
-            self.add_money(auction[5], auction[1], auction[4], "Devolução de lance")
+        guild_id, previous_bidder, previous_bid = auction.guild_id, auction.highest_bidder, auction.current_bid
         
-        # Cobrar novo lance
-        if not self.remove_money(bidder_id, auction[1], amount, f"Lance leilão #{auction_id}"):
-            conn.close()
-            return False, "Saldo insuficiente"
+        # Devolver dinheiro do último licitante
+        if previous_bidder:
+            self._add_money(tx, previous_bidder, guild_id, previous_bid, "Devolução de lance")
         
-        cursor.execute('''
-            UPDATE auctions SET current_bid = ?, highest_bidder = ?
-            WHERE auction_id = ?
-        ''', (amount, bidder_id, auction_id))
+        # Cobrar novo lance; sem saldo, a devolução acima é desfeita junto
+        if not self._remove_money(tx, bidder_id, guild_id, amount, f"Lance leilão #{auction_id}"):
+            raise Rollback((False, "Saldo insuficiente"))
         
-        conn.commit()
-        conn.close()
+        tx.auctions.set_bid(auction_id, amount, bidder_id)
         return True, "Lance realizado"
     
+    async def asettle_auctions(self, now):
+        return await self._awrite(self._settle_auctions, now)
+    
+    def _settle_auctions(self, tx, now):
+        """Encerra os leilões vencidos até `now` e paga os vendedores; devolve os encerrados"""
+        now = to_ts(now)
+        ended = []
+        for auction in tx.auctions.due(now):
+            if auction.highest_bidder:
+                self._add_money(tx, auction.seller_id, auction.guild_id, auction.current_bid,
+                                f"Venda em leilão #{auction.auction_id}")
+            tx.auctions.finish(auction.auction_id)
+            ended.append(auction.replace(status='ended'))
+        
+        tx.after_commit(self.auction_ends.settled, now)
+        return ended
+    
     # ===== MISSÕES =====
     
     def generate_daily_mission(self, user_id, guild_id):
-        import random
-        
+        return self._write(self._generate_daily_mission, user_id, guild_id)
+    
+    async def agenerate_daily_mission(self, user_id, guild_id):
+        return await self._awrite(self._generate_daily_mission, user_id, guild_id)
+    
+    def _generate_daily_mission(self, tx, user_id, guild_id):
         mission_types = [
             ('messages', 'Envie 50 mensagens', 50, 200),
             ('voice', 'Fique 1 hora em call', 60, 300),
@@ -455,50 +903,121 @@ class Database:
         ]
         
         mission = random.choice(mission_types)
-        expires_at = datetime.now() + timedelta(days=1)
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT INTO daily_missions (user_id, guild_id, mission_type, target, reward, expires_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, guild_id, mission[0], mission[2], mission[3], expires_at))
-            conn.commit()
-        except:
-            pass  # Missão já existe para hoje
-        
-        conn.close()
+        expires_at = next_midnight_ts()
+        if tx.missions.create(user_id, guild_id, mission[0], mission[2], mission[3], expires_at):
+            tx.after_commit(self.mission_progress.track, tx.missions.get(user_id, guild_id, expires_at))
         return mission
     
+    async def aflush_mission_progress(self, updates, completions):
+        return await self._awrite(self._flush_mission_progress, updates, completions)
+    
+    def _flush_mission_progress(self, tx, updates, completions):
+        """Grava um lote de MissionTracker.drain(); devolve as missões pagas agora"""
+        tx.missions.add_progress(updates)
+        paid = []
+        for mission_id in completions:
+            mission = tx.missions.complete(mission_id)
+            if mission is not None:
+                self._add_money(tx, mission.user_id, mission.guild_id, mission.reward, "Missão diária concluída")
+                paid.append(mission)
+        return paid
+    
     # ===== BACKUP =====
     
     def create_backup(self, guild_id, name, data):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO backups (guild_id, name, data)
-            VALUES (?, ?, ?)
-        ''', (guild_id, name, json.dumps(data)))
-        
-        backup_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return backup_id
+        return self._write(self._create_backup, guild_id, name, data)
+    
+    async def acreate_backup(self, guild_id, name, data):
+        return await self._awrite(self._create_backup, guild_id, name, data)
+    
+    def _create_backup(self, tx, guild_id, name, data):
+        return tx.backups.create(guild_id, name, json.dumps(data))
     
     def get_backup(self, backup_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM backups WHERE backup_id = ?', (backup_id,))
-        backup = cursor.fetchone()
-        conn.close()
+        backup = self._read_sync(lambda tx: tx.backups.get(backup_id))
         
         if backup:
-            return json.loads(backup[3])
+            return json.loads(backup.data)
         return None
+    
+    # ===== LEITURAS ASSÍNCRONAS =====
+    
+    async def aget_user(self, user_id, guild_id):
+        if (guild_id, user_id) in self.business_owners:
+            # Dono de negócio: a leitura liquida a renda acumulada antes
+            return await self._awrite(self._settle_user, user_id, guild_id)
+        
+        user = self.users.get((guild_id, user_id))
+        if user is not None:
+            return user
+        
+        generation = self.users.generation
+        user = await self._read(self._query_user, user_id, guild_id)
+        self.users.fill((guild_id, user_id), user, generation)
+        if user is None:
+            # Primeira vez: a criação é escrita, vai para o writer
+            user = await self._awrite(self._get_or_create_user, user_id, guild_id)
+        return user
+    
+    async def aget_balance(self, user_id, guild_id):
+        user = await self.aget_user(user_id, guild_id)
+        return user.balance if user else 0
+    
+    async def aget_transactions(self, user_id, guild_id, limit=10):
+        return await self._read(self._query_transactions, user_id, guild_id, limit)
+    
+    async def aiter_balance_deltas(self, user_id, guild_id, chunk=LEDGER_CHUNK):
+        """Histórico do saldo em blocos de até `chunk` linhas (timestamp, variação, id).
+        
+        Primeiro vêm os dias arquivados (uma linha por dia), depois cada
+        lançamento da tabela quente. Cada bloco é uma leitura separada: o
+        pool atende outras consultas entre eles.
+        """
+        archived = await self._read(self._query_archived_deltas, user_id, guild_id)
+        if archived:
+            yield archived
+        
+        after = (-1, -1)
+        while True:
+            rows = await self._read(self._query_ledger_deltas, user_id, guild_id, after, chunk)
+            if rows:
+                yield rows
+            if len(rows) < chunk:
+                return
+            after = (rows[-1][0], rows[-1][2])
+    
+    async def aget_ledger_totals(self, user_id, guild_id):
+        """{tipo: (total, quantidade)} de todo o histórico, arquivado ou não"""
+        rows = await self._read(self._query_ledger_totals, user_id, guild_id)
+        return {row.type: (row.total, row.count) for row in rows}
+    
+    async def aget_ranking(self, guild_id, limit=-1):
+        return await self._read(self._query_ranking, guild_id, limit)
+    
+    async def aget_guild_balances(self, guild_id):
+        """Todos os saldos do servidor, em ordem crescente, numa consulta"""
+        return await self._read(self._query_guild_balances, guild_id)
+    
+    async def aget_shops(self, guild_id):
+        return await self._read(self._query_shops, guild_id)
+    
+    async def aget_shop(self, shop_id):
+        return await self._read(self._query_shop, shop_id)
+    
+    async def aget_shop_items(self, shop_id):
+        return await self._read(self._query_shop_items, shop_id)
+    
+    async def aget_inventory(self, user_id, guild_id):
+        return await self._read(self._query_inventory, user_id, guild_id)
+    
+    async def aget_salaries(self):
+        return await self._read(self._query_salaries)
+    
+    async def aget_active_investments(self, user_id, guild_id):
+        return await self._read(self._query_active_investments, user_id, guild_id)
+    
+    async def aget_today_mission(self, user_id, guild_id):
+        return await self._read(self._query_today_mission, user_id, guild_id)
 
 # Instância global
 db = Database()
@@ -0,0 +1,98 @@
+"""Conferência dos saldos contra o extrato, por checkpoints.
+
+Cada conta guarda em balance_checkpoints o último lançamento conferido e o
+saldo naquele ponto. Conferir de novo é somar só o que entrou depois dele:
+o custo acompanha o movimento desde a última passada, não o histórico. Uma
+conta sem checkpoint (ou com um tão velho que os lançamentos seguintes
+podem já estar no arquivo) é recalculada do zero: saldo com que foi
+aberta (users.opening_balance) + histórico todo.
+
+O checkpoint novo guarda o saldo real, não o esperado: uma divergência é
+relatada na passada que a encontrou e as seguintes só apontam divergências
+novas.
+
+A varredura em segundo plano anda um servidor por vez, em fatias curtas de
+writer; aqui fica onde ela parou e o último relatório de cada servidor.
+Tudo roda no event loop; não há locks.
+"""
+from collections import deque
+
+class BalanceDrift:
+    __slots__ = ('user_id', 'expected', 'actual', 'full')
+    
+    def __init__(self, user_id, expected, actual, full):
+        self.user_id = user_id
+        self.expected = expected
+        self.actual = actual
+        self.full = full    # recalculada do zero (sem checkpoint válido)
+    
+    @property
+    def diff(self):
+        return self.actual - self.expected
+
+class IntegrityReport:
+    """Resultado de uma passada completa (ou em andamento) por um servidor"""
+    
+    def __init__(self, guild_id, started_at):
+        self.guild_id = guild_id
+        self.started_at = started_at
+        self.finished_at = None
+        self.checked = 0
+        self.drift = []
+    
+    def add(self, checked, drift):
+        self.checked += checked
+        self.drift.extend(drift)
+    
+    @property
+    def net_drift(self):
+        """Dinheiro sobrando (+) ou faltando (-) em relação ao extrato"""
+        return sum(entry.diff for entry in self.drift)
+    
+    def worst(self, n=10):
+        return sorted(self.drift, key=lambda entry: abs(entry.diff), reverse=True)[:n]
+
+class IntegritySweep:
+    def __init__(self, pass_interval):
+        self.pass_interval = pass_interval
+        self.reports = {}           # guild_id -> último IntegrityReport concluído
+        self._queue = deque()
+        self._current = None        # relatório do servidor em andamento
+        self._cursor = 0            # último user_id conferido nele
+        self._next_pass = 0
+    
+    def next_slice(self, guild_ids, now):
+        """(guild_id, após user_id) da próxima fatia, ou None se a passada acabou e a próxima ainda não chegou"""
+        if self._current is None:
+            if not self._queue:
+                if now < self._next_pass:
+                    return None
+                self._queue.extend(guild_ids)
+                self._next_pass = now + self.pass_interval
+            if not self._queue:
+                return None
+            self._current = IntegrityReport(self._queue.popleft(), now)
+            self._cursor = 0
+        return self._current.guild_id, self._cursor
+    
+    def record(self, guild_id, checked, drift, cursor, now):
+        """Soma uma fatia; devolve o relatório se o servidor terminou (`cursor` None)"""
+        report = self._current
+        if report is None or report.guild_id != guild_id:
+            return None  # servidor descartado por `skip` enquanto a fatia rodava
+        report.add(checked, drift)
+        if cursor is not None:
+            self._cursor = cursor
+            return None
+        
+        report.finished_at = now
+        self.reports[guild_id] = report
+        self._current = None
+        return report
+    
+    def skip(self, guild_id):
+        """Uma conferência manual cobriu o servidor: a varredura não o repete nesta passada"""
+        if self._current is not None and self._current.guild_id == guild_id:
+            self._current = None
+        if guild_id in self._queue:
+            self._queue.remove(guild_id)
@@ -0,0 +1,67 @@
+"""Locks por usuário para os fluxos da economia que atravessam vários awaits.
+
+Cada operação do Database já é atômica no writer (o débito é condicional),
+mas um comando que decide algo, espera e depois grava (oferta aceita duas
+vezes, compra seguida do efeito do item) precisa que o mesmo usuário não
+rode outro fluxo no meio. Um lock global serializaria o servidor inteiro;
+aqui (guild_id, user_id) cai num de STRIPES asyncio.Lock fixos, e usuários
+diferentes quase nunca disputam o mesmo.
+
+Fluxos com várias pessoas (transferência, venda) pegam as faixas em ordem
+crescente de índice, sem repetir: dois fluxos nunca esperam um pelo outro
+em ciclo.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+STRIPES = 1024
+
+class UserLocks:
+    def __init__(self, stripes=STRIPES):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def stripe(self, guild_id, user_id):
+        return hash((guild_id, user_id)) % len(self._locks)
+    
+    @asynccontextmanager
+    async def hold(self, guild_id, *user_ids):
+        """Segura as faixas de todos os usuários do servidor até o fim do bloco.
+        
+        None em `user_ids` é ignorado (ex.: leilão ainda sem lance).
+        """
+        stripes = sorted({self.stripe(guild_id, user_id) for user_id in user_ids if user_id is not None})
+        acquired = []
+        try:
+            for index in stripes:
+                lock = self._locks[index]
+                self.acquisitions += 1
+                if lock.locked():
+                    self.contended += 1
+                    start = time.perf_counter()
+                    await lock.acquire()
+                    waited = time.perf_counter() - start
+                    self.wait_total += waited
+                    self.wait_max = max(self.wait_max, waited)
+                else:
+                    await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+    
+    def stats(self):
+        return {
+            'stripes': len(self._locks),
+            'held': sum(lock.locked() for lock in self._locks),
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_rate': self.contended / self.acquisitions if self.acquisitions else 0.0,
+            'wait_total': self.wait_total,
+            'wait_max': self.wait_max,
+        }
@@ -0,0 +1,56 @@
+"""Agenda de vencimentos (min-heap de (quando, id)).
+
+Usada para investimentos (end_date) e leilões (ends_at). Carregada do
+banco na partida, então sobrevive a reinícios: o que venceu com o bot
+desligado sai no primeiro disparo. O Database acrescenta cada registro
+novo após o COMMIT e, depois de cada liquidação, tira do heap tudo o que
+venceu até o instante liquidado.
+
+`sleep_until` é a espera dos loops que consomem essas agendas nos cogs.
+"""
+import asyncio
+import heapq
+import threading
+import time
+
+async def sleep_until(due, wakeup):
+    """Dorme até `due` (segundos Unix; None = sem prazo) ou até `wakeup` (asyncio.Event) ser acionado"""
+    timeout = None if due is None else max(due - time.time(), 0)
+    try:
+        await asyncio.wait_for(wakeup.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    wakeup.clear()
+
+class MaturitySchedule:
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+    
+    def load(self, entries):
+        """Monta o heap a partir de pares (quando, id)"""
+        heap = list(entries)
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+    
+    def add(self, when, entry_id):
+        with self._lock:
+            heapq.heappush(self._heap, (when, entry_id))
+    
+    def next_due(self):
+        """Próximo vencimento, ou None se a agenda está vazia"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+    
+    def settled(self, now):
+        """Descarta os vencimentos até `now` (já liquidados); devolve quantos"""
+        count = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+                count += 1
+        return count
+    
+    def __len__(self):
+        return len(self._heap)
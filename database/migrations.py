@@ -0,0 +1,625 @@
+"""Migrações versionadas do schema, controladas por PRAGMA user_version"""
+import time
+
+# Schema base (versão 1). Não editar: mudanças novas entram como migração.
+BASELINE = {
+    # Tabela de economia - usuários
+    'users': '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER,
+            guild_id INTEGER,
+            balance INTEGER DEFAULT 0,
+            bank_balance INTEGER DEFAULT 0,
+            total_earned INTEGER DEFAULT 0,
+            total_spent INTEGER DEFAULT 0,
+            last_work TIMESTAMP,
+            last_daily TIMESTAMP,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, guild_id)
+        )
+    ''',
+    
+    # Tabela de transações
+    'transactions': '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            type TEXT,
+            amount INTEGER,
+            description TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    
+    # Tabela de lojas
+    'shops': '''
+        CREATE TABLE IF NOT EXISTS shops (
+            shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            owner_id INTEGER,
+            name TEXT,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_official INTEGER DEFAULT 0
+        )
+    ''',
+    
+    # Tabela de itens
+    'items': '''
+        CREATE TABLE IF NOT EXISTS items (
+            item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            shop_id INTEGER,
+            name TEXT,
+            description TEXT,
+            price INTEGER,
+            stock INTEGER DEFAULT -1,
+            effect_type TEXT,
+            effect_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    
+    # Tabela de inventário
+    'inventory': '''
+        CREATE TABLE IF NOT EXISTS inventory (
+            user_id INTEGER,
+            guild_id INTEGER,
+            item_id INTEGER,
+            quantity INTEGER DEFAULT 1,
+            acquired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, guild_id, item_id)
+        )
+    ''',
+    
+    # Tabela de leilões
+    'auctions': '''
+        CREATE TABLE IF NOT EXISTS auctions (
+            auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            seller_id INTEGER,
+            item_id INTEGER,
+            start_price INTEGER,
+            current_bid INTEGER,
+            highest_bidder INTEGER,
+            ends_at TIMESTAMP,
+            status TEXT DEFAULT 'active'
+        )
+    ''',
+    
+    # Tabela de investimentos
+    'investments': '''
+        CREATE TABLE IF NOT EXISTS investments (
+            investment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            amount INTEGER,
+            risk_level TEXT,
+            start_date TIMESTAMP,
+            end_date TIMESTAMP,
+            return_rate REAL,
+            status TEXT DEFAULT 'active'
+        )
+    ''',
+    
+    # Tabela de negócios (renda passiva)
+    'businesses': '''
+        CREATE TABLE IF NOT EXISTS businesses (
+            business_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner_id INTEGER,
+            guild_id INTEGER,
+            name TEXT,
+            type TEXT,
+            investment INTEGER,
+            daily_income INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    
+    # Tabela de salários
+    'salaries': '''
+        CREATE TABLE IF NOT EXISTS salaries (
+            guild_id INTEGER,
+            role_id INTEGER,
+            amount INTEGER,
+            interval_hours INTEGER,
+            last_paid TIMESTAMP,
+            PRIMARY KEY (guild_id, role_id)
+        )
+    ''',
+    
+    # Tabela de configuração do servidor
+    'guild_config': '''
+        CREATE TABLE IF NOT EXISTS guild_config (
+            guild_id INTEGER PRIMARY KEY,
+            currency_name TEXT DEFAULT 'CentralCoins',
+            currency_symbol TEXT DEFAULT '💰',
+            start_balance INTEGER DEFAULT 1000,
+            tax_rate REAL DEFAULT 0.05,
+            work_cooldown INTEGER DEFAULT 3600,
+            daily_reward INTEGER DEFAULT 500
+        )
+    ''',
+    
+    # Tabela de missões diárias
+    'daily_missions': '''
+        CREATE TABLE IF NOT EXISTS daily_missions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            mission_type TEXT,
+            target INTEGER,
+            progress INTEGER DEFAULT 0,
+            reward INTEGER,
+            expires_at TIMESTAMP,
+            completed INTEGER DEFAULT 0,
+            claimed INTEGER DEFAULT 0,
+            UNIQUE(user_id, guild_id, expires_at)
+        )
+    ''',
+    
+    # Tabela de backups
+    'backups': '''
+        CREATE TABLE IF NOT EXISTS backups (
+            backup_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            name TEXT,
+            data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    
+    # Tabela de punições criativas
+    'creative_punishments': '''
+        CREATE TABLE IF NOT EXISTS creative_punishments (
+            punishment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            type TEXT,
+            data TEXT,
+            applied_at TIMESTAMP,
+            expires_at TIMESTAMP,
+            applied_by INTEGER
+        )
+    ''',
+}
+
+# Índices dos predicados quentes (nome -> definição)
+INDEXES = {
+    'idx_transactions_user_time': 'transactions(user_id, guild_id, timestamp)',
+    'idx_investments_due': 'investments(status, end_date)',
+    'idx_investments_user': 'investments(user_id, guild_id, status)',
+    'idx_users_guild_balance': 'users(guild_id, balance)',
+    'idx_items_shop': 'items(shop_id)',
+    'idx_shops_guild': 'shops(guild_id)',
+    'idx_businesses_owner': 'businesses(owner_id, guild_id)',
+    'idx_auctions_due': 'auctions(status, ends_at)',
+    'idx_missions_active': 'daily_missions(expires_at, completed)',
+    'idx_transactions_time': 'transactions(timestamp)',
+    'idx_users_guild_user': 'users(guild_id, user_id)',
+    'idx_users_last_work': 'users(last_work)',
+    'idx_users_last_daily': 'users(last_daily)',
+}
+
+# Colunas de data convertidas para segundos Unix na v4. 'utc' veio de
+# CURRENT_TIMESTAMP; 'local' foi gravado a partir de datetime.now().
+EPOCH_COLUMNS = {
+    'users': {'last_work': 'local', 'last_daily': 'local', 'joined_at': 'utc'},
+    'transactions': {'timestamp': 'utc'},
+    'shops': {'created_at': 'utc'},
+    'items': {'created_at': 'utc'},
+    'inventory': {'acquired_at': 'utc'},
+    'auctions': {'ends_at': 'local'},
+    'investments': {'start_date': 'local', 'end_date': 'local'},
+    'businesses': {'created_at': 'utc'},
+    'salaries': {'last_paid': 'local'},
+    'daily_missions': {'expires_at': 'local'},
+    'backups': {'created_at': 'utc'},
+    'creative_punishments': {'applied_at': 'local', 'expires_at': 'local'},
+}
+
+EPOCH_DEFAULT = "(CAST(strftime('%s', 'now') AS INTEGER))"
+
+def epoch_schema(table):
+    """CREATE TABLE do schema base com as datas em INTEGER"""
+    return (BASELINE[table]
+            .replace('TIMESTAMP DEFAULT CURRENT_TIMESTAMP', f'INTEGER DEFAULT {EPOCH_DEFAULT}')
+            .replace('TIMESTAMP', 'INTEGER'))
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def add_column(conn, table, column, declaration):
+    """ALTER TABLE ADD COLUMN que pode rodar mais de uma vez"""
+    if column not in table_columns(conn, table):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+def rebuild_table(conn, table, create_sql):
+    """Recria a tabela no layout canônico copiando as colunas em comum"""
+    conn.execute(f'ALTER TABLE {table} RENAME TO {table}__old')
+    conn.execute(create_sql)
+    
+    old = set(table_columns(conn, f'{table}__old'))
+    common = ', '.join(c for c in table_columns(conn, table) if c in old)
+    conn.execute(f'INSERT INTO {table} ({common}) SELECT {common} FROM {table}__old')
+    conn.execute(f'DROP TABLE {table}__old')
+
+# ===== MIGRAÇÕES =====
+
+def _v1_baseline(conn):
+    for create_sql in BASELINE.values():
+        conn.execute(create_sql)
+
+def _v2_reconcile_drift(conn):
+    """Alinha tabelas criadas pela cópia antiga do schema no central.py.
+    
+    O código lê linhas por posição, então coluna faltando ou fora de ordem
+    (ex.: investments sem start_date) exige recriar a tabela.
+    """
+    for table, create_sql in BASELINE.items():
+        probe = create_sql.replace(f'EXISTS {table} (', f'EXISTS {table}__probe (')
+        conn.execute(probe)
+        canonical = table_columns(conn, f'{table}__probe')
+        conn.execute(f'DROP TABLE {table}__probe')
+        
+        if table_columns(conn, table) != canonical:
+            rebuild_table(conn, table, create_sql)
+
+def _v3_indexes(conn):
+    for name, definition in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+
+def _v4_epoch_timestamps(conn):
+    """Datas em texto (CURRENT_TIMESTAMP ou repr de datetime) viram inteiros"""
+    for table, columns in EPOCH_COLUMNS.items():
+        rebuild_table(conn, table, epoch_schema(table))
+        
+        for column, zone in columns.items():
+            modifier = ", 'utc'" if zone == 'local' else ''
+            conn.execute(f'''
+                UPDATE {table} SET {column} = CAST(strftime('%s', {column}{modifier}) AS INTEGER)
+                WHERE typeof({column}) = 'text'
+            ''')
+    
+    # Recriar a tabela descarta os índices antigos
+    _v3_indexes(conn)
+
+def _v5_guild_settings(conn):
+    """guild_config passa a guardar logs, onboarding e AutoMod"""
+    add_column(conn, 'guild_config', 'logs_channel_id', 'INTEGER')
+    add_column(conn, 'guild_config', 'welcome_channel_id', 'INTEGER')
+    add_column(conn, 'guild_config', 'onboarding_role_id', 'INTEGER')
+    add_column(conn, 'guild_config', 'onboarding_verification', 'INTEGER DEFAULT 0')
+    add_column(conn, 'guild_config', 'automod_enabled', 'INTEGER DEFAULT 1')
+    add_column(conn, 'guild_config', 'spam_threshold', 'INTEGER DEFAULT 5')
+    add_column(conn, 'guild_config', 'spam_interval', 'INTEGER DEFAULT 5')
+    add_column(conn, 'guild_config', 'raid_threshold', 'INTEGER DEFAULT 10')
+    add_column(conn, 'guild_config', 'raid_interval', 'INTEGER DEFAULT 10')
+    add_column(conn, 'guild_config', 'block_links', 'INTEGER DEFAULT 1')
+
+def _v6_business_income(conn):
+    """Renda passiva calculada sob demanda a partir de last_settled"""
+    add_column(conn, 'businesses', 'last_settled', 'INTEGER')
+    conn.execute('UPDATE businesses SET last_settled = created_at WHERE last_settled IS NULL')
+    _v3_indexes(conn)
+
+def _v7_auctions(conn):
+    """Leilões de verdade: item em texto e a mensagem com os botões"""
+    add_column(conn, 'auctions', 'item_name', 'TEXT')
+    add_column(conn, 'auctions', 'channel_id', 'INTEGER')
+    add_column(conn, 'auctions', 'message_id', 'INTEGER')
+    _v3_indexes(conn)
+
+def _v8_mission_progress(conn):
+    """Missões do dia carregadas na partida pelo contador em memória"""
+    _v3_indexes(conn)
+
+# Lançamentos antigos saem de `transactions` para uma tabela por mês
+# (transactions_AAAAMM, mesmo layout) e entram somados em ledger_daily.
+LEDGER_PARTITION_PREFIX = 'transactions_'
+
+def ledger_partition(ts):
+    """Nome da partição mensal (UTC) de um lançamento"""
+    return LEDGER_PARTITION_PREFIX + time.strftime('%Y%m', time.gmtime(ts))
+
+def ledger_partition_schema(name):
+    return epoch_schema('transactions').replace('EXISTS transactions (', f'EXISTS {name} (')
+
+def _v9_ledger_archive(conn):
+    """Resumo diário dos lançamentos arquivados; `day` é o início do dia em UTC"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ledger_daily (
+            guild_id INTEGER,
+            user_id INTEGER,
+            day INTEGER,
+            type TEXT,
+            total INTEGER,
+            count INTEGER,
+            PRIMARY KEY (guild_id, user_id, day, type)
+        ) WITHOUT ROWID
+    ''')
+    _v3_indexes(conn)
+
+def backfill_economy(conn):
+    """Monta economy_daily a partir do extrato (arquivado e quente).
+    
+    O saldo em circulação de cada dia é reconstruído de trás para frente a
+    partir da soma atual dos saldos, desfazendo o fluxo líquido dos dias
+    seguintes. Saldos iniciais de contas novas não passam pelo extrato e
+    aparecem como se existissem desde o começo.
+    """
+    flows = {}
+    active = {}
+    for guild_id, user_id, day, type, total, count in [*conn.execute('''
+        SELECT guild_id, user_id, day, type, total, count FROM ledger_daily
+    '''), *conn.execute('''
+        SELECT guild_id, user_id, timestamp - timestamp % 86400, type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4
+    ''')]:
+        row = flows.setdefault((guild_id, day), [0, 0, 0])
+        row[0] += total if type == 'income' else 0
+        row[1] += total if type == 'expense' else 0
+        row[2] += count
+        active.setdefault((guild_id, day), set()).add(user_id)
+    
+    supply = dict(conn.execute('SELECT guild_id, SUM(balance) FROM users GROUP BY guild_id'))
+    rows = []
+    for guild_id, day in sorted(flows, reverse=True):
+        earned, spent, count = flows[(guild_id, day)]
+        current = supply.get(guild_id, 0)
+        rows.append((guild_id, day, current, earned, spent, count, len(active[(guild_id, day)])))
+        supply[guild_id] = current - (earned - spent)
+    conn.executemany('INSERT OR REPLACE INTO economy_daily VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    
+    # Quem já movimentou hoje não pode contar de novo como ativo
+    today = int(time.time()) // 86400 * 86400
+    conn.executemany('INSERT OR IGNORE INTO economy_active VALUES (?, ?, ?)',
+                     [(today, guild_id, user_id) for (guild_id, day), users in active.items()
+                      if day == today for user_id in users])
+
+def _v10_economy_daily(conn):
+    """Resumo diário da economia de cada servidor, para o /grafico"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS economy_daily (
+            guild_id INTEGER,
+            day INTEGER,
+            money_supply INTEGER,
+            total_earned INTEGER DEFAULT 0,
+            total_spent INTEGER DEFAULT 0,
+            tx_count INTEGER DEFAULT 0,
+            active_users INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, day)
+        ) WITHOUT ROWID
+    ''')
+    # Quem já movimentou no dia (para contar usuários ativos uma vez só)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS economy_active (
+            day INTEGER,
+            guild_id INTEGER,
+            user_id INTEGER,
+            PRIMARY KEY (day, guild_id, user_id)
+        ) WITHOUT ROWID
+    ''')
+    backfill_economy(conn)
+
+def _v11_balance_checkpoints(conn):
+    """Último lançamento conferido de cada conta e o saldo naquele ponto"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS balance_checkpoints (
+            guild_id INTEGER,
+            user_id INTEGER,
+            ledger_id INTEGER,
+            balance INTEGER,
+            checked_at INTEGER,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    ''')
+    _v3_indexes(conn)
+
+def _v12_opening_balance(conn):
+    """Saldo com que cada conta foi aberta (o start_balance pode mudar depois)"""
+    add_column(conn, 'users', 'opening_balance', 'INTEGER')
+    # Contas antigas: o start_balance vigente é o melhor registro que existe
+    conn.execute('''
+        UPDATE users SET opening_balance = COALESCE(
+            (SELECT start_balance FROM guild_config g WHERE g.guild_id = users.guild_id), 1000)
+        WHERE opening_balance IS NULL
+    ''')
+
+def _v13_cooldown_indexes(conn):
+    """Carga dos cooldowns na partida (last_work OR last_daily) sem varrer users"""
+    _v3_indexes(conn)
+
+MIGRATIONS = [
+    _v1_baseline,
+    _v2_reconcile_drift,
+    _v3_indexes,
+    _v4_epoch_timestamps,
+    _v5_guild_settings,
+    _v6_business_income,
+    _v7_auctions,
+    _v8_mission_progress,
+    _v9_ledger_archive,
+    _v10_economy_daily,
+    _v11_balance_checkpoints,
+    _v12_opening_balance,
+    _v13_cooldown_indexes,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    """Aplica as migrações pendentes; devolve (versão anterior, versão atual)"""
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        MIGRATIONS[version - 1](conn)
+        conn.execute(f'PRAGMA user_version = {version}')
+    
+    return current, max(current, SCHEMA_VERSION)
+
+# ===== PLANOS DE CONSULTA =====
+
+# Toda op e consulta do Database (`_x(self, tx, ...)`), como (método,
+# argumentos); tests/test_migrations.py confere que nenhuma ficou de fora.
+PLAN_CHECKS = [
+    ('_query_user', (1, 1)),
+    ('_query_ranking', (1, 10)),
+    ('_query_guild_balances', (1,)),
+    ('_query_transactions', (1, 1, 10)),
+    ('_query_ledger_totals', (1, 1)),
+    ('_query_ledger_deltas', (1, 1, (0, 0), 100)),
+    ('_query_archived_deltas', (1, 1)),
+    ('_query_economy', (1, 0)),
+    ('_snapshot_economy', ([(100, 1, 0)], 0)),
+    ('_archive_ledger', (0, 100)),
+    ('_verify_balances', (1, 0, 1.0, 0)),
+    ('_query_shops', (1,)),
+    ('_query_shop', (1,)),
+    ('_query_shop_items', (1,)),
+    ('_query_inventory', (1, 1)),
+    ('_query_active_investments', (1, 1)),
+    ('_query_today_mission', (1, 1)),
+    ('_add_money', (1, 1, 10, '')),
+    ('_remove_money', (1, 1, 10, '')),
+    ('_transfer_money', (1, 2, 1, 10, 0.05)),
+    ('_add_money_many', ([1, 2, 3], 1, 10, '')),
+    ('_remove_money_many', ([1, 2, 3], 1, 10, '')),
+    ('_buy_item', (1, 1, 1)),
+    ('_place_bid', (1, 1, 10)),
+    ('_settle_auctions', (0,)),
+    ('_query_auction', (1,)),
+    ('_query_item', (1,)),
+    ('_query_cooldowns', (0,)),
+    ('_save_cooldowns', ({'last_work': [(0, 1, 1)], 'last_daily': [(0, 2, 1)]},)),
+    ('_flush_mission_progress', ([(1, 5)], [1])),
+    ('_query_active_missions', ()),
+    ('_settle_investments', (0,)),
+    ('_settle_businesses', ([1], 1, 0)),
+    ('_list_businesses', (1, 1)),
+    ('_set_item_stock', (1, 1, 5)),
+    ('_get_or_create_user', (1, 1)),
+    ('_cache_users', ([1, 2], 1)),
+    ('_credit', (1, 1, 10)),
+    ('_debit', (1, 1, 10)),
+    ('_post', ([1, 2], 1, 'income', 10, '')),
+    ('_settle_user', (1, 1)),
+    ('_create_investment', (1, 1, 100, 'baixo', 0, 0.1)),
+    ('_create_business', (1, 1, 'Loja', 'comercio', 100, 10)),
+    ('_create_shop', (1, 1, 'Loja')),
+    ('_create_item', (1, 'Item', 10)),
+    ('_create_auction', (1, 1, 'Lote', 10, 0)),
+    ('_set_auction_message', (1, 1, 1)),
+    ('_query_active_auctions', ()),
+    ('_generate_daily_mission', (1, 1)),
+    ('_set_salary', (1, 1, 10, 24)),
+    ('_query_salaries', ()),
+    ('_pay_salary', (1, 1, [1, 2], 10, 'Salário')),
+    ('_update_guild_settings', (1, {'start_balance': 1000})),
+    ('_create_backup', (1, 'backup', '{}')),
+]
+
+# Ops que não consultam nada por conta própria
+PLAN_SKIP = {
+    '_cache_user': "só agenda o cache para depois do COMMIT",
+    '_settle_owners': "repassa para _settle_businesses, conferida acima",
+}
+
+# Leituras completas por natureza: a tabela de configuração dos salários é
+# pequena e vai inteira para a agenda na partida
+EXPECTED_SCANS = {'SELECT * FROM salaries'}
+
+class _ExplainConnection:
+    """Troca cada execute por EXPLAIN QUERY PLAN e guarda o plano.
+    
+    `found` decide o que as consultas "devolvem": nada percorre os caminhos
+    de linha inexistente; senão, uma linha de zeros com a largura do
+    resultado (o p2 do opcode ResultRow no EXPLAIN da consulta).
+    """
+    
+    lastrowid = None
+    rowcount = 0
+    total_changes = 0
+    
+    def __init__(self, conn, found):
+        self.conn = conn
+        self.found = found
+        self.row = None
+        self.plans = {}
+    
+    def execute(self, sql, params=()):
+        plan = self.conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        self.plans[' '.join(sql.split())] = [row[3] for row in plan]
+        if self.found:
+            program = self.conn.execute('EXPLAIN ' + sql, params).fetchall()
+            width = next((row[3] for row in program if row[1] == 'ResultRow'), 0)
+            self.row = (0,) * width or None
+        return self
+    
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            return self.execute(sql, params)
+        return self
+    
+    def cursor(self):
+        return self
+    
+    def fetchone(self):
+        return self.row
+    
+    def fetchall(self):
+        return [self.row] if self.row else []
+    
+    def __iter__(self):
+        return iter(self.fetchall())
+
+def _is_full_scan(detail):
+    # "SCAN users" é varredura completa; "SCAN ... USING INDEX" não
+    return detail.startswith('SCAN ') and 'USING' not in detail
+
+def find_full_scans(db, conn):
+    """Roda EXPLAIN QUERY PLAN nas consultas dos cogs; devolve as que varrem tabela"""
+    from database.storage.sqlite import SQLiteSession
+    
+    offenders = []
+    for method, args in PLAN_CHECKS:
+        plans = {}
+        errors = []
+        for found in (False, True):
+            explain = _ExplainConnection(conn, found)
+            try:
+                getattr(db, method)(SQLiteSession(explain), *args)
+            except Exception as e:
+                # Caminho que a linha falsa não consegue simular; o plano
+                # do que rodou antes do erro já foi capturado
+                errors.append(repr(e))
+            plans.update(explain.plans)
+        
+        # Método que falha antes de consultar não pode passar por limpo
+        if not plans:
+            offenders.append((method, "(nenhuma consulta capturada)", errors or ["nenhum SQL executado"]))
+            continue
+        
+        for sql, details in plans.items():
+            scans = [d for d in details if _is_full_scan(d) and sql not in EXPECTED_SCANS]
+            if scans:
+                offenders.append((method, sql, scans))
+    return offenders
+
+if __name__ == '__main__':
+    # python -m database.migrations: migra o banco e falha se houver full scan
+    import sys
+    from database.db import db
+    
+    with db.storage.connection() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        offenders = find_full_scans(db, conn)
+    
+    print(f"Schema na versão {version}")
+    for method, sql, scans in offenders:
+        print(f"❌ {method}: {', '.join(scans)}\n   {sql}")
+    if not offenders:
+        print(f"✅ {len(PLAN_CHECKS)} consultas sem full scan")
+    db.close()
+    sys.exit(1 if offenders else 0)
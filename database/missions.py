@@ -0,0 +1,97 @@
+"""Progresso das missões diárias contado em memória.
+
+Mensagens, reações, minutos de call e comandos chegam às centenas por
+segundo; gravar cada um seria um UPDATE por evento. Aqui cada evento só
+soma num contador da missão do dia (O(1), um dict e um lock), e o cog
+descarrega os contadores no banco de tempos em tempos, num lote só.
+
+Quando um contador alcança a meta a missão é marcada para conclusão; o
+próximo descarregamento a completa e paga a recompensa. A conclusão no
+banco é condicional (`completed = 0`), então a recompensa sai uma vez só,
+mesmo que um descarregamento seja repetido.
+"""
+import threading
+import time
+
+class MissionProgress:
+    __slots__ = ('mission_id', 'mission_type', 'target', 'progress', 'pending', 'expires_at', 'completed')
+    
+    def __init__(self, row):
+        self.mission_id = row.id
+        self.mission_type = row.mission_type
+        self.target = row.target
+        self.progress = row.progress    # inclui o que ainda não foi gravado
+        self.pending = 0                # soma desde o último descarregamento
+        self.expires_at = row.expires_at
+        self.completed = bool(row.completed)
+
+class MissionTracker:
+    """Missão do dia de cada (guild_id, user_id) com o contador pendente"""
+    
+    def __init__(self):
+        self._missions = {}
+        self._lock = threading.Lock()
+    
+    def load(self, rows):
+        with self._lock:
+            self._missions = {(row.guild_id, row.user_id): MissionProgress(row) for row in rows}
+    
+    def track(self, row):
+        with self._lock:
+            self._missions[(row.guild_id, row.user_id)] = MissionProgress(row)
+    
+    def record(self, guild_id, user_id, mission_type, amount=1, now=None):
+        """Soma `amount` se a missão de hoje do usuário for desse tipo"""
+        with self._lock:
+            mission = self._missions.get((guild_id, user_id))
+            if mission is None or mission.completed or mission.mission_type != mission_type:
+                return
+            if (time.time() if now is None else now) >= mission.expires_at:
+                return  # missão de ontem; a de hoje entra por track
+            
+            mission.pending += amount
+            mission.progress = min(mission.progress + amount, mission.target)
+            if mission.progress >= mission.target:
+                mission.completed = True
+    
+    def current(self, guild_id, user_id):
+        """(progresso, concluída) em memória, ou None se não há missão rastreada"""
+        with self._lock:
+            mission = self._missions.get((guild_id, user_id))
+            return None if mission is None else (mission.progress, mission.completed)
+    
+    def drain(self):
+        """Zera os contadores; devolve ([(mission_id, delta)], [mission_id concluídas])"""
+        updates = []
+        completions = []
+        with self._lock:
+            for mission in self._missions.values():
+                if mission.pending:
+                    updates.append((mission.mission_id, mission.pending))
+                    mission.pending = 0
+                if mission.completed:
+                    completions.append(mission.mission_id)
+        return updates, completions
+    
+    def restore(self, updates):
+        """Devolve aos contadores o que não chegou a ser gravado"""
+        deltas = dict(updates)
+        with self._lock:
+            for mission in self._missions.values():
+                mission.pending += deltas.get(mission.mission_id, 0)
+    
+    def prune(self, now, paid):
+        """Esquece as missões de `paid` (concluídas já gravadas) e as vencidas.
+        
+        Uma missão concluída enquanto o lote era gravado não está em `paid`
+        e fica para o próximo descarregamento.
+        """
+        paid = set(paid)
+        with self._lock:
+            self._missions = {
+                key: mission for key, mission in self._missions.items()
+                if mission.mission_id not in paid and (mission.expires_at > now or mission.pending)
+            }
+    
+    def __len__(self):
+        return len(self._missions)
@@ -0,0 +1,84 @@
+"""Agenda de salários: min-heap pelo próximo vencimento.
+
+Substitui a varredura de hora em hora da tabela `salaries`. O Database
+carrega a agenda na partida e a atualiza após o COMMIT de `_set_salary` e
+`_pay_salary`; o loop de pagamento só pergunta quando vence o próximo e
+dorme até lá.
+
+Entradas antigas do heap (salário reconfigurado ou já pago) não são
+removidas na hora: valem só se baterem com o vencimento agendado em
+`_due` e são descartadas ao chegar ao topo.
+"""
+import heapq
+import threading
+
+class PayrollSchedule:
+    def __init__(self):
+        self._heap = []
+        self._rows = {}
+        self._due = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def due_at(row):
+        return row.last_paid + row.interval_hours * 3600
+    
+    def load(self, rows):
+        with self._lock:
+            self._rows = {(row.guild_id, row.role_id): row for row in rows}
+            self._due = {key: self.due_at(row) for key, row in self._rows.items()}
+            self._heap = [(due, *key) for key, due in self._due.items()]
+            heapq.heapify(self._heap)
+    
+    def put(self, row, due=None):
+        """Agenda (ou reagenda) o salário; `due` força o próximo vencimento"""
+        with self._lock:
+            self._rows[(row.guild_id, row.role_id)] = row
+            self._push(self.due_at(row) if due is None else due, row.guild_id, row.role_id)
+    
+    def paid(self, guild_id, role_id, paid_at):
+        with self._lock:
+            row = self._rows.get((guild_id, role_id))
+            if row is not None:
+                row = self._rows[(guild_id, role_id)] = row.replace(last_paid=paid_at)
+                self._push(self.due_at(row), guild_id, role_id)
+    
+    def next_due(self):
+        """Próximo vencimento válido, ou None se não há salários"""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now):
+        """Tira da agenda e devolve os salários vencidos até `now`.
+        
+        Cada um volta para o heap quando `paid` registrar o pagamento.
+        """
+        due = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return due
+                _, guild_id, role_id = heapq.heappop(self._heap)
+                del self._due[(guild_id, role_id)]
+                due.append(self._rows[(guild_id, role_id)])
+    
+    def __len__(self):
+        return len(self._rows)
+    
+    def _push(self, due, guild_id, role_id):
+        self._due[(guild_id, role_id)] = due
+        heapq.heappush(self._heap, (due, guild_id, role_id))
+        if len(self._heap) > 2 * len(self._rows) + 64:
+            # Muitas entradas velhas: reconstrói só com as válidas
+            self._heap = [entry for entry in self._heap if self._valid(entry)]
+            heapq.heapify(self._heap)
+    
+    def _valid(self, entry):
+        due, guild_id, role_id = entry
+        return self._due.get((guild_id, role_id)) == due
+    
+    def _drop_stale(self):
+        while self._heap and not self._valid(self._heap[0]):
+            heapq.heappop(self._heap)
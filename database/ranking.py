@@ -0,0 +1,186 @@
+"""Ranking de saldos por servidor, mantido em memória.
+
+Cada servidor tem uma lista ordenada por (-saldo, user_id) quebrada em
+blocos de até 2*LOAD chaves, com uma árvore de Fenwick sobre o tamanho dos
+blocos. Posição de um usuário, N-ésimo colocado e faixas de posições saem
+em O(log n); mudar um saldo custa O(log n + LOAD). A soma dos saldos
+(moedas em circulação) vai junto, em O(1).
+
+O Database carrega tudo na partida e, depois disso, aplica cada saldo novo
+após o COMMIT (mesmo caminho do UserCache). Consultas nunca vão ao banco.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from database.records import RankingRow
+
+LOAD = 512
+
+class GuildRanking:
+    """Saldos de um servidor em ordem decrescente (empate: menor user_id)"""
+    
+    def __init__(self, balances=()):
+        self._balances = dict(balances)
+        self.total = sum(self._balances.values())
+        keys = sorted((-balance, user_id) for user_id, balance in self._balances.items())
+        self._lists = [keys[i:i + LOAD] for i in range(0, len(keys), LOAD)]
+        self._maxes = [bucket[-1] for bucket in self._lists]
+        self._rebuild()
+    
+    def __len__(self):
+        return len(self._balances)
+    
+    # ----- árvore de Fenwick sobre o tamanho dos blocos -----
+    
+    def _rebuild(self):
+        tree = [0] + [len(bucket) for bucket in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+    
+    def _add(self, index, delta):
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+    
+    def _prefix(self, index):
+        """Quantas chaves há nos blocos antes de `index`"""
+        total = 0
+        while index:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+    
+    def _find(self, position):
+        """Bloco que contém a posição (0-based) e a posição dentro dele"""
+        index = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                index = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return index, position
+    
+    # ----- chaves -----
+    
+    def _insert(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild()
+            return
+        
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+        self._add(i, 1)
+        
+        bucket = self._lists[i]
+        if len(bucket) > 2 * LOAD:
+            self._lists[i:i + 1] = [bucket[:LOAD], bucket[LOAD:]]
+            self._maxes[i:i + 1] = [bucket[LOAD - 1], bucket[-1]]
+            self._rebuild()
+    
+    def _remove(self, key):
+        i = bisect_left(self._maxes, key)
+        bucket = self._lists[i]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild()
+    
+    # ----- API -----
+    
+    def update(self, user_id, balance):
+        old = self._balances.get(user_id)
+        if old == balance:
+            return
+        if old is not None:
+            self._remove((-old, user_id))
+        self.total += balance - (old or 0)
+        self._balances[user_id] = balance
+        self._insert((-balance, user_id))
+    
+    def rank(self, user_id):
+        """Posição 1-based do usuário, ou None se ele não está no ranking"""
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        key = (-balance, user_id)
+        i = bisect_left(self._maxes, key)
+        return self._prefix(i) + bisect_left(self._lists[i], key) + 1
+    
+    def between(self, first, last):
+        """[RankingRow] das posições first..last (1-based, inclusivas)"""
+        first = max(first, 1)
+        last = min(last, len(self._balances))
+        if first > last:
+            return []
+        
+        i, offset = self._find(first - 1)
+        rows = []
+        remaining = last - first + 1
+        while remaining:
+            chunk = self._lists[i][offset:offset + remaining]
+            rows.extend(RankingRow(user_id, -neg_balance) for neg_balance, user_id in chunk)
+            remaining -= len(chunk)
+            i, offset = i + 1, 0
+        return rows
+
+class RankIndex:
+    """Um GuildRanking por servidor, seguro entre o writer e o event loop"""
+    
+    def __init__(self):
+        self._guilds = {}
+        self._lock = threading.Lock()
+    
+    def load(self, rows):
+        """Monta tudo de uma vez a partir de [BalanceRow]"""
+        balances = {}
+        for row in rows:
+            balances.setdefault(row.guild_id, []).append((row.user_id, row.balance))
+        guilds = {guild_id: GuildRanking(users) for guild_id, users in balances.items()}
+        with self._lock:
+            self._guilds = guilds
+    
+    def update(self, guild_id, user_id, balance):
+        with self._lock:
+            ranking = self._guilds.get(guild_id)
+            if ranking is None:
+                ranking = self._guilds[guild_id] = GuildRanking()
+            ranking.update(user_id, balance)
+    
+    def rank(self, guild_id, user_id):
+        """(posição ou None, total de contas no servidor)"""
+        with self._lock:
+            ranking = self._guilds.get(guild_id)
+            if ranking is None:
+                return None, 0
+            return ranking.rank(user_id), len(ranking)
+    
+    def between(self, guild_id, first, last):
+        with self._lock:
+            ranking = self._guilds.get(guild_id)
+            return ranking.between(first, last) if ranking is not None else []
+    
+    def top(self, guild_id, n=10):
+        return self.between(guild_id, 1, n)
+    
+    def total(self, guild_id):
+        """Moedas em circulação no servidor (soma dos saldos)"""
+        with self._lock:
+            ranking = self._guilds.get(guild_id)
+            return ranking.total if ranking is not None else 0
@@ -0,0 +1,136 @@
+"""Registros compactos das linhas do banco.
+
+Cada tabela vira uma classe com __slots__: os campos ficam num array fixo
+no objeto, sem __dict__, e são lidos por nome (`user.balance`) em vez de
+`user[2]`. Os campos seguem a ordem das colunas do schema, então
+`UserRow(*tupla_do_sqlite)` funciona direto.
+
+Registros são tratados como imutáveis: para mudar, use `replace`.
+"""
+
+class Record:
+    __slots__ = ()
+    
+    def __init__(self, *values):
+        # Coluna a mais ou a menos é schema fora de ordem: falha aqui, não num campo vazio depois
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} espera {len(self.__slots__)} valores, recebeu {len(values)}")
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+    
+    @classmethod
+    def from_row(cls, row):
+        return None if row is None else cls(*row)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        return [cls(*row) for row in rows]
+    
+    def replace(self, **changes):
+        return type(self)(*(changes.get(field, getattr(self, field)) for field in self.__slots__))
+    
+    def __iter__(self):
+        for field in self.__slots__:
+            yield getattr(self, field)
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        fields = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class UserRow(Record):
+    __slots__ = ('user_id', 'guild_id', 'balance', 'bank_balance', 'total_earned', 'total_spent',
+                 'last_work', 'last_daily', 'joined_at', 'opening_balance')
+
+class TransactionRow(Record):
+    __slots__ = ('id', 'user_id', 'guild_id', 'type', 'amount', 'description', 'timestamp')
+
+class LedgerTotalRow(Record):
+    """Soma de um tipo de lançamento (arquivo diário + tabela quente)"""
+    
+    __slots__ = ('type', 'total', 'count')
+
+class EconomyDayRow(Record):
+    __slots__ = ('guild_id', 'day', 'money_supply', 'total_earned', 'total_spent', 'tx_count',
+                 'active_users')
+
+class AccountCheckRow(Record):
+    """Saldo atual e inicial de uma conta com o último checkpoint (None se nunca conferida)"""
+    
+    __slots__ = ('user_id', 'balance', 'opening_balance', 'ledger_id', 'checkpoint_balance', 'checked_at')
+
+class RankingRow(Record):
+    __slots__ = ('user_id', 'balance')
+
+class BalanceRow(Record):
+    __slots__ = ('guild_id', 'user_id', 'balance')
+
+class ShopRow(Record):
+    __slots__ = ('shop_id', 'guild_id', 'owner_id', 'name', 'description', 'created_at', 'is_official')
+
+class ItemRow(Record):
+    __slots__ = ('item_id', 'shop_id', 'name', 'description', 'price', 'stock', 'effect_type',
+                 'effect_data', 'created_at')
+
+class InventoryRow(Record):
+    """Item do inventário: colunas do item + quantidade"""
+    
+    __slots__ = ItemRow.__slots__ + ('quantity',)
+
+class AuctionRow(Record):
+    __slots__ = ('auction_id', 'guild_id', 'seller_id', 'item_id', 'start_price', 'current_bid',
+                 'highest_bidder', 'ends_at', 'status', 'item_name', 'channel_id', 'message_id')
+
+class InvestmentRow(Record):
+    __slots__ = ('investment_id', 'user_id', 'guild_id', 'amount', 'risk_level', 'start_date',
+                 'end_date', 'return_rate', 'status')
+
+class BusinessRow(Record):
+    __slots__ = ('business_id', 'owner_id', 'guild_id', 'name', 'type', 'investment', 'daily_income',
+                 'created_at', 'last_settled')
+
+class SalaryRow(Record):
+    __slots__ = ('guild_id', 'role_id', 'amount', 'interval_hours', 'last_paid')
+
+class MissionRow(Record):
+    __slots__ = ('id', 'user_id', 'guild_id', 'mission_type', 'target', 'progress', 'reward',
+                 'expires_at', 'completed', 'claimed')
+
+class BackupRow(Record):
+    __slots__ = ('backup_id', 'guild_id', 'name', 'data', 'created_at')
+
+if __name__ == '__main__':
+    # python -m database.records: memória por linha de users em cada formato
+    import sqlite3
+    import sys
+    import tracemalloc
+    
+    from database.migrations import migrate
+    
+    N = 100_000
+    conn = sqlite3.connect(':memory:')
+    # O schema de verdade, com todas as migrações
+    migrate(conn)
+    conn.executemany('''
+        INSERT INTO users (user_id, guild_id, balance, total_earned, total_spent, last_work, joined_at,
+                           opening_balance)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1000)
+    ''', ((10**17 + i, 10**17, 1000 + i, i, i, 1_700_000_000 + i, 1_700_000_000 + i) for i in range(N)))
+    
+    def measure(label, load):
+        tracemalloc.start()
+        rows = load()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:<12} {size / N:6.0f} bytes/linha (objeto da linha: {sys.getsizeof(rows[0])} bytes)")
+        return rows
+    
+    measure('tuple', lambda: conn.execute('SELECT * FROM users').fetchall())
+    conn.row_factory = sqlite3.Row
+    measure('sqlite3.Row', lambda: conn.execute('SELECT * FROM users').fetchall())
+    conn.row_factory = None
+    measure('UserRow', lambda: UserRow.from_rows(conn.execute('SELECT * FROM users')))
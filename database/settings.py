@@ -0,0 +1,62 @@
+"""Configurações por servidor: persistidas em guild_config, lidas da memória"""
+
+# Colunas de guild_config e o valor de quem ainda não configurou nada
+DEFAULTS = {
+    # Economia
+    'currency_name': 'CentralCoins',
+    'currency_symbol': '💰',
+    'start_balance': 1000,
+    'tax_rate': 0.05,
+    'work_cooldown': 3600,
+    'daily_reward': 500,
+    
+    # Logs e onboarding
+    'logs_channel_id': None,
+    'welcome_channel_id': None,
+    'onboarding_role_id': None,
+    'onboarding_verification': 0,
+    
+    # AutoMod
+    'automod_enabled': 1,
+    'spam_threshold': 5,
+    'spam_interval': 5,
+    'raid_threshold': 10,
+    'raid_interval': 10,
+    'block_links': 1,
+}
+
+def settings_row(cursor, row):
+    """Linha de guild_config -> dict {coluna: valor}"""
+    return dict(zip([column[0] for column in cursor.description], row))
+
+class GuildSettingsStore:
+    """Espelho em memória de guild_config.
+    
+    Carregado inteiro na partida e, depois disso, só muda por `put`, que o
+    Database chama após o COMMIT de cada escrita. Ler nunca consulta o
+    banco. Cada servidor é um dict trocado por inteiro, então leitores no
+    event loop nunca veem uma configuração pela metade.
+    """
+    
+    def __init__(self):
+        self._guilds = {}
+    
+    def load(self, rows):
+        self._guilds = {row['guild_id']: row for row in rows}
+    
+    def get(self, guild_id):
+        """Configuração do servidor (somente leitura); DEFAULTS se não houver"""
+        return self._guilds.get(guild_id, DEFAULTS)
+    
+    def put(self, guild_id, row):
+        self._guilds[guild_id] = row
+    
+    def max_of(self, key):
+        """Maior valor de `key` entre os servidores configurados e o padrão"""
+        return max([DEFAULTS[key], *(row[key] for row in self._guilds.values() if row.get(key) is not None)])
+    
+    def __contains__(self, guild_id):
+        return guild_id in self._guilds
+    
+    def __len__(self):
+        return len(self._guilds)
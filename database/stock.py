@@ -0,0 +1,102 @@
+"""Reservas de estoque em memória para itens limitados.
+
+Num drop de item limitado centenas de /comprar chegam juntos. O banco já
+não vende além do estoque (Database._buy_item reserva com um UPDATE
+condicional e desfaz tudo se a cobrança falhar), mas cada clique perdido
+ainda ocuparia o writer. Aqui cada item tem um contador de unidades livres:
+a compra pega uma ficha antes de ir ao banco, e só `stock` compras chegam
+ao writer ao mesmo tempo.
+
+Sem ficha, a compra espera se ainda houver compras em andamento (uma delas
+pode falhar na cobrança e devolver a unidade) e é recusada na hora se não
+houver. O banco continua sendo a palavra final: se ele disser que acabou,
+o contador é descartado e recarregado.
+
+Tudo roda no event loop; não há locks.
+"""
+import asyncio
+
+class ItemStock:
+    __slots__ = ('available', 'in_flight', 'changed')
+    
+    def __init__(self, available):
+        self.available = available  # None = estoque infinito
+        self.in_flight = 0
+        self.changed = asyncio.Event()
+    
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class StockReservations:
+    def __init__(self):
+        self._items = {}
+        self._loading = {}
+    
+    async def acquire(self, item_id, load):
+        """Pega uma unidade; devolve a reserva, ou None se o item esgotou.
+        
+        A reserva volta em `commit` ou `release`. `load(item_id)` (async)
+        devolve o estoque no banco, -1 se infinito ou None se o item não
+        existe. Item inexistente passa direto: o banco responde com a
+        mensagem certa.
+        """
+        while True:
+            stock = self._items.get(item_id)
+            if stock is None:
+                stock = await self._load(item_id, load)
+                if stock is None:
+                    return ItemStock(None)
+            
+            if stock.available is None:
+                return stock
+            if stock.available > 0:
+                stock.available -= 1
+                stock.in_flight += 1
+                return stock
+            if not stock.in_flight:
+                return None
+            await stock.changed.wait()
+    
+    async def _load(self, item_id, load):
+        # Uma leitura só por item, mesmo com a rajada inteira esperando
+        future = self._loading.get(item_id)
+        if future is None:
+            future = self._loading[item_id] = asyncio.ensure_future(load(item_id))
+            try:
+                count = await future
+            finally:
+                del self._loading[item_id]
+            if count is not None and item_id not in self._items:
+                self._items[item_id] = ItemStock(None if count < 0 else count)
+        else:
+            await future
+        return self._items.get(item_id)
+    
+    # Contadores descartados por `forget` ainda recebem as reservas que
+    # estavam em andamento; ninguém mais os lê, e os que esperavam já
+    # foram acordados.
+    
+    @staticmethod
+    def commit(stock):
+        """Compra confirmada: a unidade saiu de vez"""
+        if stock.available is not None:
+            stock.in_flight -= 1
+            stock.notify()
+    
+    @staticmethod
+    def release(stock):
+        """Compra desfeita (saldo insuficiente, erro): a unidade volta"""
+        if stock.available is not None:
+            stock.in_flight -= 1
+            stock.available += 1
+            stock.notify()
+    
+    def forget(self, item_id):
+        """Estoque mudou no banco: a próxima compra recarrega o contador"""
+        stock = self._items.pop(item_id, None)
+        if stock is not None:
+            stock.notify()
+    
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,323 @@
+"""Interface dos backends de armazenamento.
+
+O Database (database/db.py) só conversa com um Storage. Toda regra de
+negócio roda como operação `op(tx, *args)`, onde `tx` é uma Session que
+expõe os repositórios abaixo. Cada engine garante que a operação inteira
+é atômica: se ela levantar exceção (ou Rollback), nada do que fez fica.
+
+Linhas são devolvidas como registros de database/records.py (UserRow,
+ItemRow...), iguais para qualquer engine.
+"""
+
+class Rollback(Exception):
+    """Desfaz a operação atual e entrega `result` ao chamador"""
+    
+    def __init__(self, result=None):
+        super().__init__(result)
+        self.result = result
+
+class Storage:
+    """Backend: executa operações de escrita e consultas"""
+    
+    def run(self, op, *args):
+        """Aplica `op(tx, *args)` atomicamente e devolve o resultado"""
+        raise NotImplementedError
+    
+    async def arun(self, op, *args):
+        raise NotImplementedError
+    
+    def read(self, query, *args):
+        """Executa `query(tx, *args)` sem escrever nada"""
+        raise NotImplementedError
+    
+    async def aread(self, query, *args):
+        raise NotImplementedError
+    
+    def close(self):
+        pass
+
+class Session:
+    """Uma operação em andamento; os repositórios enxergam o mesmo estado"""
+    
+    users = None
+    ledger = None
+    guilds = None
+    shops = None
+    investments = None
+    businesses = None
+    salaries = None
+    auctions = None
+    missions = None
+    economy = None
+    integrity = None
+    backups = None
+    
+    def __init__(self):
+        self.hooks = []
+    
+    def after_commit(self, fn, *args):
+        """Agenda `fn(*args)` para depois que a operação for confirmada"""
+        self.hooks.append((fn, args))
+
+# ===== REPOSITÓRIOS =====
+
+class UserRepository:
+    def get(self, user_id, guild_id):
+        raise NotImplementedError
+    
+    def get_many(self, user_ids, guild_id):
+        """[UserRow] dos que existem, em qualquer ordem"""
+        raise NotImplementedError
+    
+    def create(self, user_id, guild_id):
+        """Cria com o saldo inicial do servidor (se ainda não existe); devolve a linha"""
+        raise NotImplementedError
+    
+    def create_many(self, user_ids, guild_id):
+        raise NotImplementedError
+    
+    def credit(self, user_id, guild_id, amount):
+        """Soma ao saldo, criando o usuário se preciso; devolve a linha"""
+        raise NotImplementedError
+    
+    def debit(self, user_id, guild_id, amount):
+        """Subtrai só se houver saldo; devolve a linha ou None"""
+        raise NotImplementedError
+    
+    def credit_many(self, user_ids, guild_id, amount):
+        """`credit` para cada usuário, num só comando"""
+        raise NotImplementedError
+    
+    def debit_many(self, user_ids, guild_id, amount):
+        """`debit` para cada usuário; devolve os IDs que tinham saldo"""
+        raise NotImplementedError
+    
+    def ranking(self, guild_id, limit=-1):
+        """[RankingRow] do maior para o menor saldo"""
+        raise NotImplementedError
+    
+    def balances(self):
+        """[BalanceRow] de todos os servidores, sem ordem (carga do ranking)"""
+        raise NotImplementedError
+    
+    def guild_balances(self, guild_id):
+        """Saldos do servidor em ordem crescente, só os números (estatísticas)"""
+        raise NotImplementedError
+    
+    def cooldowns(self, since):
+        """[UserRow] com last_work ou last_daily a partir de `since` (carga dos cooldowns)"""
+        raise NotImplementedError
+    
+    def set_last_used(self, column, rows):
+        """Grava cada (ts, user_id, guild_id) em `column` ('last_work' ou 'last_daily')"""
+        raise NotImplementedError
+
+class LedgerRepository:
+    def append(self, user_id, guild_id, type, amount, description):
+        raise NotImplementedError
+    
+    def append_many(self, user_ids, guild_id, type, amount, description):
+        """Mesmo lançamento para vários usuários"""
+        raise NotImplementedError
+    
+    def history(self, user_id, guild_id, limit=10):
+        """Transações mais recentes primeiro (só a tabela quente)"""
+        raise NotImplementedError
+    
+    def archive(self, before, limit):
+        """Move até `limit` lançamentos anteriores a `before` para as partições
+        mensais, somando-os em ledger_daily; devolve quantos moveu"""
+        raise NotImplementedError
+    
+    def head(self):
+        """Maior id de lançamento na tabela quente (0 se vazia)"""
+        raise NotImplementedError
+    
+    def delta_since(self, user_id, guild_id, ledger_id, since):
+        """Soma com sinal dos lançamentos com id > `ledger_id` e timestamp >= `since`"""
+        raise NotImplementedError
+    
+    def totals(self, user_id, guild_id):
+        """[LedgerTotalRow] por tipo, de todo o histórico"""
+        raise NotImplementedError
+    
+    def deltas(self, user_id, guild_id, after, limit):
+        """Até `limit` lançamentos da tabela quente depois de `after` = (timestamp, id),
+        em ordem, como (timestamp, variação do saldo, id)"""
+        raise NotImplementedError
+    
+    def daily_deltas(self, user_id, guild_id):
+        """Variação do saldo por dia arquivado, em ordem, como (dia, variação, 0)"""
+        raise NotImplementedError
+
+class GuildConfigRepository:
+    def update(self, guild_id, fields):
+        """Grava só `fields`; devolve a configuração completa como dict"""
+        raise NotImplementedError
+    
+    def all(self):
+        raise NotImplementedError
+
+class ShopRepository:
+    def create_shop(self, guild_id, owner_id, name, description, is_official):
+        raise NotImplementedError
+    
+    def list_shops(self, guild_id):
+        raise NotImplementedError
+    
+    def get_shop(self, shop_id):
+        raise NotImplementedError
+    
+    def create_item(self, shop_id, name, description, price, stock, effect_type, effect_data):
+        raise NotImplementedError
+    
+    def list_items(self, shop_id):
+        raise NotImplementedError
+    
+    def get_item(self, item_id):
+        raise NotImplementedError
+    
+    def set_stock(self, shop_id, item_id, stock):
+        """Devolve False se o item não for da loja"""
+        raise NotImplementedError
+    
+    def reserve(self, item_id):
+        """Tira uma unidade do estoque (-1 = infinito); devolve o item ou None"""
+        raise NotImplementedError
+    
+    def add_to_inventory(self, user_id, guild_id, item_id):
+        raise NotImplementedError
+    
+    def inventory(self, user_id, guild_id):
+        """[InventoryRow]: colunas do item + quantidade"""
+        raise NotImplementedError
+
+class InvestmentRepository:
+    def create(self, user_id, guild_id, amount, risk_level, start_date, end_date, return_rate):
+        raise NotImplementedError
+    
+    def due(self, now):
+        """Ativos com end_date <= now"""
+        raise NotImplementedError
+    
+    def pending(self):
+        """Todos os ativos, de todos os servidores (carga da agenda)"""
+        raise NotImplementedError
+    
+    def complete(self, investment_id):
+        raise NotImplementedError
+    
+    def active(self, user_id, guild_id):
+        raise NotImplementedError
+
+class BusinessRepository:
+    def create(self, owner_id, guild_id, name, type, investment, daily_income, created_at):
+        """`created_at` também é o primeiro last_settled"""
+        raise NotImplementedError
+    
+    def owned(self, owner_ids, guild_id):
+        """[BusinessRow] dos donos informados"""
+        raise NotImplementedError
+    
+    def settle(self, updates):
+        """Grava [(business_id, last_settled)]"""
+        raise NotImplementedError
+    
+    def owners(self):
+        """[(guild_id, owner_id)] de quem tem negócio (carga na partida)"""
+        raise NotImplementedError
+
+class SalaryRepository:
+    def set(self, guild_id, role_id, amount, interval_hours, last_paid):
+        raise NotImplementedError
+    
+    def all(self):
+        raise NotImplementedError
+    
+    def mark_paid(self, guild_id, role_id, paid_at):
+        raise NotImplementedError
+
+class AuctionRepository:
+    def create(self, guild_id, seller_id, item_id, item_name, start_price, ends_at):
+        raise NotImplementedError
+    
+    def get(self, auction_id):
+        raise NotImplementedError
+    
+    def set_bid(self, auction_id, amount, bidder_id):
+        raise NotImplementedError
+    
+    def set_message(self, auction_id, channel_id, message_id):
+        raise NotImplementedError
+    
+    def due(self, now):
+        """Ativos com ends_at <= now"""
+        raise NotImplementedError
+    
+    def finish(self, auction_id):
+        raise NotImplementedError
+    
+    def pending(self):
+        """Todos os ativos, de todos os servidores (carga da agenda)"""
+        raise NotImplementedError
+
+class MissionRepository:
+    def create(self, user_id, guild_id, mission_type, target, reward, expires_at):
+        """Devolve False se o usuário já tem missão com esse vencimento"""
+        raise NotImplementedError
+    
+    def get(self, user_id, guild_id, expires_at):
+        raise NotImplementedError
+    
+    def active(self, expires_at):
+        """Missões não concluídas com esse vencimento, de todos os servidores"""
+        raise NotImplementedError
+    
+    def add_progress(self, updates):
+        """Soma cada (mission_id, delta) ao progresso, limitado à meta"""
+        raise NotImplementedError
+    
+    def complete(self, mission_id):
+        """Conclui a missão; devolve a linha ou None se ela já estava concluída"""
+        raise NotImplementedError
+
+class EconomyRepository:
+    """Resumo diário por servidor (economy_daily); `day` é o início do dia em UTC"""
+    
+    def record(self, guild_id, day, user_ids, type, amount):
+        """Soma ao dia um lançamento de `amount` para cada usuário.
+        
+        O dia novo começa com o saldo em circulação do último dia gravado.
+        """
+        raise NotImplementedError
+    
+    def set_supply(self, rows):
+        """Grava cada (money_supply, guild_id, day)"""
+        raise NotImplementedError
+    
+    def prune_active(self, before_day):
+        """Esquece quem movimentou em dias anteriores a `before_day`"""
+        raise NotImplementedError
+    
+    def series(self, guild_id, since_day):
+        """[EconomyDayRow] a partir de `since_day`, do mais antigo ao mais novo"""
+        raise NotImplementedError
+
+class IntegrityRepository:
+    """Checkpoints de saldo (balance_checkpoints) da conferência do extrato"""
+    
+    def accounts(self, guild_id, after_user, limit):
+        """[AccountCheckRow] das contas com user_id > `after_user`, em ordem de user_id"""
+        raise NotImplementedError
+    
+    def save(self, rows):
+        """Grava cada (guild_id, user_id, ledger_id, balance, checked_at)"""
+        raise NotImplementedError
+
+class BackupRepository:
+    def create(self, guild_id, name, data):
+        """`data` já serializado em texto"""
+        raise NotImplementedError
+    
+    def get(self, backup_id):
+        raise NotImplementedError
@@ -0,0 +1,538 @@
+"""Engine em memória: os mesmos repositórios, sem disco.
+
+Serve para benchmarks e testes de carga: com ela dá para medir a camada do
+Discord sem o custo do SQLite (e vice-versa). Cada operação roda sob um
+lock global e guarda um log de desfazer; exceção ou Rollback restauram o
+estado anterior, como o SAVEPOINT faz na engine SQLite.
+"""
+import bisect
+import time
+import threading
+import traceback
+from collections import defaultdict
+
+from database.records import (
+    UserRow, TransactionRow, LedgerTotalRow, EconomyDayRow, AccountCheckRow, RankingRow, BalanceRow, ShopRow, ItemRow, InventoryRow, AuctionRow,
+    InvestmentRow, BusinessRow, SalaryRow, MissionRow, BackupRow,
+)
+from database.migrations import ledger_partition
+from database.settings import DEFAULTS
+from database.storage.base import (
+    Rollback, Storage, Session, UserRepository, LedgerRepository, GuildConfigRepository,
+    ShopRepository, InvestmentRepository, BusinessRepository, SalaryRepository, AuctionRepository,
+    MissionRepository, EconomyRepository, IntegrityRepository, BackupRepository,
+)
+
+_MISSING = object()
+
+def _now():
+    return int(time.time())
+
+class MemoryTables:
+    """Estado do banco; as chaves seguem as PRIMARY KEY do schema"""
+    
+    def __init__(self):
+        self.users = {}                         # (user_id, guild_id) -> linha
+        self.users_by_guild = defaultdict(set)  # guild_id -> {user_id}
+        self.transactions = {}                  # id -> linha
+        self.ledger_index = defaultdict(list)   # (user_id, guild_id) -> [id]
+        self.ledger_order = defaultdict(list)   # (user_id, guild_id) -> [(timestamp, id)] em ordem
+        self.ledger_archive = defaultdict(dict) # partição -> {id: linha}
+        self.ledger_daily = {}                  # (guild_id, user_id, day, type) -> (total, count)
+        self.guild_config = {}                  # guild_id -> dict
+        self.shops = {}
+        self.items = {}
+        self.inventory = defaultdict(dict)      # (user_id, guild_id) -> {item_id: quantidade}
+        self.investments = {}
+        self.businesses = {}
+        self.businesses_by_owner = defaultdict(list)  # (owner_id, guild_id) -> [business_id]
+        self.salaries = {}                      # (guild_id, role_id) -> linha
+        self.auctions = {}
+        self.missions = {}                      # (user_id, guild_id, expires_at) -> linha
+        self.missions_by_id = {}                # id -> chave em missions
+        self.economy_daily = {}                 # (guild_id, day) -> linha
+        self.economy_active = set()             # (day, guild_id, user_id)
+        self.balance_checkpoints = {}           # (guild_id, user_id) -> (ledger_id, balance, checked_at)
+        self.backups = {}
+        self.sequences = defaultdict(int)
+
+class MemorySession(Session):
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+        self._undo = []
+        self.users = MemoryUsers(self)
+        self.ledger = MemoryLedger(self)
+        self.guilds = MemoryGuildConfig(self)
+        self.shops = MemoryShops(self)
+        self.investments = MemoryInvestments(self)
+        self.businesses = MemoryBusinesses(self)
+        self.salaries = MemorySalaries(self)
+        self.auctions = MemoryAuctions(self)
+        self.missions = MemoryMissions(self)
+        self.economy = MemoryEconomy(self)
+        self.integrity = MemoryIntegrity(self)
+        self.backups = MemoryBackups(self)
+    
+    # Toda mutação passa por aqui para poder ser desfeita
+    
+    def set(self, table, key, value):
+        self._undo.append((table, key, table.get(key, _MISSING)))
+        table[key] = value
+    
+    def append(self, items, value):
+        self._undo.append((items, None, _MISSING))
+        items.append(value)
+    
+    def delete(self, table, key):
+        self._undo.append((table, key, table[key]))
+        del table[key]
+    
+    def add(self, members, value):
+        if value not in members:
+            self._undo.append((members, value, _MISSING))
+            members.add(value)
+    
+    def discard(self, members, value):
+        if value in members:
+            self._undo.append((members, value, value))
+            members.remove(value)
+    
+    def next_id(self, table):
+        self.tables.sequences[table] += 1
+        return self.tables.sequences[table]
+    
+    def rollback(self):
+        while self._undo:
+            target, key, old = self._undo.pop()
+            if isinstance(target, list):
+                target.pop()
+            elif isinstance(target, set):
+                if old is _MISSING:
+                    target.discard(key)
+                else:
+                    target.add(key)
+            elif old is _MISSING:
+                del target[key]
+            else:
+                target[key] = old
+
+class MemoryRepository:
+    def __init__(self, tx):
+        self.tx = tx
+        self.t = tx.tables
+
+class MemoryUsers(MemoryRepository, UserRepository):
+    def get(self, user_id, guild_id):
+        return self.t.users.get((user_id, guild_id))
+    
+    def create(self, user_id, guild_id):
+        user = self.get(user_id, guild_id)
+        if user is None:
+            config = self.t.guild_config.get(guild_id, DEFAULTS)
+            user = UserRow(user_id, guild_id, config['start_balance'], 0, 0, 0, None, None, _now(),
+                           config['start_balance'])
+            self.tx.set(self.t.users, (user_id, guild_id), user)
+            self.tx.add(self.t.users_by_guild[guild_id], user_id)
+        return user
+    
+    def get_many(self, user_ids, guild_id):
+        return [user for user in (self.get(user_id, guild_id) for user_id in user_ids) if user is not None]
+    
+    def create_many(self, user_ids, guild_id):
+        for user_id in user_ids:
+            self.create(user_id, guild_id)
+    
+    def credit(self, user_id, guild_id, amount):
+        user = self.create(user_id, guild_id)
+        user = user.replace(balance=user.balance + amount, total_earned=user.total_earned + amount)
+        self.tx.set(self.t.users, (user_id, guild_id), user)
+        return user
+    
+    def debit(self, user_id, guild_id, amount):
+        user = self.get(user_id, guild_id)
+        if user is None or user.balance < amount:
+            return None
+        user = user.replace(balance=user.balance - amount, total_spent=user.total_spent + amount)
+        self.tx.set(self.t.users, (user_id, guild_id), user)
+        return user
+    
+    def credit_many(self, user_ids, guild_id, amount):
+        for user_id in user_ids:
+            self.credit(user_id, guild_id, amount)
+    
+    def debit_many(self, user_ids, guild_id, amount):
+        return [user_id for user_id in user_ids if self.debit(user_id, guild_id, amount) is not None]
+    
+    def ranking(self, guild_id, limit=-1):
+        rows = sorted((RankingRow(user_id, self.t.users[(user_id, guild_id)].balance)
+                       for user_id in self.t.users_by_guild.get(guild_id, ())),
+                      key=lambda row: row.balance, reverse=True)
+        return rows if limit < 0 else rows[:limit]
+    
+    def balances(self):
+        return [BalanceRow(user.guild_id, user.user_id, user.balance) for user in self.t.users.values()]
+    
+    def guild_balances(self, guild_id):
+        return sorted(self.t.users[(user_id, guild_id)].balance
+                      for user_id in self.t.users_by_guild.get(guild_id, ()))
+    
+    def cooldowns(self, since):
+        return [user for user in self.t.users.values()
+                if (user.last_work or 0) >= since or (user.last_daily or 0) >= since]
+    
+    def set_last_used(self, column, rows):
+        if column not in ('last_work', 'last_daily'):
+            raise ValueError(f"Coluna de cooldown inválida: {column}")
+        for ts, user_id, guild_id in rows:
+            user = self.get(user_id, guild_id)
+            if user is not None:
+                self.tx.set(self.t.users, (user_id, guild_id), user.replace(**{column: ts}))
+
+class MemoryLedger(MemoryRepository, LedgerRepository):
+    def append(self, user_id, guild_id, type, amount, description):
+        tx_id = self.tx.next_id('transactions')
+        row = TransactionRow(tx_id, user_id, guild_id, type, amount, description, _now())
+        self.tx.set(self.t.transactions, tx_id, row)
+        self.tx.append(self.t.ledger_index[(user_id, guild_id)], tx_id)
+        
+        order = self.t.ledger_order[(user_id, guild_id)]
+        entry = (row.timestamp, tx_id)
+        if not order or entry > order[-1]:
+            self.tx.append(order, entry)
+        else:
+            # Relógio voltou: a lista é trocada inteira para o undo continuar valendo
+            self.tx.set(self.t.ledger_order, (user_id, guild_id), sorted([*order, entry]))
+    
+    def append_many(self, user_ids, guild_id, type, amount, description):
+        for user_id in user_ids:
+            self.append(user_id, guild_id, type, amount, description)
+    
+    def history(self, user_id, guild_id, limit=10):
+        ids = self.t.ledger_index.get((user_id, guild_id), [])
+        recent = ids if limit < 0 else ids[-limit:] if limit else []
+        return [self.t.transactions[tx_id] for tx_id in reversed(recent)]
+    
+    def archive(self, before, limit):
+        rows = sorted((row for row in self.t.transactions.values() if row.timestamp < before),
+                      key=lambda row: (row.timestamp, row.id))[:limit]
+        moved = set()
+        for row in rows:
+            self.tx.set(self.t.ledger_archive[ledger_partition(row.timestamp)], row.id, row)
+            key = (row.guild_id, row.user_id, row.timestamp - row.timestamp % 86400, row.type)
+            total, count = self.t.ledger_daily.get(key, (0, 0))
+            self.tx.set(self.t.ledger_daily, key, (total + row.amount, count + 1))
+            self.tx.delete(self.t.transactions, row.id)
+            moved.add(row.id)
+        
+        for key in {(row.user_id, row.guild_id) for row in rows}:
+            self.tx.set(self.t.ledger_index, key, [tx_id for tx_id in self.t.ledger_index[key] if tx_id not in moved])
+            self.tx.set(self.t.ledger_order, key, [entry for entry in self.t.ledger_order[key] if entry[1] not in moved])
+        return len(rows)
+    
+    def deltas(self, user_id, guild_id, after, limit):
+        order = self.t.ledger_order.get((user_id, guild_id), [])
+        start = bisect.bisect_right(order, tuple(after))
+        rows = [self.t.transactions[tx_id] for _, tx_id in order[start:start + limit]]
+        return [(row.timestamp, -row.amount if row.type == 'expense' else row.amount, row.id) for row in rows]
+    
+    def daily_deltas(self, user_id, guild_id):
+        days = {}
+        for (g, u, day, type), (total, _) in self.t.ledger_daily.items():
+            if (g, u) == (guild_id, user_id):
+                days[day] = days.get(day, 0) + (-total if type == 'expense' else total)
+        return [(day, delta, 0) for day, delta in sorted(days.items())]
+    
+    def head(self):
+        return self.t.sequences['transactions']
+    
+    def delta_since(self, user_id, guild_id, ledger_id, since):
+        ids = self.t.ledger_index.get((user_id, guild_id), [])
+        # Ids crescem na ordem de inserção: só o fim da lista interessa
+        start = bisect.bisect_right(ids, ledger_id)
+        rows = [self.t.transactions[tx_id] for tx_id in ids[start:]]
+        return sum(-row.amount if row.type == 'expense' else row.amount for row in rows if row.timestamp >= since)
+    
+    def totals(self, user_id, guild_id):
+        entries = [(key[3], total, count) for key, (total, count) in self.t.ledger_daily.items()
+                   if key[:2] == (guild_id, user_id)]
+        entries += [(row.type, row.amount, 1) for row in self.history(user_id, guild_id, -1)]
+        sums = {}
+        for type, total, count in entries:
+            row = sums.setdefault(type, [0, 0])
+            row[0] += total
+            row[1] += count
+        return [LedgerTotalRow(type, total, count) for type, (total, count) in sums.items()]
+
+class MemoryGuildConfig(MemoryRepository, GuildConfigRepository):
+    def update(self, guild_id, fields):
+        row = {'guild_id': guild_id, **self.t.guild_config.get(guild_id, DEFAULTS), **fields}
+        self.tx.set(self.t.guild_config, guild_id, row)
+        return row
+    
+    def all(self):
+        return list(self.t.guild_config.values())
+
+class MemoryShops(MemoryRepository, ShopRepository):
+    def create_shop(self, guild_id, owner_id, name, description, is_official):
+        shop_id = self.tx.next_id('shops')
+        self.tx.set(self.t.shops, shop_id,
+                    ShopRow(shop_id, guild_id, owner_id, name, description, _now(), 1 if is_official else 0))
+        return shop_id
+    
+    def list_shops(self, guild_id):
+        return [shop for shop in self.t.shops.values() if shop.guild_id == guild_id]
+    
+    def get_shop(self, shop_id):
+        return self.t.shops.get(shop_id)
+    
+    def create_item(self, shop_id, name, description, price, stock, effect_type, effect_data):
+        item_id = self.tx.next_id('items')
+        self.tx.set(self.t.items, item_id,
+                    ItemRow(item_id, shop_id, name, description, price, stock, effect_type, effect_data, _now()))
+        return item_id
+    
+    def list_items(self, shop_id):
+        return [item for item in self.t.items.values() if item.shop_id == shop_id]
+    
+    def get_item(self, item_id):
+        return self.t.items.get(item_id)
+    
+    def set_stock(self, shop_id, item_id, stock):
+        item = self.t.items.get(item_id)
+        if item is None or item.shop_id != shop_id:
+            return False
+        self.tx.set(self.t.items, item_id, item.replace(stock=stock))
+        return True
+    
+    def reserve(self, item_id):
+        item = self.t.items.get(item_id)
+        if item is None or item.stock == 0:
+            return None
+        if item.stock > 0:
+            item = item.replace(stock=item.stock - 1)
+            self.tx.set(self.t.items, item_id, item)
+        return item
+    
+    def add_to_inventory(self, user_id, guild_id, item_id):
+        owned = self.t.inventory[(user_id, guild_id)]
+        self.tx.set(owned, item_id, owned.get(item_id, 0) + 1)
+    
+    def inventory(self, user_id, guild_id):
+        owned = self.t.inventory.get((user_id, guild_id), {})
+        return [InventoryRow(*self.t.items[item_id], quantity) for item_id, quantity in owned.items()]
+
+class MemoryInvestments(MemoryRepository, InvestmentRepository):
+    def create(self, user_id, guild_id, amount, risk_level, start_date, end_date, return_rate):
+        investment_id = self.tx.next_id('investments')
+        self.tx.set(self.t.investments, investment_id,
+                    InvestmentRow(investment_id, user_id, guild_id, amount, risk_level, start_date, end_date,
+                                  return_rate, 'active'))
+        return investment_id
+    
+    def due(self, now):
+        return [inv for inv in self.t.investments.values() if inv.status == 'active' and inv.end_date <= now]
+    
+    def pending(self):
+        return [inv for inv in self.t.investments.values() if inv.status == 'active']
+    
+    def complete(self, investment_id):
+        inv = self.t.investments[investment_id]
+        self.tx.set(self.t.investments, investment_id, inv.replace(status='completed'))
+    
+    def active(self, user_id, guild_id):
+        return [inv for inv in self.t.investments.values()
+                if inv.user_id == user_id and inv.guild_id == guild_id and inv.status == 'active']
+
+class MemoryBusinesses(MemoryRepository, BusinessRepository):
+    def create(self, owner_id, guild_id, name, type, investment, daily_income, created_at):
+        business_id = self.tx.next_id('businesses')
+        self.tx.set(self.t.businesses, business_id,
+                    BusinessRow(business_id, owner_id, guild_id, name, type, investment, daily_income,
+                                created_at, created_at))
+        self.tx.append(self.t.businesses_by_owner[(owner_id, guild_id)], business_id)
+        return business_id
+    
+    def owned(self, owner_ids, guild_id):
+        return [self.t.businesses[business_id] for owner_id in owner_ids
+                for business_id in self.t.businesses_by_owner.get((owner_id, guild_id), ())]
+    
+    def settle(self, updates):
+        for business_id, last_settled in updates:
+            business = self.t.businesses[business_id]
+            self.tx.set(self.t.businesses, business_id, business.replace(last_settled=last_settled))
+    
+    def owners(self):
+        return [(guild_id, owner_id) for (owner_id, guild_id), ids in self.t.businesses_by_owner.items() if ids]
+
+class MemorySalaries(MemoryRepository, SalaryRepository):
+    def set(self, guild_id, role_id, amount, interval_hours, last_paid):
+        self.tx.set(self.t.salaries, (guild_id, role_id), SalaryRow(guild_id, role_id, amount, interval_hours, last_paid))
+    
+    def all(self):
+        return list(self.t.salaries.values())
+    
+    def mark_paid(self, guild_id, role_id, paid_at):
+        salary = self.t.salaries.get((guild_id, role_id))
+        if salary is not None:
+            self.tx.set(self.t.salaries, (guild_id, role_id), salary.replace(last_paid=paid_at))
+
+class MemoryAuctions(MemoryRepository, AuctionRepository):
+    def create(self, guild_id, seller_id, item_id, item_name, start_price, ends_at):
+        auction_id = self.tx.next_id('auctions')
+        self.tx.set(self.t.auctions, auction_id,
+                    AuctionRow(auction_id, guild_id, seller_id, item_id, start_price, start_price, None, ends_at,
+                               'active', item_name, None, None))
+        return auction_id
+    
+    def get(self, auction_id):
+        return self.t.auctions.get(auction_id)
+    
+    def set_bid(self, auction_id, amount, bidder_id):
+        auction = self.t.auctions[auction_id]
+        self.tx.set(self.t.auctions, auction_id, auction.replace(current_bid=amount, highest_bidder=bidder_id))
+    
+    def set_message(self, auction_id, channel_id, message_id):
+        auction = self.t.auctions[auction_id]
+        self.tx.set(self.t.auctions, auction_id, auction.replace(channel_id=channel_id, message_id=message_id))
+    
+    def due(self, now):
+        return [auction for auction in self.t.auctions.values() if auction.status == 'active' and auction.ends_at <= now]
+    
+    def finish(self, auction_id):
+        auction = self.t.auctions[auction_id]
+        self.tx.set(self.t.auctions, auction_id, auction.replace(status='ended'))
+    
+    def pending(self):
+        return [auction for auction in self.t.auctions.values() if auction.status == 'active']
+
+class MemoryMissions(MemoryRepository, MissionRepository):
+    def create(self, user_id, guild_id, mission_type, target, reward, expires_at):
+        key = (user_id, guild_id, expires_at)
+        if key in self.t.missions:
+            return False
+        mission_id = self.tx.next_id('daily_missions')
+        self.tx.set(self.t.missions, key,
+                    MissionRow(mission_id, user_id, guild_id, mission_type, target, 0, reward, expires_at, 0, 0))
+        self.tx.set(self.t.missions_by_id, mission_id, key)
+        return True
+    
+    def get(self, user_id, guild_id, expires_at):
+        return self.t.missions.get((user_id, guild_id, expires_at))
+    
+    def active(self, expires_at):
+        return [mission for mission in self.t.missions.values()
+                if mission.expires_at == expires_at and not mission.completed]
+    
+    def add_progress(self, updates):
+        for mission_id, delta in updates:
+            key = self.t.missions_by_id.get(mission_id)
+            mission = self.t.missions.get(key)
+            if mission is not None and not mission.completed:
+                self.tx.set(self.t.missions, key,
+                            mission.replace(progress=min(mission.target, mission.progress + delta)))
+    
+    def complete(self, mission_id):
+        key = self.t.missions_by_id.get(mission_id)
+        mission = self.t.missions.get(key)
+        if mission is None or mission.completed:
+            return None
+        mission = mission.replace(progress=mission.target, completed=1, claimed=1)
+        self.tx.set(self.t.missions, key, mission)
+        return mission
+
+class MemoryEconomy(MemoryRepository, EconomyRepository):
+    def record(self, guild_id, day, user_ids, type, amount):
+        new_users = 0
+        for user_id in user_ids:
+            if (day, guild_id, user_id) not in self.t.economy_active:
+                self.tx.add(self.t.economy_active, (day, guild_id, user_id))
+                new_users += 1
+        
+        row = self.t.economy_daily.get((guild_id, day))
+        if row is None:
+            previous = [r for r in self.series(guild_id, 0) if r.day < day]
+            supply = previous[-1].money_supply if previous else None
+            row = EconomyDayRow(guild_id, day, supply, 0, 0, 0, 0)
+        total = amount * len(user_ids)
+        row = row.replace(
+            total_earned=row.total_earned + (total if type == 'income' else 0),
+            total_spent=row.total_spent + (total if type == 'expense' else 0),
+            tx_count=row.tx_count + len(user_ids),
+            active_users=row.active_users + new_users,
+        )
+        self.tx.set(self.t.economy_daily, (guild_id, day), row)
+    
+    def set_supply(self, rows):
+        for supply, guild_id, day in rows:
+            row = self.t.economy_daily.get((guild_id, day)) or EconomyDayRow(guild_id, day, None, 0, 0, 0, 0)
+            self.tx.set(self.t.economy_daily, (guild_id, day), row.replace(money_supply=supply))
+    
+    def prune_active(self, before_day):
+        for key in [key for key in self.t.economy_active if key[0] < before_day]:
+            self.tx.discard(self.t.economy_active, key)
+    
+    def series(self, guild_id, since_day):
+        return sorted((row for (g, day), row in self.t.economy_daily.items() if g == guild_id and day >= since_day),
+                      key=lambda row: row.day)
+
+class MemoryIntegrity(MemoryRepository, IntegrityRepository):
+    def accounts(self, guild_id, after_user, limit):
+        user_ids = sorted(user_id for user_id in self.t.users_by_guild.get(guild_id, ()) if user_id > after_user)[:limit]
+        rows = []
+        for user_id in user_ids:
+            user = self.t.users[(user_id, guild_id)]
+            checkpoint = self.t.balance_checkpoints.get((guild_id, user_id), (None, None, None))
+            rows.append(AccountCheckRow(user_id, user.balance, user.opening_balance, *checkpoint))
+        return rows
+    
+    def save(self, rows):
+        for guild_id, user_id, ledger_id, balance, checked_at in rows:
+            self.tx.set(self.t.balance_checkpoints, (guild_id, user_id), (ledger_id, balance, checked_at))
+
+class MemoryBackups(MemoryRepository, BackupRepository):
+    def create(self, guild_id, name, data):
+        backup_id = self.tx.next_id('backups')
+        self.tx.set(self.t.backups, backup_id, BackupRow(backup_id, guild_id, name, data, _now()))
+        return backup_id
+    
+    def get(self, backup_id):
+        return self.t.backups.get(backup_id)
+
+class MemoryStorage(Storage):
+    """Operações em série sob um lock; ganchos rodam na ordem de confirmação"""
+    
+    def __init__(self):
+        self.tables = MemoryTables()
+        self.operations = 0
+        self._lock = threading.RLock()
+    
+    def run(self, op, *args):
+        with self._lock:
+            tx = MemorySession(self.tables)
+            try:
+                result = op(tx, *args)
+            except Rollback as r:
+                tx.rollback()
+                return r.result
+            except BaseException:
+                tx.rollback()
+                raise
+            
+            self.operations += 1
+            for fn, hook_args in tx.hooks:
+                try:
+                    fn(*hook_args)
+                except Exception:
+                    traceback.print_exc()
+            return result
+    
+    async def arun(self, op, *args):
+        return self.run(op, *args)
+    
+    def read(self, query, *args):
+        with self._lock:
+            return query(MemorySession(self.tables), *args)
+    
+    async def aread(self, query, *args):
+        return self.read(query, *args)
@@ -0,0 +1,733 @@
+"""Engine SQLite: WAL, um writer com group commit e pools só de leitura"""
+import sqlite3
+import queue
+import asyncio
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import os
+
+from database.migrations import ledger_partition, ledger_partition_schema, migrate
+from database.records import (
+    UserRow, TransactionRow, LedgerTotalRow, EconomyDayRow, AccountCheckRow, RankingRow, BalanceRow, ShopRow, ItemRow, InventoryRow, AuctionRow,
+    InvestmentRow, BusinessRow, SalaryRow, MissionRow, BackupRow,
+)
+from database.settings import settings_row
+from database.storage.base import (
+    Rollback, Storage, Session, UserRepository, LedgerRepository, GuildConfigRepository,
+    ShopRepository, InvestmentRepository, BusinessRepository, SalaryRepository, AuctionRepository,
+    MissionRepository, EconomyRepository, IntegrityRepository, BackupRepository,
+)
+
+POOL_SIZE = int(os.getenv("CENTRALDIV_POOL_SIZE", "4"))
+READER_THREADS = int(os.getenv("CENTRALDIV_READER_THREADS", "4"))
+WRITE_BATCH = int(os.getenv("CENTRALDIV_WRITE_BATCH", "512"))
+# Parâmetros por "IN (?, ?, ...)" nas leituras em massa
+IN_CHUNK = 500
+
+# Perfil aplicado uma única vez em cada conexão do pool
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # ~16 MB de cache de páginas
+    "PRAGMA mmap_size = 134217728",    # 128 MB mapeados em memória
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+class ConnectionPool:
+    """Pool pequeno de conexões SQLite de longa duração"""
+    
+    def __init__(self, path, size=POOL_SIZE, readonly=False):
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        if self.readonly:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if self.readonly:
+            conn.execute("PRAGMA query_only = 1")
+        return conn
+    
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        
+        # Pool cheio: espera alguém devolver uma conexão
+        return self._idle.get()
+    
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão; faz commit ao sair ou rollback em erro"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+    
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._created -= 1
+
+class Writer:
+    """Dono da única conexão de escrita.
+    
+    Mutações entram numa fila e uma thread dedicada aplica várias delas na
+    mesma transação (group commit). Cada operação roda num SAVEPOINT
+    próprio: se falhar, só ela é desfeita e o resto do lote segue.
+    """
+    
+    def __init__(self, path, session, batch_size=WRITE_BATCH):
+        self.path = path
+        self.session = session
+        self.batch_size = batch_size
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.SimpleQueue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="centraldiv-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+    
+    def submit(self, op, *args):
+        """Enfileira `op(tx, *args)`; devolve um Future com o resultado"""
+        future = Future()
+        self._queue.put((future, op, args))
+        return future
+    
+    def run(self, op, *args):
+        return self.submit(op, *args).result()
+    
+    async def arun(self, op, *args):
+        return await asyncio.wrap_future(self.submit(op, *args))
+    
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        self._ready.set()
+        
+        running = True
+        while running:
+            job = self._queue.get()
+            if job is None:
+                break
+            
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+            
+            self._apply(conn, batch)
+        
+        conn.close()
+    
+    def _apply(self, conn, batch):
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, op, args in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                
+                tx = self.session(conn)
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = op(tx, *args)
+                except Rollback as r:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    done.append((future, r.result, None, ()))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    done.append((future, None, e, ()))
+                else:
+                    conn.execute("RELEASE op")
+                    done.append((future, result, None, tx.hooks))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, op, args in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.operations += len(done)
+        
+        for future, result, error, hooks in done:
+            for fn, args in hooks:
+                try:
+                    fn(*args)
+                except Exception:
+                    traceback.print_exc()
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+# ===== REPOSITÓRIOS =====
+
+class SQLiteRepository:
+    def __init__(self, conn):
+        self.conn = conn
+
+class SQLiteUsers(SQLiteRepository, UserRepository):
+    def get(self, user_id, guild_id):
+        return UserRow.from_row(self.conn.execute('''
+            SELECT * FROM users WHERE user_id = ? AND guild_id = ?
+        ''', (user_id, guild_id)).fetchone())
+    
+    def create(self, user_id, guild_id):
+        self.conn.execute('''
+            INSERT INTO users (user_id, guild_id, balance, opening_balance)
+            VALUES (?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000), COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000))
+            ON CONFLICT(user_id, guild_id) DO NOTHING
+        ''', (user_id, guild_id, guild_id, guild_id))
+        return self.get(user_id, guild_id)
+    
+    def get_many(self, user_ids, guild_id):
+        user_ids = list(user_ids)
+        rows = []
+        for start in range(0, len(user_ids), IN_CHUNK):
+            chunk = user_ids[start:start + IN_CHUNK]
+            rows += UserRow.from_rows(self.conn.execute(f'''
+                SELECT * FROM users WHERE guild_id = ? AND user_id IN ({', '.join('?' * len(chunk))})
+            ''', (guild_id, *chunk)))
+        return rows
+    
+    def create_many(self, user_ids, guild_id):
+        self.conn.executemany('''
+            INSERT INTO users (user_id, guild_id, balance, opening_balance)
+            VALUES (?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000), COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000))
+            ON CONFLICT(user_id, guild_id) DO NOTHING
+        ''', [(user_id, guild_id, guild_id, guild_id) for user_id in user_ids])
+    
+    def credit(self, user_id, guild_id, amount):
+        return UserRow.from_row(self.conn.execute('''
+            INSERT INTO users (user_id, guild_id, balance, total_earned, opening_balance)
+            VALUES (?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000) + ?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000))
+            ON CONFLICT(user_id, guild_id) DO UPDATE
+            SET balance = balance + excluded.total_earned, total_earned = total_earned + excluded.total_earned
+            RETURNING *
+        ''', (user_id, guild_id, guild_id, amount, amount, guild_id)).fetchone())
+    
+    def debit(self, user_id, guild_id, amount):
+        return UserRow.from_row(self.conn.execute('''
+            UPDATE users SET balance = balance - ?, total_spent = total_spent + ?
+            WHERE user_id = ? AND guild_id = ? AND balance >= ?
+            RETURNING *
+        ''', (amount, amount, user_id, guild_id, amount)).fetchone())
+    
+    def credit_many(self, user_ids, guild_id, amount):
+        self.conn.executemany('''
+            INSERT INTO users (user_id, guild_id, balance, total_earned, opening_balance)
+            VALUES (?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000) + ?, ?, COALESCE((SELECT start_balance FROM guild_config WHERE guild_id = ?), 1000))
+            ON CONFLICT(user_id, guild_id) DO UPDATE
+            SET balance = balance + excluded.total_earned, total_earned = total_earned + excluded.total_earned
+        ''', [(user_id, guild_id, guild_id, amount, amount, guild_id) for user_id in user_ids])
+    
+    def debit_many(self, user_ids, guild_id, amount):
+        # O writer é único: o saldo lido aqui é o mesmo que o UPDATE vai ver
+        debited = [row.user_id for row in self.get_many(user_ids, guild_id) if row.balance >= amount]
+        self.conn.executemany('''
+            UPDATE users SET balance = balance - ?, total_spent = total_spent + ?
+            WHERE user_id = ? AND guild_id = ?
+        ''', [(amount, amount, user_id, guild_id) for user_id in debited])
+        return debited
+    
+    def ranking(self, guild_id, limit=-1):
+        return RankingRow.from_rows(self.conn.execute('''
+            SELECT user_id, balance FROM users WHERE guild_id = ?
+            ORDER BY balance DESC
+            LIMIT ?
+        ''', (guild_id, limit)))
+    
+    def balances(self):
+        return BalanceRow.from_rows(self.conn.execute('SELECT guild_id, user_id, balance FROM users'))
+    
+    def guild_balances(self, guild_id):
+        # Só o índice (guild_id, balance), já na ordem
+        return [row[0] for row in self.conn.execute(
+            'SELECT balance FROM users WHERE guild_id = ? ORDER BY balance', (guild_id,))]
+    
+    def cooldowns(self, since):
+        return UserRow.from_rows(self.conn.execute('''
+            SELECT * FROM users WHERE last_work >= ? OR last_daily >= ?
+        ''', (since, since)))
+    
+    def set_last_used(self, column, rows):
+        if column not in ('last_work', 'last_daily'):
+            raise ValueError(f"Coluna de cooldown inválida: {column}")
+        self.conn.executemany(f'UPDATE users SET {column} = ? WHERE user_id = ? AND guild_id = ?', rows)
+
+class SQLiteLedger(SQLiteRepository, LedgerRepository):
+    def append(self, user_id, guild_id, type, amount, description):
+        self.conn.execute('''
+            INSERT INTO transactions (user_id, guild_id, type, amount, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (user_id, guild_id, type, amount, description))
+    
+    def append_many(self, user_ids, guild_id, type, amount, description):
+        self.conn.executemany('''
+            INSERT INTO transactions (user_id, guild_id, type, amount, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(user_id, guild_id, type, amount, description) for user_id in user_ids])
+    
+    def history(self, user_id, guild_id, limit=10):
+        return TransactionRow.from_rows(self.conn.execute('''
+            SELECT * FROM transactions
+            WHERE user_id = ? AND guild_id = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        ''', (user_id, guild_id, limit)))
+    
+    def archive(self, before, limit):
+        rows = self.conn.execute('''
+            SELECT * FROM transactions WHERE timestamp < ?
+            ORDER BY timestamp, id
+            LIMIT ?
+        ''', (before, limit)).fetchall()
+        
+        partitions = {}
+        daily = {}
+        for row in rows:
+            _, user_id, guild_id, type, amount, _, ts = row
+            partitions.setdefault(ledger_partition(ts), []).append(row)
+            key = (guild_id, user_id, ts - ts % 86400, type)
+            total, count = daily.get(key, (0, 0))
+            daily[key] = (total + amount, count + 1)
+        
+        for name, part in partitions.items():
+            self.conn.execute(ledger_partition_schema(name))
+            self.conn.executemany(f'INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?, ?)', part)
+        self.conn.executemany('''
+            INSERT INTO ledger_daily (guild_id, user_id, day, type, total, count)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id, day, type) DO UPDATE
+            SET total = total + excluded.total, count = count + excluded.count
+        ''', [(*key, total, count) for key, (total, count) in daily.items()])
+        self.conn.executemany('DELETE FROM transactions WHERE id = ?', [(row[0],) for row in rows])
+        return len(rows)
+    
+    def deltas(self, user_id, guild_id, after, limit):
+        return self.conn.execute('''
+            SELECT timestamp, CASE type WHEN 'expense' THEN -amount ELSE amount END, id
+            FROM transactions
+            WHERE user_id = ? AND guild_id = ? AND (timestamp, id) > (?, ?)
+            ORDER BY timestamp, id
+            LIMIT ?
+        ''', (user_id, guild_id, *after, limit)).fetchall()
+    
+    def daily_deltas(self, user_id, guild_id):
+        return self.conn.execute('''
+            SELECT day, SUM(CASE type WHEN 'expense' THEN -total ELSE total END), 0
+            FROM ledger_daily
+            WHERE guild_id = ? AND user_id = ?
+            GROUP BY day
+            ORDER BY day
+        ''', (guild_id, user_id)).fetchall()
+    
+    def head(self):
+        return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM transactions').fetchone()[0]
+    
+    def delta_since(self, user_id, guild_id, ledger_id, since):
+        # O limite de tempo deixa a busca no índice (user_id, guild_id, timestamp)
+        return self.conn.execute('''
+            SELECT COALESCE(SUM(CASE type WHEN 'expense' THEN -amount ELSE amount END), 0)
+            FROM transactions
+            WHERE user_id = ? AND guild_id = ? AND timestamp >= ? AND id > ?
+        ''', (user_id, guild_id, since, ledger_id)).fetchone()[0]
+    
+    def totals(self, user_id, guild_id):
+        # Dias arquivados + o que ainda está na tabela quente
+        sums = {}
+        for type, total, count in [*self.conn.execute('''
+            SELECT type, SUM(total), SUM(count) FROM ledger_daily
+            WHERE guild_id = ? AND user_id = ?
+            GROUP BY type
+        ''', (guild_id, user_id)), *self.conn.execute('''
+            SELECT type, SUM(amount), COUNT(*) FROM transactions
+            WHERE user_id = ? AND guild_id = ?
+            GROUP BY type
+        ''', (user_id, guild_id))]:
+            row = sums.setdefault(type, [0, 0])
+            row[0] += total
+            row[1] += count
+        return [LedgerTotalRow(type, total, count) for type, (total, count) in sums.items()]
+
+class SQLiteGuildConfig(SQLiteRepository, GuildConfigRepository):
+    def update(self, guild_id, fields):
+        columns = list(fields)
+        cursor = self.conn.execute(f'''
+            INSERT INTO guild_config (guild_id, {', '.join(columns)})
+            VALUES (?{', ?' * len(columns)})
+            ON CONFLICT(guild_id) DO UPDATE
+            SET {', '.join(f'{column} = excluded.{column}' for column in columns)}
+            RETURNING *
+        ''', (guild_id, *fields.values()))
+        return settings_row(cursor, cursor.fetchone())
+    
+    def all(self):
+        cursor = self.conn.execute('SELECT * FROM guild_config')
+        return [settings_row(cursor, row) for row in cursor.fetchall()]
+
+class SQLiteShops(SQLiteRepository, ShopRepository):
+    def create_shop(self, guild_id, owner_id, name, description, is_official):
+        return self.conn.execute('''
+            INSERT INTO shops (guild_id, owner_id, name, description, is_official)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (guild_id, owner_id, name, description, 1 if is_official else 0)).lastrowid
+    
+    def list_shops(self, guild_id):
+        return ShopRow.from_rows(self.conn.execute('SELECT * FROM shops WHERE guild_id = ?', (guild_id,)))
+    
+    def get_shop(self, shop_id):
+        return ShopRow.from_row(self.conn.execute('SELECT * FROM shops WHERE shop_id = ?', (shop_id,)).fetchone())
+    
+    def create_item(self, shop_id, name, description, price, stock, effect_type, effect_data):
+        return self.conn.execute('''
+            INSERT INTO items (shop_id, name, description, price, stock, effect_type, effect_data)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (shop_id, name, description, price, stock, effect_type, effect_data)).lastrowid
+    
+    def list_items(self, shop_id):
+        return ItemRow.from_rows(self.conn.execute('SELECT * FROM items WHERE shop_id = ?', (shop_id,)))
+    
+    def get_item(self, item_id):
+        return ItemRow.from_row(self.conn.execute('SELECT * FROM items WHERE item_id = ?', (item_id,)).fetchone())
+    
+    def set_stock(self, shop_id, item_id, stock):
+        cursor = self.conn.execute('UPDATE items SET stock = ? WHERE item_id = ? AND shop_id = ?',
+                                   (stock, item_id, shop_id))
+        return cursor.rowcount > 0
+    
+    def reserve(self, item_id):
+        return ItemRow.from_row(self.conn.execute('''
+            UPDATE items SET stock = stock - (stock > 0)
+            WHERE item_id = ? AND stock != 0
+            RETURNING *
+        ''', (item_id,)).fetchone())
+    
+    def add_to_inventory(self, user_id, guild_id, item_id):
+        self.conn.execute('''
+            INSERT INTO inventory (user_id, guild_id, item_id, quantity)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(user_id, guild_id, item_id)
+            DO UPDATE SET quantity = quantity + 1
+        ''', (user_id, guild_id, item_id))
+    
+    def inventory(self, user_id, guild_id):
+        return InventoryRow.from_rows(self.conn.execute('''
+            SELECT i.*, inv.quantity FROM inventory inv
+            JOIN items i ON inv.item_id = i.item_id
+            WHERE inv.user_id = ? AND inv.guild_id = ?
+        ''', (user_id, guild_id)))
+
+class SQLiteInvestments(SQLiteRepository, InvestmentRepository):
+    def create(self, user_id, guild_id, amount, risk_level, start_date, end_date, return_rate):
+        return self.conn.execute('''
+            INSERT INTO investments (user_id, guild_id, amount, risk_level, start_date, end_date, return_rate)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (user_id, guild_id, amount, risk_level, start_date, end_date, return_rate)).lastrowid
+    
+    def due(self, now):
+        return InvestmentRow.from_rows(self.conn.execute('''
+            SELECT * FROM investments
+            WHERE status = 'active' AND end_date <= ?
+        ''', (now,)))
+    
+    def pending(self):
+        return InvestmentRow.from_rows(self.conn.execute("SELECT * FROM investments WHERE status = 'active'"))
+    
+    def complete(self, investment_id):
+        self.conn.execute('UPDATE investments SET status = ? WHERE investment_id = ?',
+                          ('completed', investment_id))
+    
+    def active(self, user_id, guild_id):
+        return InvestmentRow.from_rows(self.conn.execute('''
+            SELECT * FROM investments
+            WHERE user_id = ? AND guild_id = ? AND status = 'active'
+        ''', (user_id, guild_id)))
+
+class SQLiteBusinesses(SQLiteRepository, BusinessRepository):
+    def create(self, owner_id, guild_id, name, type, investment, daily_income, created_at):
+        return self.conn.execute('''
+            INSERT INTO businesses (owner_id, guild_id, name, type, investment, daily_income, created_at, last_settled)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (owner_id, guild_id, name, type, investment, daily_income, created_at, created_at)).lastrowid
+    
+    def owned(self, owner_ids, guild_id):
+        owner_ids = list(owner_ids)
+        rows = []
+        for start in range(0, len(owner_ids), IN_CHUNK):
+            chunk = owner_ids[start:start + IN_CHUNK]
+            rows += BusinessRow.from_rows(self.conn.execute(f'''
+                SELECT * FROM businesses WHERE guild_id = ? AND owner_id IN ({', '.join('?' * len(chunk))})
+            ''', (guild_id, *chunk)))
+        return rows
+    
+    def settle(self, updates):
+        self.conn.executemany('UPDATE businesses SET last_settled = ? WHERE business_id = ?',
+                              [(last_settled, business_id) for business_id, last_settled in updates])
+    
+    def owners(self):
+        return self.conn.execute('SELECT DISTINCT guild_id, owner_id FROM businesses').fetchall()
+
+class SQLiteSalaries(SQLiteRepository, SalaryRepository):
+    def set(self, guild_id, role_id, amount, interval_hours, last_paid):
+        self.conn.execute('''
+            INSERT OR REPLACE INTO salaries (guild_id, role_id, amount, interval_hours, last_paid)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (guild_id, role_id, amount, interval_hours, last_paid))
+    
+    def all(self):
+        return SalaryRow.from_rows(self.conn.execute('SELECT * FROM salaries'))
+    
+    def mark_paid(self, guild_id, role_id, paid_at):
+        self.conn.execute('UPDATE salaries SET last_paid = ? WHERE guild_id = ? AND role_id = ?',
+                          (paid_at, guild_id, role_id))
+
+class SQLiteAuctions(SQLiteRepository, AuctionRepository):
+    def create(self, guild_id, seller_id, item_id, item_name, start_price, ends_at):
+        return self.conn.execute('''
+            INSERT INTO auctions (guild_id, seller_id, item_id, item_name, start_price, current_bid, ends_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (guild_id, seller_id, item_id, item_name, start_price, start_price, ends_at)).lastrowid
+    
+    def get(self, auction_id):
+        return AuctionRow.from_row(self.conn.execute('SELECT * FROM auctions WHERE auction_id = ?', (auction_id,)).fetchone())
+    
+    def set_bid(self, auction_id, amount, bidder_id):
+        self.conn.execute('''
+            UPDATE auctions SET current_bid = ?, highest_bidder = ?
+            WHERE auction_id = ?
+        ''', (amount, bidder_id, auction_id))
+    
+    def set_message(self, auction_id, channel_id, message_id):
+        self.conn.execute('UPDATE auctions SET channel_id = ?, message_id = ? WHERE auction_id = ?',
+                          (channel_id, message_id, auction_id))
+    
+    def due(self, now):
+        return AuctionRow.from_rows(self.conn.execute('''
+            SELECT * FROM auctions
+            WHERE status = 'active' AND ends_at <= ?
+        ''', (now,)))
+    
+    def finish(self, auction_id):
+        self.conn.execute("UPDATE auctions SET status = 'ended' WHERE auction_id = ?", (auction_id,))
+    
+    def pending(self):
+        return AuctionRow.from_rows(self.conn.execute("SELECT * FROM auctions WHERE status = 'active'"))
+
+class SQLiteMissions(SQLiteRepository, MissionRepository):
+    def create(self, user_id, guild_id, mission_type, target, reward, expires_at):
+        try:
+            self.conn.execute('''
+                INSERT INTO daily_missions (user_id, guild_id, mission_type, target, reward, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, guild_id, mission_type, target, reward, expires_at))
+        except sqlite3.IntegrityError:
+            return False  # Missão já existe para hoje
+        return True
+    
+    def get(self, user_id, guild_id, expires_at):
+        return MissionRow.from_row(self.conn.execute('''
+            SELECT * FROM daily_missions
+            WHERE user_id = ? AND guild_id = ? AND expires_at = ?
+        ''', (user_id, guild_id, expires_at)).fetchone())
+    
+    def active(self, expires_at):
+        return MissionRow.from_rows(self.conn.execute('''
+            SELECT * FROM daily_missions
+            WHERE expires_at = ? AND completed = 0
+        ''', (expires_at,)))
+    
+    def add_progress(self, updates):
+        self.conn.executemany('''
+            UPDATE daily_missions SET progress = MIN(target, progress + ?)
+            WHERE id = ? AND completed = 0
+        ''', [(delta, mission_id) for mission_id, delta in updates])
+    
+    def complete(self, mission_id):
+        return MissionRow.from_row(self.conn.execute('''
+            UPDATE daily_missions SET progress = target, completed = 1, claimed = 1
+            WHERE id = ? AND completed = 0
+            RETURNING *
+        ''', (mission_id,)).fetchone())
+
+class SQLiteEconomy(SQLiteRepository, EconomyRepository):
+    def record(self, guild_id, day, user_ids, type, amount):
+        changes = self.conn.total_changes
+        self.conn.executemany('INSERT OR IGNORE INTO economy_active VALUES (?, ?, ?)',
+                              [(day, guild_id, user_id) for user_id in user_ids])
+        new_users = self.conn.total_changes - changes
+        
+        total = amount * len(user_ids)
+        self.conn.execute('''
+            INSERT INTO economy_daily (guild_id, day, money_supply, total_earned, total_spent, tx_count, active_users)
+            VALUES (?, ?, (SELECT money_supply FROM economy_daily WHERE guild_id = ? AND day < ?
+                           ORDER BY day DESC LIMIT 1), ?, ?, ?, ?)
+            ON CONFLICT(guild_id, day) DO UPDATE
+            SET total_earned = total_earned + excluded.total_earned,
+                total_spent = total_spent + excluded.total_spent,
+                tx_count = tx_count + excluded.tx_count,
+                active_users = active_users + excluded.active_users
+        ''', (guild_id, day, guild_id, day, total if type == 'income' else 0, total if type == 'expense' else 0,
+              len(user_ids), new_users))
+    
+    def set_supply(self, rows):
+        self.conn.executemany('''
+            INSERT INTO economy_daily (money_supply, guild_id, day) VALUES (?, ?, ?)
+            ON CONFLICT(guild_id, day) DO UPDATE SET money_supply = excluded.money_supply
+        ''', rows)
+    
+    def prune_active(self, before_day):
+        self.conn.execute('DELETE FROM economy_active WHERE day < ?', (before_day,))
+    
+    def series(self, guild_id, since_day):
+        return EconomyDayRow.from_rows(self.conn.execute('''
+            SELECT * FROM economy_daily
+            WHERE guild_id = ? AND day >= ?
+            ORDER BY day
+        ''', (guild_id, since_day)))
+
+class SQLiteIntegrity(SQLiteRepository, IntegrityRepository):
+    def accounts(self, guild_id, after_user, limit):
+        return AccountCheckRow.from_rows(self.conn.execute('''
+            SELECT u.user_id, u.balance, u.opening_balance, c.ledger_id, c.balance, c.checked_at
+            FROM users u
+            LEFT JOIN balance_checkpoints c ON c.guild_id = u.guild_id AND c.user_id = u.user_id
+            WHERE u.guild_id = ? AND u.user_id > ?
+            ORDER BY u.user_id
+            LIMIT ?
+        ''', (guild_id, after_user, limit)))
+    
+    def save(self, rows):
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO balance_checkpoints (guild_id, user_id, ledger_id, balance, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+
+class SQLiteBackups(SQLiteRepository, BackupRepository):
+    def create(self, guild_id, name, data):
+        return self.conn.execute('''
+            INSERT INTO backups (guild_id, name, data)
+            VALUES (?, ?, ?)
+        ''', (guild_id, name, data)).lastrowid
+    
+    def get(self, backup_id):
+        return BackupRow.from_row(self.conn.execute('SELECT * FROM backups WHERE backup_id = ?', (backup_id,)).fetchone())
+
+class SQLiteSession(Session):
+    """Repositórios sobre uma conexão (a do writer ou uma do pool)"""
+    
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+        self.users = SQLiteUsers(conn)
+        self.ledger = SQLiteLedger(conn)
+        self.guilds = SQLiteGuildConfig(conn)
+        self.shops = SQLiteShops(conn)
+        self.investments = SQLiteInvestments(conn)
+        self.businesses = SQLiteBusinesses(conn)
+        self.salaries = SQLiteSalaries(conn)
+        self.auctions = SQLiteAuctions(conn)
+        self.missions = SQLiteMissions(conn)
+        self.economy = SQLiteEconomy(conn)
+        self.integrity = SQLiteIntegrity(conn)
+        self.backups = SQLiteBackups(conn)
+
+class SQLiteStorage(Storage):
+    """Todas as escritas passam pelo writer; os pools só leem"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.writer = Writer(path, SQLiteSession)
+        self.migrate()
+        
+        self.pool = ConnectionPool(path, readonly=True)
+        
+        # Leituras assíncronas rodam fora do event loop, com conexões próprias
+        self.read_pool = ConnectionPool(path, size=READER_THREADS, readonly=True)
+        self._readers = ThreadPoolExecutor(max_workers=READER_THREADS, thread_name_prefix="centraldiv-reader")
+    
+    def migrate(self):
+        """Aplica as migrações pendentes (ver database/migrations.py)"""
+        return self.writer.run(lambda tx: migrate(tx.conn))
+    
+    def connection(self):
+        """Conexão de leitura emprestada do pool (use com `with`)"""
+        return self.pool.connection()
+    
+    def run(self, op, *args):
+        return self.writer.run(op, *args)
+    
+    async def arun(self, op, *args):
+        """Enfileira `op(tx, *args)` no writer e espera o commit do lote"""
+        return await self.writer.arun(op, *args)
+    
+    def read(self, query, *args):
+        with self.pool.connection() as conn:
+            return query(SQLiteSession(conn), *args)
+    
+    def _run_read(self, query, args):
+        with self.read_pool.connection() as conn:
+            return query(SQLiteSession(conn), *args)
+    
+    async def aread(self, query, *args):
+        """Executa `query(tx, *args)` numa thread leitora sem travar o event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run_read, query, args)
+    
+    def close(self):
+        self._readers.shutdown(wait=True)
+        self.writer.stop()
+        self.read_pool.close()
+        self.pool.close()
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# database.db abre uma instância global na importação: longe do banco real
+os.environ.setdefault("CENTRALDIV_DB", os.path.join(tempfile.mkdtemp(prefix="centraldiv-tests-"), "global.db"))
+
+import pytest
+
+from database.db import Database
+from database.storage.memory import MemoryStorage
+
+ENGINES = ('sqlite', 'memory')
+
+def open_database(engine, folder):
+    if engine == 'memory':
+        return Database(storage=MemoryStorage())
+    return Database(str(folder / f'{engine}.db'))
+
+@pytest.fixture(params=ENGINES)
+def database(request, tmp_path):
+    """Um Database novo em cada engine"""
+    db = open_database(request.param, tmp_path)
+    yield db
+    db.close()
@@ -0,0 +1,49 @@
+import asyncio
+
+from database.auctions import AuctionHouse
+
+GUILD = 1
+SELLER, LEADER, BROKE, RICH = 1, 2, 3, 4
+
+def open_auction(db):
+    for user_id in (LEADER, BROKE, RICH):
+        db.get_or_create_user(user_id, GUILD)
+    # BROKE fica com 150: não cobre um lance de 200
+    db.remove_money(BROKE, GUILD, db.get_balance(BROKE, GUILD) - 150, "Ajuste")
+    return db.create_auction(GUILD, SELLER, "Lote", 10, 24)
+
+def test_failed_outbid_keeps_previous_bid(database):
+    auction_id = open_auction(database)
+    leader_before = database.get_balance(LEADER, GUILD)
+    assert database.place_bid(auction_id, LEADER, 100) == (True, "Lance realizado")
+    
+    assert database.place_bid(auction_id, BROKE, 200) == (False, "Saldo insuficiente")
+    
+    auction = database._read_sync(database._query_auction, auction_id)
+    assert (auction.current_bid, auction.highest_bidder) == (100, LEADER)
+    # A devolução ao líder foi desfeita junto com a cobrança que falhou
+    assert database.get_balance(LEADER, GUILD) == leader_before - 100
+    assert database.get_balance(BROKE, GUILD) == 150
+    assert [row.description for row in database.get_transactions(LEADER, GUILD, -1)] == [f"Lance leilão #{auction_id}"]
+
+def test_failed_outbid_through_actor_then_valid_outbid_refunds(database):
+    auction_id = open_auction(database)
+    leader_before = database.get_balance(LEADER, GUILD)
+    
+    async def bids():
+        house = AuctionHouse(database)
+        try:
+            first = await house.bid(auction_id, LEADER, 100)
+            failed = await house.bid(auction_id, BROKE, 200)
+            kept = database._read_sync(database._query_auction, auction_id)
+            outbid = await house.bid(auction_id, RICH, increment=0.5)
+            return first, failed, kept, outbid
+        finally:
+            house.stop()
+    
+    first, failed, kept, outbid = asyncio.run(bids())
+    assert first[0] and not failed[0]
+    assert (kept.current_bid, kept.highest_bidder) == (100, LEADER)
+    # O incremento parte do lance que ficou (100), não do que falhou
+    assert outbid == (True, "Lance realizado", 150)
+    assert database.get_balance(LEADER, GUILD) == leader_before
@@ -0,0 +1,50 @@
+import asyncio
+
+from database.db import Database, now_ts
+from database.storage.memory import MemoryStorage
+
+GUILD = 1
+
+def reopen(db):
+    """Outro Database sobre o mesmo armazenamento (como numa nova partida)"""
+    db.close()
+    if isinstance(db.storage, MemoryStorage):
+        return Database(storage=db.storage)
+    return Database(db.db_path)
+
+def test_release_after_flush_frees_cooldown_on_reload(database):
+    database.add_money(1, GUILD, 100, "Carga")
+    now = now_ts()
+    assert database.use_cooldown('work', GUILD, 1, now) == 0
+    asyncio.run(database.aflush_cooldowns())
+    
+    # O pagamento falhou depois que o uso já estava gravado
+    database.cooldowns.release('work', GUILD, 1, now)
+    assert database.use_cooldown('work', GUILD, 1, now + 1) == 0
+    database.cooldowns.release('work', GUILD, 1, now + 1)
+    asyncio.run(database.aflush_cooldowns())
+    
+    database = reopen(database)
+    try:
+        assert database.get_or_create_user(1, GUILD).last_work is None
+        assert database.use_cooldown('work', GUILD, 1, now + 2) == 0
+    finally:
+        database.close()
+
+def test_release_restores_previous_use(database):
+    database.add_money(1, GUILD, 100, "Carga")
+    cooldown = database.cooldown_for('work', GUILD)
+    # Uso vencido mas ainda recarregado na partida (a janela cobre o diário)
+    first = now_ts() - cooldown - 60
+    assert database.use_cooldown('work', GUILD, 1, first) == 0
+    asyncio.run(database.aflush_cooldowns())
+    
+    database = reopen(database)
+    try:
+        second = first + cooldown
+        assert database.use_cooldown('work', GUILD, 1, second) == 0
+        database.cooldowns.release('work', GUILD, 1, second)
+        asyncio.run(database.aflush_cooldowns())
+        assert database.get_or_create_user(1, GUILD).last_work == first
+    finally:
+        database.close()
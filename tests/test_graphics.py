@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+pytest.importorskip("discord")
+
+from cogs import graphics
+from cogs.graphics import CurveReducer, GraphicsCog, lttb
+from database.db import Database
+
+GUILD = 1
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 300) * 100
+    y[4321] = 1_000
+    
+    rx, ry = lttb(x, y, 100)
+    assert len(rx) == len(ry) == 100
+    assert (rx[0], rx[-1]) == (0, 9_999)
+    assert np.all(np.diff(rx) > 0)
+    assert ry.max() == 1_000
+    # Curva curta passa inteira
+    short = x[:50]
+    assert lttb(short, y[:50], 100)[0] is short
+
+def test_curve_reducer_is_bounded_and_keeps_extremes():
+    rng = np.random.default_rng(5)
+    y = np.cumsum(rng.integers(-100, 101, 50_000))
+    reducer = CurveReducer(50)
+    for start in range(0, len(y), 777):
+        reducer.add(np.arange(start, min(start + 777, len(y))), y[start:start + 777])
+        assert len(reducer.x) <= 8 * 50 + 777
+    
+    assert reducer.count == len(y)
+    assert (reducer.y.min(), reducer.y.max()) == (y.min(), y.max())
+    assert (reducer.x[0], reducer.x[-1]) == (0, len(y) - 1)
+    rx, ry = reducer.result()
+    assert len(rx) == 50 and ry[-1] == y[-1]
+
+def test_balance_curve_ends_at_current_balance(database, monkeypatch):
+    database.add_money_many([1, 2], GUILD, 1000, "Carga")
+    rng = random.Random(9)
+    for _ in range(300):
+        from_id, to_id = rng.sample([1, 2], 2)
+        database.transfer_money(from_id, to_id, GUILD, rng.randint(1, 400))
+    
+    # Blocos pequenos: a curva atravessa vários
+    monkeypatch.setattr(database, 'aiter_balance_deltas',
+                        functools.partial(Database.aiter_balance_deltas, database, chunk=7))
+    monkeypatch.setattr(graphics, 'db', database)
+    monkeypatch.setattr(graphics, 'CHART_POINTS', 20)
+    
+    async def run():
+        rows = [row async for chunk in database.aiter_balance_deltas(1, GUILD) for row in chunk]
+        return rows, await GraphicsCog._balance_curve(None, 1, GUILD)
+    
+    rows, (times, values, summary) = asyncio.run(run())
+    balance = database.get_balance(1, GUILD)
+    full = database.get_or_create_user(1, GUILD).opening_balance + np.cumsum([row[1] for row in rows])
+    assert len(times) == len(values) == 20
+    assert values[-1] == full[-1] == balance
+    assert summary == {'entries': len(rows), 'max': max(full.max(), balance), 'min': full.min()}
+    
+    assert asyncio.run(GraphicsCog._balance_curve(None, 99, GUILD)) is None
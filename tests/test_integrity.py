@@ -0,0 +1,54 @@
+import asyncio
+
+GUILD = 1
+
+def verify(database):
+    return asyncio.run(database.averify_guild(GUILD))
+
+def test_clean_ledger_has_no_drift_after_start_balance_change(database):
+    database.add_money_many(list(range(1, 21)), GUILD, 100, "Carga")
+    database.get_or_create_user(50, GUILD)
+    asyncio.run(database.aupdate_guild_settings(GUILD, start_balance=5000))
+    database.add_money_many(list(range(21, 41)), GUILD, 100, "Carga")
+    database.remove_money_many(list(range(60, 70)), GUILD, 10, "Taxa")
+    for user_id in range(1, 40, 2):
+        database.transfer_money(user_id, user_id + 1, GUILD, 50, 0.05)
+    
+    report = verify(database)
+    assert report.checked == 51
+    assert report.drift == []
+    # Abertas antes e depois da mudança, cada uma com o seu saldo inicial
+    assert database.get_balance(1, GUILD) == 1000 + 100 - 50
+    assert database.get_balance(21, GUILD) == 5000 + 100 - 50
+    
+    # Segunda passada: só o que veio depois dos checkpoints
+    database.transfer_money(2, 3, GUILD, 30)
+    assert verify(database).drift == []
+
+def test_drift_is_reported_once(database):
+    database.add_money_many([1, 2, 3], GUILD, 100, "Carga")
+    assert verify(database).drift == []
+    
+    # Saldo mexido por fora do extrato
+    database._write(lambda tx: tx.users.debit(2, GUILD, 7))
+    report = verify(database)
+    assert [(entry.user_id, entry.diff, entry.full) for entry in report.drift] == [(2, -7, False)]
+    assert report.net_drift == -7
+    assert verify(database).drift == []
+
+def test_background_sweep_covers_every_guild(database):
+    for guild_id in (1, 2):
+        database.add_money_many(list(range(1, 11)), guild_id, 10, "Carga")
+    
+    async def sweep():
+        reports = []
+        while len(reports) < 2:
+            report = await database.aintegrity_step([1, 2])
+            if report is not None:
+                reports.append(report)
+        return reports
+    
+    reports = asyncio.run(sweep())
+    assert [(report.guild_id, report.checked, report.drift) for report in reports] == [(1, 10, []), (2, 10, [])]
+    # Passada concluída: a próxima só depois de INTEGRITY_PASS_INTERVAL
+    assert asyncio.run(database.aintegrity_step([1, 2])) is None
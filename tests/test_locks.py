@@ -0,0 +1,38 @@
+import asyncio
+import random
+
+from database.locks import UserLocks
+
+GUILD = 1
+
+def test_hold_ignores_none_and_repeated_stripes():
+    locks = UserLocks(stripes=1)
+    
+    async def run():
+        # Os dois usuários caem na mesma faixa: pegar duas vezes travaria
+        async with locks.hold(GUILD, 1, 2, None):
+            return locks.stats()['held']
+    
+    assert asyncio.run(asyncio.wait_for(run(), 1)) == 1
+
+def test_crossed_transfers_conserve_money_without_deadlock(database):
+    # Poucas faixas para forçar colisões entre pares diferentes
+    database.locks = UserLocks(stripes=8)
+    user_ids = list(range(1, 33))
+    database.add_money_many(user_ids, GUILD, 100, "Carga")
+    total = sum(database.get_balance(user_id, GUILD) for user_id in user_ids)
+    rng = random.Random(3)
+    
+    async def transfer(from_id, to_id, amount):
+        async with database.locks.hold(GUILD, from_id, to_id):
+            await asyncio.sleep(0)
+            await database.atransfer_money(from_id, to_id, GUILD, amount)
+    
+    async def run():
+        pairs = [rng.sample(user_ids, 2) for _ in range(2000)]
+        await asyncio.gather(*(transfer(a, b, rng.randint(1, 300)) for a, b in pairs))
+    
+    asyncio.run(asyncio.wait_for(run(), 60))
+    assert sum(database.get_balance(user_id, GUILD) for user_id in user_ids) == total
+    stats = database.locks.stats()
+    assert stats['held'] == 0 and stats['contended'] > 0
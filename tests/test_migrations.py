@@ -0,0 +1,190 @@
+"""Um banco criado pelo schema antigo (central.py, versão 0) migra até a versão atual"""
+import inspect
+import sqlite3
+
+from database.db import Database
+from database.migrations import BASELINE, MIGRATIONS, PLAN_CHECKS, PLAN_SKIP, SCHEMA_VERSION, find_full_scans, table_columns
+
+GUILD = 1
+
+# CREATE TABLE do init_database do central.py, antes do database/migrations.py
+# (investments sem start_date, shops sem is_official, sem guild_config)
+CENTRAL_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER,
+        guild_id INTEGER,
+        balance INTEGER DEFAULT 1000,
+        bank_balance INTEGER DEFAULT 0,
+        total_earned INTEGER DEFAULT 0,
+        total_spent INTEGER DEFAULT 0,
+        last_work TIMESTAMP,
+        last_daily TIMESTAMP,
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, guild_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        guild_id INTEGER,
+        type TEXT,
+        amount INTEGER,
+        description TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS shops (
+        shop_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        owner_id INTEGER,
+        name TEXT,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS items (
+        item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        shop_id INTEGER,
+        name TEXT,
+        description TEXT,
+        price INTEGER,
+        stock INTEGER DEFAULT -1,
+        effect_type TEXT,
+        effect_data TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS inventory (
+        user_id INTEGER,
+        guild_id INTEGER,
+        item_id INTEGER,
+        quantity INTEGER DEFAULT 1,
+        PRIMARY KEY (user_id, guild_id, item_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS investments (
+        investment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        guild_id INTEGER,
+        amount INTEGER,
+        risk_level TEXT,
+        end_date TIMESTAMP,
+        return_rate REAL,
+        status TEXT DEFAULT 'active'
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS daily_missions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        guild_id INTEGER,
+        mission_type TEXT,
+        target INTEGER,
+        progress INTEGER DEFAULT 0,
+        reward INTEGER,
+        expires_at TIMESTAMP,
+        completed INTEGER DEFAULT 0,
+        UNIQUE(user_id, guild_id, expires_at)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS backups (
+        backup_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        name TEXT,
+        data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+def baseline_columns(table):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(BASELINE[table])
+    return table_columns(conn, table)
+
+def old_database(path):
+    conn = sqlite3.connect(path)
+    for create_sql in CENTRAL_SCHEMA:
+        conn.execute(create_sql)
+    # Datas em texto, como o código antigo gravava
+    conn.execute('''
+        INSERT INTO users (user_id, guild_id, balance, total_earned, last_work, joined_at)
+        VALUES (10, ?, 1300, 300, '2024-01-02 10:00:00', '2024-01-01 09:00:00')
+    ''', (GUILD,))
+    conn.executemany('''
+        INSERT INTO transactions (user_id, guild_id, type, amount, description, timestamp)
+        VALUES (10, ?, 'income', ?, 'Trabalho', ?)
+    ''', [(GUILD, 100, '2024-01-02 10:00:00'), (GUILD, 200, '2024-01-03 10:00:00')])
+    conn.execute("INSERT INTO shops (guild_id, owner_id, name, description) VALUES (?, 10, 'Loja', '')", (GUILD,))
+    conn.execute('''
+        INSERT INTO investments (user_id, guild_id, amount, risk_level, end_date, return_rate, status)
+        VALUES (10, ?, 500, 'alto', '2024-01-05 10:00:00', 0.5, 'completed')
+    ''', (GUILD,))
+    conn.commit()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 0
+    conn.close()
+
+def test_v2_rebuilds_tables_that_drifted_from_baseline(tmp_path):
+    path = str(tmp_path / 'old.db')
+    old_database(path)
+    
+    conn = sqlite3.connect(path)
+    for migration in MIGRATIONS[:2]:
+        migration(conn)
+    for table in BASELINE:
+        assert table_columns(conn, table) == baseline_columns(table)
+    # Leitura por posição: start_date entra no meio, vazio
+    assert conn.execute('SELECT * FROM investments').fetchall() == [
+        (1, 10, GUILD, 500, 'alto', None, '2024-01-05 10:00:00', 0.5, 'completed')]
+    assert conn.execute('SELECT name, is_official FROM shops').fetchall() == [('Loja', 0)]
+    conn.close()
+
+def test_old_schema_migrates_to_current_version(tmp_path):
+    path = str(tmp_path / 'old.db')
+    old_database(path)
+    
+    db = Database(path)
+    try:
+        with db.storage.connection() as conn:
+            assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+            assert SCHEMA_VERSION >= 11
+            assert 'opening_balance' in table_columns(conn, 'users')
+            assert table_columns(conn, 'balance_checkpoints') == ['guild_id', 'user_id', 'ledger_id', 'balance', 'checked_at']
+            assert conn.execute('SELECT typeof(timestamp) FROM transactions').fetchall() == [('integer',)] * 2
+            assert find_full_scans(db, conn) == []
+            # v2: colunas que o central.py não tinha, no lugar do schema base
+            for table in ('investments', 'shops', 'daily_missions'):
+                canonical = baseline_columns(table)
+                assert table_columns(conn, table)[:len(canonical)] == canonical
+            assert conn.execute('''
+                SELECT amount, risk_level, start_date, typeof(end_date), return_rate, status FROM investments
+            ''').fetchall() == [(500, 'alto', None, 'integer', 0.5, 'completed')]
+            assert conn.execute('SELECT name, is_official FROM shops').fetchall() == [('Loja', 0)]
+        
+        user = db.get_or_create_user(10, GUILD)
+        # Sem guild_config no schema antigo: abre com o start_balance padrão
+        assert (user.balance, user.opening_balance) == (1300, 1000)
+        assert db.get_balance(10, GUILD) == 1300
+        assert {row.type: row.total for row in db._read_sync(db._query_ledger_totals, 10, GUILD)} == {'income': 300}
+    finally:
+        db.close()
+    
+    # Reabrir não reaplica nada
+    db = Database(path)
+    try:
+        assert db.get_balance(10, GUILD) == 1300
+    finally:
+        db.close()
+
+def test_plan_checks_cover_every_op():
+    ops = {name for name, fn in inspect.getmembers(Database, inspect.isfunction)
+           if list(inspect.signature(fn).parameters)[1:2] == ['tx']}
+    checked = {method for method, args in PLAN_CHECKS}
+    assert ops - checked - set(PLAN_SKIP) == set()
+    assert checked | set(PLAN_SKIP) <= ops
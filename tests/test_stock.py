@@ -0,0 +1,41 @@
+import asyncio
+
+from database.db import OUT_OF_STOCK
+
+GUILD = 1
+STOCK = 10
+PRICE = 100
+
+def drop(database, buyers, broke=()):
+    shop_id = database.create_shop(GUILD, 1, "Loja")
+    item_id = database.create_item(shop_id, "Limitado", PRICE, stock=STOCK)
+    database.add_money_many(buyers, GUILD, 0, "Conta")
+    for user_id in broke:
+        database.remove_money(user_id, GUILD, database.get_balance(user_id, GUILD) - PRICE + 1, "Zerar")
+    
+    async def run():
+        return await asyncio.gather(*(database.abuy_item(user_id, GUILD, item_id) for user_id in buyers))
+    
+    return item_id, asyncio.run(run())
+
+def test_stock_n_yields_exactly_n_winners(database):
+    buyers = list(range(1, 301))
+    item_id, results = drop(database, buyers)
+    
+    winners = [user_id for user_id, (item, _) in zip(buyers, results) if item]
+    assert len(winners) == STOCK
+    assert {message for item, message in results if not item} == {OUT_OF_STOCK}
+    assert database._read_sync(database._query_item, item_id).stock == 0
+    owners = [user_id for user_id in buyers if database.get_inventory(user_id, GUILD)]
+    assert sorted(owners) == sorted(winners)
+
+def test_failed_charges_return_units_to_the_drop(database):
+    buyers = list(range(1, 301))
+    # Os primeiros da fila não têm saldo: as unidades deles voltam
+    broke = buyers[:25]
+    item_id, results = drop(database, buyers, broke)
+    
+    winners = [user_id for user_id, (item, _) in zip(buyers, results) if item]
+    assert len(winners) == STOCK
+    assert not set(winners) & set(broke)
+    assert database._read_sync(database._query_item, item_id).stock == 0